@@ -1,7 +1,47 @@
 # sección [CREADOR DE MAPAS] Creador de mapas para el juego
-import tkinter as tk
-from tkinter import filedialog, messagebox
 import json
+import sys
+
+import numpy as np
+
+from herramientas.analizar_mapa import analyze, format_report, problems, unreachable_cells
+from herramientas.formato_mapa import MapFormatError, read_map, write_map
+from herramientas.mapa import MapGrid, line_cells, rect_cells
+from herramientas.perfil_editor import EditorProfiler
+
+# Tamaño máximo del mapa en celdas por lado
+MAX_MAP_SIZE = 1000
+
+# Celdas dibujadas alrededor de la parte visible del canvas
+VIEW_MARGIN = 4
+
+# Memoria máxima (estimada) del historial de hacer/deshacer
+MAX_HISTORY_BYTES = 32 * 1024 * 1024
+
+# Máximo de celdas resaltadas por el análisis
+MAX_HIGHLIGHTS = 500
+
+# Herramientas de edición: (valor, etiqueta)
+TOOLS = (
+    ("pincel", "Pincel"),
+    ("relleno", "Relleno"),
+    ("rectangulo", "Rectángulo"),
+    ("rectangulo_hueco", "Rect. hueco"),
+    ("linea", "Línea"),
+    ("copiar", "Copiar"),
+    ("estampar", "Estampar"),
+)
+
+# tkinter se importa sólo al abrir el editor: la línea de comandos
+# (herramientas.mapas) no lo necesita
+tk = filedialog = messagebox = None
+
+
+def load_tk():
+    global tk, filedialog, messagebox
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
 
 class MapEditor:
     def __init__(self, root):
@@ -10,17 +50,28 @@ class MapEditor:
         self.root.geometry("1200x800")
         
         # Configuración del grid
-        self.grid_width = 40
-        self.grid_height = 30
         self.cell_size = 20
         
         # Tipo de bloque seleccionado
         self.selected_block = "."
         
-        # Historial para hacer/deshacer
+        # Historial para hacer/deshacer: cada entrada es un trazo con los cambios
+        # de celda (x, y, anterior, nuevo) o una instantánea del grid completo
+        # (redimensionar, cargar, limpiar). history_index = entradas aplicadas.
         self.history = []
-        self.history_index = -1
-        self.max_history_size = 50
+        self.history_sizes = []
+        self.history_bytes = 0
+        self.history_index = 0
+        self.max_history_bytes = MAX_HISTORY_BYTES
+        
+        # Cambios del trazo en curso: (x, y) -> [anterior, nuevo]
+        self.stroke = {}
+        
+        # Herramientas: celda donde empezó el arrastre, vista previa y
+        # región copiada para estampar
+        self.drag_start = None
+        self.preview_id = None
+        self.clipboard = None
         
         # Definición de tipos de bloques con sus colores
         self.block_types = {
@@ -42,8 +93,15 @@ class MapEditor:
             "L": {"name": "Ladrillo", "color": "#AA4444"},
             " ": {"name": "Vacío", "color": "#222222"}
         }
-        # Inicializar grid del mapa
-        self.map_grid = [["." for _ in range(self.grid_width)] for _ in range(self.grid_height)]
+        # Inicializar el mapa (40x30 de suelo)
+        self.map = MapGrid(40, 30)
+        
+        # Estado del canvas: se crea en build_canvas_items y se actualiza por celdas.
+        # Sólo tienen rectángulo las celdas de la vista (view: x0, y0, x1, y1); con
+        # uno por celda, un mapa de 1000x1000 serían un millón de elementos de Tk
+        self.canvas_size = None
+        self.view = None
+        self.dirty = set()
         
         # Crear interfaz
         self.create_ui()
@@ -91,6 +149,9 @@ class MapEditor:
         btn_clear = tk.Button(btn_frame, text="Limpiar", command=self.clear_map, bg="#F44336", fg="black", font=("Arial", 9, "bold"), padx=10, pady=3)
         btn_clear.pack(side=tk.LEFT, padx=2)
         
+        btn_analyze = tk.Button(btn_frame, text="Analizar", command=self.analyze_map, bg="#607D8B", fg="black", font=("Arial", 9, "bold"), padx=10, pady=3)
+        btn_analyze.pack(side=tk.LEFT, padx=2)
+        
         # Frame para controles de tamaño
         size_frame = tk.Frame(controls_frame)
         size_frame.pack(side=tk.LEFT, padx=20)
@@ -116,6 +177,17 @@ class MapEditor:
         btn_resize = tk.Button(size_frame, text="Redimensionar", command=self.resize_map, bg="#9C27B0", fg="black", font=("Arial", 8, "bold"), padx=8, pady=2)
         btn_resize.pack(side=tk.LEFT, padx=2)
         
+        # Herramientas de edición
+        tools_frame = tk.Frame(right_frame)
+        tools_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 10))
+        
+        tools_label = tk.Label(tools_frame, text="Herramienta:", font=("Arial", 9, "bold"))
+        tools_label.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.tool_var = tk.StringVar(value="pincel")
+        for value, text in TOOLS:
+            tk.Radiobutton(tools_frame, text=text, value=value, variable=self.tool_var, indicatoron=False, font=("Arial", 8), padx=6, pady=2).pack(side=tk.LEFT, padx=1)
+        
         # Label para mostrar bloque seleccionado
         self.selected_label = tk.Label(controls_frame, text=f"Seleccionado: {self.block_types[self.selected_block]['name']}", font=("Arial", 10), bg="white", padx=10)
         self.selected_label.pack(side=tk.LEFT, padx=20)
@@ -143,17 +215,18 @@ class MapEditor:
         )
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        v_scrollbar.config(command=self.canvas.yview)
-        h_scrollbar.config(command=self.canvas.xview)
+        v_scrollbar.config(command=self.scroll_y)
+        h_scrollbar.config(command=self.scroll_x)
+        self.canvas.bind("<Configure>", lambda e: self.update_viewport())
         
         # Dibujar grid inicial
         self.draw_grid()
         
         # Bind eventos del mouse
-        self.canvas.bind("<Button-1>", self.paint_block)
-        self.canvas.bind("<B1-Motion>", self.paint_block)
+        self.canvas.bind("<Button-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
         # Importante: Detener el trazo al soltar el mouse para que el historial funcione
-        self.canvas.bind("<ButtonRelease-1>", self.stop_painting)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
         
         # Bind eventos de teclado para hacer/deshacer
         self.root.bind("<Control-z>", lambda e: self.undo())
@@ -303,235 +376,404 @@ class MapEditor:
         self.selected_block = block_type
         self.selected_label.config(text=f"Seleccionado: {self.block_types[block_type]['name']}")
         
-    def add_to_history(self):
-        """Agrega el estado actual al historial"""
-        # Crear una copia profunda del grid actual
-        grid_copy = [row[:] for row in self.map_grid]
-        
-        # Si estamos en medio del historial, eliminar los estados futuros
-        if self.history_index < len(self.history) - 1:
-            self.history = self.history[:self.history_index + 1]
-        
-        # Agregar nuevo estado al historial
-        self.history.append(grid_copy)
+    @property
+    def grid_width(self):
+        return self.map.width
+    
+    @property
+    def grid_height(self):
+        return self.map.height
+    
+    def record_change(self, x, y, block, rotation=0):
+        """Cambia una celda anotando el cambio en el trazo en curso"""
+        new = (block, rotation)
+        change = self.stroke.get((x, y))
+        if change is None:
+            self.stroke[(x, y)] = [self.map.get(x, y), new]
+        else:
+            change[1] = new
+        self.map.set(x, y, block, rotation)
+        self.dirty.add((x, y))
+    
+    def commit_stroke(self):
+        """Cierra el trazo en curso como una única entrada del historial"""
+        changes = [(x, y, old, new) for (x, y), (old, new) in self.stroke.items() if old != new]
+        self.stroke = {}
+        if changes:
+            xs, ys, old, new = zip(*changes)
+            code = self.map.code
+            self.push_change(
+                np.array(xs), np.array(ys),
+                np.array([code(block) for block, _ in old], dtype=np.uint8),
+                np.array([rotation for _, rotation in old], dtype=np.uint16),
+                np.array([code(block) for block, _ in new], dtype=np.uint8),
+                np.array([rotation for _, rotation in new], dtype=np.uint16),
+            )
+    
+    def push_change(self, *arrays):
+        """Entrada de celdas: xs, ys y códigos/rotaciones anteriores y nuevos (arrays)"""
+        self.push_history(("celdas",) + arrays, sum(a.nbytes for a in arrays))
+    
+    def apply_cells(self, xs, ys, codes, rotations):
+        """Escribe de una vez un conjunto de celdas (sin repetir) como una sola acción"""
+        self.commit_stroke()
+        old_codes = self.map.blocks[ys, xs]
+        old_rotations = self.map.rotations[ys, xs]
+        changed = (old_codes != codes) | (old_rotations != rotations)
+        if not changed.any():
+            return
+        
+        xs, ys = xs[changed], ys[changed]
+        codes = np.broadcast_to(codes, changed.shape)[changed].astype(np.uint8)
+        rotations = np.broadcast_to(rotations, changed.shape)[changed].astype(np.uint16)
+        self.push_change(xs, ys, old_codes[changed], old_rotations[changed], codes, rotations)
+        self.map.blocks[ys, xs] = codes
+        self.map.rotations[ys, xs] = rotations
+        self.dirty.update(zip(xs.tolist(), ys.tolist()))
+        self.flush_dirty()
+    
+    def apply_block(self, xs, ys, block, rotation=0):
+        self.apply_cells(xs, ys, self.map.code(block), rotation)
+    
+    def replace_grid(self, new_map):
+        """Sustituye el mapa completo (redimensionar, cargar, limpiar) guardando una instantánea"""
+        self.commit_stroke()
+        old_map = self.map
+        # El mapa anterior deja de modificarse; del nuevo se guarda una copia
+        # porque es el que se va a pintar
+        self.push_history(("mapa", old_map, new_map.copy()), old_map.nbytes() + new_map.nbytes())
+        self.set_grid(new_map)
+    
+    def set_grid(self, new_map):
+        self.map = new_map
+        self.draw_grid()
+    
+    def push_history(self, entry, size):
+        """Agrega una entrada descartando lo rehacible y lo más antiguo si se pasa del presupuesto"""
+        if self.history_index < len(self.history):
+            self.history_bytes -= sum(self.history_sizes[self.history_index:])
+            del self.history[self.history_index:]
+            del self.history_sizes[self.history_index:]
+        
+        self.history.append(entry)
+        self.history_sizes.append(size)
+        self.history_bytes += size
         self.history_index += 1
         
-        # Limitar el tamaño del historial
-        if len(self.history) > self.max_history_size:
+        # Siempre se conserva al menos la última entrada
+        while self.history_bytes > self.max_history_bytes and len(self.history) > 1:
             self.history.pop(0)
+            self.history_bytes -= self.history_sizes.pop(0)
             self.history_index -= 1
     
+    def apply_history(self, entry, forward):
+        if entry[0] == "celdas":
+            _, xs, ys, old_codes, old_rotations, new_codes, new_rotations = entry
+            self.map.blocks[ys, xs] = new_codes if forward else old_codes
+            self.map.rotations[ys, xs] = new_rotations if forward else old_rotations
+            self.dirty.update(zip(xs.tolist(), ys.tolist()))
+            self.flush_dirty()
+        else:
+            snapshot = entry[2] if forward else entry[1]
+            self.set_grid(snapshot.copy())
+    
     def undo(self):
         """Deshace la última acción"""
+        self.commit_stroke()
         if self.history_index > 0:
             self.history_index -= 1
-            self.map_grid = [row[:] for row in self.history[self.history_index]]
-            self.draw_grid()
+            self.apply_history(self.history[self.history_index], forward=False)
     
     def redo(self):
         """Rehace la acción deshecha"""
-        if self.history_index < len(self.history) - 1:
+        self.commit_stroke()
+        if self.history_index < len(self.history):
+            self.apply_history(self.history[self.history_index], forward=True)
             self.history_index += 1
-            self.map_grid = [row[:] for row in self.history[self.history_index]]
-            self.draw_grid()
-    
-def draw_grid(self):
-    self.canvas.delete("all")
-    for y in range(self.grid_height):
-        for x in range(self.grid_width):
-            x1 = x * self.cell_size
-            y1 = y * self.cell_size
-            x2 = x1 + self.cell_size
-            y2 = y1 + self.cell_size
-            
-            cell_data = self.map_grid[y][x]
-            
-            if hasattr(cell_data, '__iter__') and not isinstance(cell_data, str):
-                block_type = cell_data[0] if len(cell_data) > 0 else "."
-                rotation = cell_data[1] if len(cell_data) > 1 else 0
-            else:
-                block_type = cell_data
-                rotation = 0
-            
-            color = self.block_types.get(block_type, self.block_types["."])["color"]
-            
-            self.canvas.create_rectangle(
-                x1, y1, x2, y2,
-                fill=color,
-                outline="#CCCCCC",
-                tags=f"cell_{x}_{y}"
-            )
+    
+    def build_canvas_items(self):
+        """Prepara el canvas para el tamaño del mapa; sólo hace falta al cambiar el tamaño"""
+        self.canvas.delete("all")
+        self.preview_id = None
+        self.rect_ids = {}
+        # Los textos se crean bajo demanda (el suelo no lleva texto)
+        self.text_ids = {}
+        # Lo que muestra el canvas en cada celda de la vista
+        self.rendered = MapGrid(self.grid_width, self.grid_height)
+        self.dirty = set()
+        self.view = None
+        self.canvas_size = (self.grid_width, self.grid_height)
+        self.canvas.config(scrollregion=(0, 0, self.grid_width * self.cell_size, self.grid_height * self.cell_size))
+        self.update_viewport()
+    
+    def scroll_x(self, *args):
+        self.canvas.xview(*args)
+        self.update_viewport()
+    
+    def scroll_y(self, *args):
+        self.canvas.yview(*args)
+        self.update_viewport()
+    
+    def update_viewport(self):
+        """Crea los rectángulos de las celdas que se ven (más un margen) y borra los demás"""
+        size = self.cell_size
+        x0 = max(int(self.canvas.canvasx(0) // size) - VIEW_MARGIN, 0)
+        y0 = max(int(self.canvas.canvasy(0) // size) - VIEW_MARGIN, 0)
+        x1 = min(int(self.canvas.canvasx(self.canvas.winfo_width()) // size) + 1 + VIEW_MARGIN, self.grid_width)
+        y1 = min(int(self.canvas.canvasy(self.canvas.winfo_height()) // size) + 1 + VIEW_MARGIN, self.grid_height)
+        if (x0, y0, x1, y1) == self.view:
+            return
+        self.view = (x0, y0, x1, y1)
+        
+        for x, y in [cell for cell in self.rect_ids if not self.in_view(*cell)]:
+            self.canvas.delete(self.rect_ids.pop((x, y)))
+            text_id = self.text_ids.pop((x, y), None)
+            if text_id is not None:
+                self.canvas.delete(text_id)
+        
+        floor_color = self.block_types["."]["color"]
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                if (x, y) in self.rect_ids:
+                    continue
+                self.rect_ids[(x, y)] = self.canvas.create_rectangle(
+                    x * size, y * size, (x + 1) * size, (y + 1) * size,
+                    fill=floor_color,
+                    outline="#CCCCCC"
+                )
+                self.rendered.set(x, y, ".")
+                self.render_cell(x, y)
+        
+        # Lo dibujado encima de las celdas sigue encima de las nuevas
+        self.canvas.tag_raise("analisis")
+        if self.preview_id is not None:
+            self.canvas.tag_raise(self.preview_id)
+    
+    def in_view(self, x, y):
+        x0, y0, x1, y1 = self.view
+        return x0 <= x < x1 and y0 <= y < y1
+    
+    def draw_grid(self):
+        """Sincroniza el canvas con el mapa actualizando sólo las celdas que difieren"""
+        if self.canvas_size != (self.grid_width, self.grid_height):
+            self.build_canvas_items()
+        
+        # Fuera de la vista no hay nada dibujado: esas celdas se pintan al entrar en ella
+        x0, y0, x1, y1 = self.view
+        cells = self.map.crop(x0, y0, x1 - x0, y1 - y0).diff(self.rendered.crop(x0, y0, x1 - x0, y1 - y0))
+        self.dirty.update(map(tuple, (cells + (x0, y0)).tolist()))
+        self.flush_dirty()
+    
+    def flush_dirty(self):
+        """Redibuja las celdas marcadas como sucias"""
+        for x, y in self.dirty:
+            self.render_cell(x, y)
+        self.dirty.clear()
+    
+    def render_cell(self, x, y):
+        rect_id = self.rect_ids.get((x, y))
+        if rect_id is None:
+            return
+        block_type, rotation = self.map.get(x, y)
+        if (block_type, rotation) == self.rendered.get(x, y):
+            return
+        
+        color = self.block_types.get(block_type, self.block_types["."])["color"]
+        self.canvas.itemconfig(rect_id, fill=color)
+        
+        text_id = self.text_ids.get((x, y))
+        if block_type != ".":
+            display_text = block_type
+            if rotation != 0:
+                display_text += f"[{rotation}°]"
+            font = ("Arial", 6 if rotation != 0 else 8, "bold")
+            fill = "white" if block_type == "#" else "black"
             
-            if block_type != ".":
-                display_text = block_type
-                if rotation != 0:
-                    display_text += f"[{rotation}°]"
-                
-                self.canvas.create_text(
-                    x1 + self.cell_size // 2,
-                    y1 + self.cell_size // 2,
+            if text_id is None:
+                self.text_ids[(x, y)] = self.canvas.create_text(
+                    x * self.cell_size + self.cell_size // 2,
+                    y * self.cell_size + self.cell_size // 2,
                     text=display_text,
-                    font=("Arial", 6 if rotation != 0 else 8, "bold"),
-                    fill="white" if block_type == "#" else "black"
+                    font=font,
+                    fill=fill
                 )
+            else:
+                self.canvas.itemconfig(text_id, text=display_text, font=font, fill=fill)
+        elif text_id is not None:
+            self.canvas.itemconfig(text_id, text="")
+        
+        self.rendered.set(x, y, block_type, rotation)
+    
+    def event_cell(self, event, clamp=False):
+        """Celda bajo el ratón; None si está fuera del mapa (o la más cercana con clamp)"""
+        grid_x = int(self.canvas.canvasx(event.x) // self.cell_size)
+        grid_y = int(self.canvas.canvasy(event.y) // self.cell_size)
+        if clamp:
+            return min(max(grid_x, 0), self.grid_width - 1), min(max(grid_y, 0), self.grid_height - 1)
+        if 0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_height:
+            return grid_x, grid_y
+        return None
     
-    self.canvas.config(scrollregion=(0, 0, self.grid_width * self.cell_size, self.grid_height * self.cell_size))
+    def on_press(self, event):
+        tool = self.tool_var.get()
+        if tool == "pincel":
+            self.paint_block(event)
+            return
+        
+        cell = self.event_cell(event)
+        if cell is None:
+            return
+        if tool == "relleno":
+            self.apply_block(*self.map.flood_region(*cell), self.selected_block)
+        elif tool == "estampar":
+            self.stamp(*cell)
+        else:
+            self.drag_start = cell
+            self.update_preview(cell)
+    
+    def on_drag(self, event):
+        if self.tool_var.get() == "pincel":
+            self.paint_block(event)
+        elif self.drag_start is not None:
+            self.update_preview(self.event_cell(event, clamp=True))
+    
+    def on_release(self, event):
+        if self.drag_start is None:
+            self.stop_painting(event)
+            return
+        
+        tool = self.tool_var.get()
+        (x0, y0), (x1, y1) = self.drag_start, self.event_cell(event, clamp=True)
+        self.drag_start = None
+        if self.preview_id is not None:
+            self.canvas.delete(self.preview_id)
+            self.preview_id = None
+        
+        if tool == "rectangulo":
+            self.apply_block(*rect_cells(x0, y0, x1, y1), self.selected_block)
+        elif tool == "rectangulo_hueco":
+            self.apply_block(*rect_cells(x0, y0, x1, y1, filled=False), self.selected_block)
+        elif tool == "linea":
+            self.apply_block(*line_cells(x0, y0, x1, y1), self.selected_block)
+        elif tool == "copiar":
+            x0, x1 = sorted((x0, x1))
+            y0, y1 = sorted((y0, y1))
+            self.clipboard = self.map.crop(x0, y0, x1 - x0 + 1, y1 - y0 + 1)
+            self.tool_var.set("estampar")
+    
+    def update_preview(self, cell):
+        """Dibuja la línea o el rectángulo que se aplicará al soltar"""
+        (x0, y0), (x1, y1) = self.drag_start, cell
+        size = self.cell_size
+        if self.tool_var.get() == "linea":
+            coords = (x0 * size + size // 2, y0 * size + size // 2, x1 * size + size // 2, y1 * size + size // 2)
+            kind = "line"
+        else:
+            x0, x1 = sorted((x0, x1))
+            y0, y1 = sorted((y0, y1))
+            coords = (x0 * size, y0 * size, (x1 + 1) * size, (y1 + 1) * size)
+            kind = "rectangle"
+        
+        if self.preview_id is None:
+            if kind == "line":
+                self.preview_id = self.canvas.create_line(*coords, fill="red", width=3)
+            else:
+                self.preview_id = self.canvas.create_rectangle(*coords, outline="red", width=2, dash=(4, 2))
+        else:
+            self.canvas.coords(self.preview_id, *coords)
+    
+    def stamp(self, x, y):
+        """Pega la región copiada con su esquina superior izquierda en (x, y)"""
+        if self.clipboard is None:
+            messagebox.showwarning("Advertencia", "Primero copia una región con la herramienta Copiar")
+            return
+        
+        clip = self.clipboard
+        width = min(clip.width, self.grid_width - x)
+        height = min(clip.height, self.grid_height - y)
+        ys, xs = np.mgrid[0:height, 0:width]
+        codes = self.map.codes_of(clip)[ys, xs]
+        rotations = clip.rotations[ys, xs]
+        self.apply_cells((xs + x).ravel(), (ys + y).ravel(), codes.ravel(), rotations.ravel())
     
     def stop_painting(self, event):
-        """Reinicia la bandera de pintado al soltar el mouse"""
-        if hasattr(self, '_painting'):
-            del self._painting
+        """Al soltar el mouse el trazo pasa al historial como una sola entrada"""
+        self.commit_stroke()
 
-def paint_block(self, event):
-    canvas_x = self.canvas.canvasx(event.x)
-    canvas_y = self.canvas.canvasy(event.y)
+    def paint_block(self, event):
+        cell = self.event_cell(event)
+        if cell is not None:
+            grid_x, grid_y = cell
+            current_block, _ = self.map.get(grid_x, grid_y)
+        
+            if current_block != self.selected_block:
+                self.record_change(grid_x, grid_y, self.selected_block)
+                self.flush_dirty()
     
-    grid_x = int(canvas_x // self.cell_size)
-    grid_y = int(canvas_y // self.cell_size)
+    def save_map(self):
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+            initialdir="./mapas"
+        )
     
-    if 0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_height:
-        current_cell = self.map_grid[grid_y][grid_x]
-        
-        if hasattr(current_cell, '__iter__') and not isinstance(current_cell, str):
-            current_block = current_cell[0] if len(current_cell) > 0 else "."
-        else:
-            current_block = current_cell
-        
-        if current_block != self.selected_block:
-            if not hasattr(self, '_painting'):
-                self._painting = True
-                self.add_to_history()
-            
-            self.map_grid[grid_y][grid_x] = [self.selected_block, 0]
-            
-            x1 = grid_x * self.cell_size
-            y1 = grid_y * self.cell_size
-            x2 = x1 + self.cell_size
-            y2 = y1 + self.cell_size
-            
-            color = self.block_types[self.selected_block]["color"]
-            
-            self.canvas.delete(f"cell_{grid_x}_{grid_y}")
-            
-            self.canvas.create_rectangle(
-                x1, y1, x2, y2,
-                fill=color,
-                outline="#CCCCCC",
-                tags=f"cell_{grid_x}_{grid_y}"
-            )
-            
-            if self.selected_block != ".":
-                self.canvas.create_text(
-                    x1 + self.cell_size // 2,
-                    y1 + self.cell_size // 2,
-                    text=self.selected_block,
-                    font=("Arial", 8, "bold"),
-                    fill="white" if self.selected_block == "#" else "black",
-                    tags=f"cell_{grid_x}_{grid_y}"
-                )
+        if filename:
+            try:
+                self.save_file(filename)
+                messagebox.showinfo("Éxito", f"Mapa guardado correctamente en:\n{filename}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar el mapa:\n{str(e)}")
     
-def save_map(self):
-    filename = filedialog.asksaveasfilename(
-        defaultextension=".txt",
-        filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
-        initialdir="./mapas"
-    )
+    def load_map(self):
+        filename = filedialog.askopenfilename(
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+            initialdir="./mapas"
+        )
     
-    if filename:
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for row in self.map_grid:
-                    line = ""
-                    for cell in row:
-                        if hasattr(cell, '__iter__') and not isinstance(cell, str):
-                            block_type = cell[0] if len(cell) > 0 else "."
-                            rotation = cell[1] if len(cell) > 1 else 0
-                            if rotation != 0:
-                                line += f"({block_type}[{rotation}])"
-                            else:
-                                line += f"({block_type})"
-                        else:
-                            line += f"({cell})"
-                    f.write(line + "\n")
-            messagebox.showinfo("Éxito", f"Mapa guardado correctamente en:\n{filename}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al guardar el mapa:\n{str(e)}")
-    
-def load_map(self):
-    filename = filedialog.askopenfilename(
-        filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
-        initialdir="./mapas"
-    )
-    
-    if filename:
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            new_grid = []
-            for line in lines:
-                line = line.strip()
-                row = []
-                i = 0
-                while i < len(line):
-                    if line[i] == '(':
-                        end = line.find(')', i)
-                        if end != -1:
-                            token = line[i+1:end]
-                            
-                            if '[' in token and ']' in token:
-                                bracket_start = token.index('[')
-                                bracket_end = token.index(']')
-                                base = token[:bracket_start]
-                                rotation = token[bracket_start+1:bracket_end]
-                                try:
-                                    rotation = int(rotation)
-                                except ValueError:
-                                    rotation = 0
-                                row.append([base if base else ".", rotation])
-                            else:
-                                row.append([token if token else ".", 0])
-                            
-                            i = end + 1
-                        else:
-                            i += 1
-                    else:
-                        i += 1
-                
-                if row:
-                    new_grid.append(row)
-            
-            if new_grid:
-                self.add_to_history()
-                
-                self.grid_height = len(new_grid)
-                self.grid_width = len(new_grid[0]) if new_grid else 0
-                
-                for row in new_grid:
-                    while len(row) < self.grid_width:
-                        row.append([".", 0])
-                
-                self.map_grid = new_grid
-                
-                self.canvas.config(
-                    scrollregion=(0, 0, self.grid_width * self.cell_size, self.grid_height * self.cell_size)
-                )
-                self.draw_grid()
-                
-                messagebox.showinfo("Éxito", "Mapa cargado correctamente")
-            else:
-                messagebox.showwarning("Advertencia", "El archivo está vacío o tiene formato incorrecto")
+        if filename:
+            try:
+                if self.load_file(filename):
+                    messagebox.showinfo("Éxito", "Mapa cargado correctamente")
+                else:
+                    messagebox.showwarning("Advertencia", "El archivo está vacío")
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar el mapa:\n{str(e)}")
+            except MapFormatError as e:
+                messagebox.showerror("Error", f"Formato de mapa incorrecto:\n{e}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al cargar el mapa:\n{str(e)}")
+    
+    def save_file(self, filename):
+        write_map(self.map, filename)
+    
+    def load_file(self, filename):
+        """Carga un mapa de texto; False si está vacío"""
+        new_map = read_map(filename)
+        if not new_map.height:
+            return False
+        self.replace_grid(new_map)
+        return True
+    
+    def analyze_map(self):
+        """Analiza alcanzabilidad e integridad y resalta las celdas inalcanzables"""
+        self.canvas.delete("analisis")
+        report = analyze(self.map)
+        
+        size = self.cell_size
+        for x, y in unreachable_cells(report)[:MAX_HIGHLIGHTS]:
+            self.canvas.create_rectangle(
+                x * size + 1, y * size + 1, (x + 1) * size - 1, (y + 1) * size - 1,
+                outline="red", width=3, tags="analisis"
+            )
+        
+        text = "\n".join(format_report(report))
+        if problems(report):
+            messagebox.showwarning("Análisis", text + "\n\nLas celdas inalcanzables quedan marcadas en rojo.")
+        else:
+            messagebox.showinfo("Análisis", text + "\n\nSin problemas.")
     
     def clear_map(self):
         if messagebox.askyesno("Confirmar", "¿Estás seguro de que quieres limpiar el mapa?"):
-            # Agregar estado actual al historial antes de limpiar
-            self.add_to_history()
-            
-            self.map_grid = [["." for _ in range(self.grid_width)] for _ in range(self.grid_height)]
-            self.draw_grid()
+            self.replace_grid(MapGrid(self.grid_width, self.grid_height))
             messagebox.showinfo("Éxito", "Mapa limpiado correctamente")
 
 
@@ -546,36 +788,48 @@ def load_map(self):
                 messagebox.showerror("Error", "El tamaño mínimo del mapa es 10x10")
                 return
                 
-            if new_width > 200 or new_height > 200:
-                messagebox.showerror("Error", "El tamaño máximo del mapa es 200x200")
+            if new_width > MAX_MAP_SIZE or new_height > MAX_MAP_SIZE:
+                messagebox.showerror("Error", f"El tamaño máximo del mapa es {MAX_MAP_SIZE}x{MAX_MAP_SIZE}")
                 return
             
-            # Agregar estado actual al historial antes de redimensionar
-            self.add_to_history()
-            
-            # Crear nuevo grid
-            new_grid = [["." for _ in range(new_width)] for _ in range(new_height)]
-            
-            # Copiar datos existentes manteniendo las posiciones válidas
-            for y in range(min(self.grid_height, new_height)):
-                for x in range(min(self.grid_width, new_width)):
-                    new_grid[y][x] = self.map_grid[y][x]
-            
-            # Actualizar dimensiones
-            self.grid_width = new_width
-            self.grid_height = new_height
-            self.map_grid = new_grid
-            
-            # Redibujar el grid completo
-            self.draw_grid()
+            self.resize_to(new_width, new_height)
             
             messagebox.showinfo("Éxito", f"Mapa redimensionado a {new_width}x{new_height}")
             
         except ValueError:
             messagebox.showerror("Error", "Por favor ingresa valores numéricos válidos para el tamaño")
 
-if __name__ == "__main__":
+    def resize_to(self, width, height):
+        # Nuevo mapa con los datos existentes en sus posiciones (queda una
+        # instantánea en el historial) y redibujar
+        self.replace_grid(self.map.resize(width, height))
+
+def main(argv=None):
+    """Sin argumentos abre el editor; con argumentos, los comandos de herramientas.mapas.
+
+    Con la variable de entorno PERFIL_EDITOR se miden las operaciones del
+    editor (ver herramientas/perfil_editor.py).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from herramientas.mapas import main as cli_main
+        cli_main(argv)
+        return
+    
+    load_tk()
     root = tk.Tk()
-    editor = MapEditor(root)
-    root.mainloop()
+    profiler = EditorProfiler.from_environment()
+    if profiler is None:
+        editor = MapEditor(root)
+        root.mainloop()
+        return
+    
+    editor = profiler.instrument(MapEditor)(root)
+    profiler.attach(editor)
+    profiler.run(root.mainloop)
+    for path in profiler.finish(editor):
+        print(f"Perfil del editor: {path}")
+
+if __name__ == "__main__":
+    main()
 # [Fin de sección]
\ No newline at end of file
@@ -0,0 +1,8 @@
+# sección [HERRAMIENTAS] Herramientas de línea de comandos para assets y mapas
+"""Herramientas de procesado de assets y mapas del juego.
+
+Se ejecutan desde la raíz del repositorio, por ejemplo:
+
+    python -m herramientas.transformar_obj assets/3D/modelo.obj --escalar 0.1
+"""
+# [Fin de sección]
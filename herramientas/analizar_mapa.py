@@ -0,0 +1,253 @@
+# sección [ANALIZAR MAPA] Alcanzabilidad e integridad de mapas
+"""Análisis offline de un mapa: lo que hoy sólo se descubre jugando.
+
+* Spawn del jugador: falta ``P`` (MapLoader usa entonces la celda central de
+  validFloors) o hay varios (gana el último).
+* Filas de distinto ancho (MapLoader toma el ancho de la primera línea).
+* Códigos desconocidos, que MapLoader mete en extraItems.
+* Enemigos, objetos y puertas que no se pueden alcanzar desde el spawn, y
+  regiones transitables aisladas.
+* Enemigos que el jugador sí alcanza pero que con los datos de navegación
+  (``NAV_BLOCKING``, donde los árboles cortan el paso) no llegan hasta él.
+
+La alcanzabilidad se calcula etiquetando componentes conexas (4 vecinos) de
+las celdas transitables. El suelo del juego se extiende más allá del mapa,
+así que se rodea de un anillo transitable: si el borde no está cerrado, las
+celdas del borde se comunican por fuera. El etiquetado trabaja sobre tramos horizontales de
+celdas en vez de celdas sueltas y es vectorial: une los tramos que se solapan
+entre filas consecutivas y propaga la etiqueta mínima con saltos de puntero.
+
+    report = analyze(grid)
+    for line in format_report(report):
+        print(line)
+"""
+import numpy as np
+
+from herramientas.formato_mapa import iter_rows
+from herramientas.mapa import BLOCKS
+
+# Bloques que ocupan la celda entera: muros, arbustos y ladrillos. Los árboles
+# no: su collider (5x5 en una celda de 10) deja paso alrededor del tronco.
+BLOCKING = frozenset(("#", "B", "L"))
+# Para la navegación de los enemigos (herramientas.navegacion), que va por
+# celdas, el árbol sí bloquea la suya entera
+NAV_BLOCKING = BLOCKING | frozenset(("T",))
+
+ENEMIES = frozenset(("1", "2", "3", "4", "5", "6"))
+ITEMS = frozenset(("+", "MP", "MA"))
+DOORS = frozenset(("D",))
+
+# Bloques que MapLoader añade a validFloors (candidatos a spawn por defecto)
+VALID_FLOORS = frozenset((".", " ", "MA", "MP")) | ENEMIES
+
+# Máximo de posiciones listadas por categoría en el informe de texto
+MAX_LISTED = 10
+
+
+# ----- COMPONENTES CONEXAS -----
+
+def _runs(mask):
+    """Tramos horizontales de ``mask``: (fila, inicio, fin exclusivo)."""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def label_components(mask):
+    """Etiqueta las componentes 4-conexas de ``mask``. Devuelve (etiquetas, nº); -1 fuera de la máscara."""
+    height, width = mask.shape
+    labels = np.full(mask.shape, -1, dtype=np.int32)
+    rows, starts, ends = _runs(mask)
+    count = len(rows)
+    if count == 0:
+        return labels, 0
+
+    # Pares de tramos solapados entre la fila y y la y + 1
+    stride = width + 1
+    start_keys = rows.astype(np.int64) * stride + starts
+    end_keys = rows.astype(np.int64) * stride + ends
+    lo = np.searchsorted(end_keys, (rows + 1).astype(np.int64) * stride + starts, side="right")
+    hi = np.searchsorted(start_keys, (rows + 1).astype(np.int64) * stride + ends, side="left")
+    pairs = np.maximum(hi - lo, 0)
+    a = np.repeat(np.arange(count), pairs)
+    b = np.repeat(lo, pairs) + (np.arange(pairs.sum()) - np.repeat(np.cumsum(pairs) - pairs, pairs))
+
+    # Propagación de la etiqueta mínima con saltos de puntero hasta converger
+    parent = np.arange(count)
+    while True:
+        low = np.minimum(parent[a], parent[b])
+        updated = parent.copy()
+        np.minimum.at(updated, parent[a], low)
+        np.minimum.at(updated, parent[b], low)
+        updated = updated[updated]
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, parent):
+            break
+        parent = updated
+
+    # Etiquetas consecutivas y volcado de los tramos a las celdas
+    roots, run_labels = np.unique(parent, return_inverse=True)
+    lengths = ends - starts
+    cells = np.repeat(rows.astype(np.int64) * width + starts - np.cumsum(lengths) + lengths, lengths)
+    cells += np.arange(lengths.sum())
+    labels.ravel()[cells] = np.repeat(run_labels, lengths)
+    return labels, len(roots)
+
+
+# ----- ANÁLISIS -----
+
+def text_row_widths(path):
+    """Número de celdas de cada fila de un mapa de texto: [(nº de línea, ancho)]."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [(lineno, len(row)) for lineno, row in iter_rows(f)]
+
+
+def block_mask(grid, blocks):
+    """Máscara booleana de las celdas cuyo bloque está en ``blocks``."""
+    codes = [code for code, block in enumerate(grid.palette) if block in blocks]
+    return np.isin(grid.blocks, codes)
+
+
+def _positions(mask):
+    ys, xs = np.nonzero(mask)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def player_spawn(grid):
+    """Spawn como lo decide MapLoader: el último P o la celda central de validFloors."""
+    spawns = _positions(block_mask(grid, {"P"}))
+    if spawns:
+        return spawns[-1], len(spawns)
+    floors = _positions(block_mask(grid, VALID_FLOORS | {b for b in grid.palette if b not in BLOCKS}))
+    if floors:
+        return floors[len(floors) // 2], 0
+    return None, 0
+
+
+def ring_labels(walkable):
+    """Componentes de ``walkable`` con el suelo de fuera del mapa: (etiquetas, nº); -1 fuera de la máscara.
+
+    Las celdas del borde se comunican por fuera, como en el juego.
+    """
+    ring = np.ones((walkable.shape[0] + 2, walkable.shape[1] + 2), dtype=bool)
+    ring[1:-1, 1:-1] = walkable
+    labels = label_components(ring)[0][1:-1, 1:-1]
+    # Renumerar sin la región que sólo ocupa el anillo exterior
+    present, labels[walkable] = np.unique(labels[walkable], return_inverse=True)
+    return labels, len(present)
+
+
+def analyze(grid, row_widths=None):
+    """Informe (dict) de integridad y alcanzabilidad de ``grid``.
+
+    ``row_widths`` son los anchos de fila del fichero original (ver
+    ``text_row_widths``); el MapGrid ya viene rellenado a un ancho común.
+    """
+    report = {"ancho": grid.width, "alto": grid.height}
+
+    ragged = []
+    if row_widths:
+        first = row_widths[0][1]
+        ragged = [{"linea": lineno, "ancho": w} for lineno, w in row_widths if w != first]
+    report["filas_irregulares"] = ragged
+
+    counts = grid.count()
+    unknown = {}
+    for block in sorted(b for b in counts if b not in BLOCKS):
+        ys, xs = np.nonzero(grid.blocks == grid.codes[block])
+        unknown[block] = {"celdas": counts[block], "primera": [int(xs[0]), int(ys[0])]}
+    report["desconocidos"] = unknown
+
+    spawn, players = player_spawn(grid)
+    report["jugadores"] = players
+    report["spawn"] = list(spawn) if spawn else None
+
+    walkable = ~block_mask(grid, BLOCKING)
+    labels, components = ring_labels(walkable)
+    sizes = np.bincount(labels[walkable], minlength=components)
+    report["regiones"] = components
+
+    if spawn is None:
+        reachable = np.zeros(grid.blocks.shape, dtype=bool)
+        spawn_label = -1
+    else:
+        spawn_label = labels[spawn[1], spawn[0]]
+        reachable = labels == spawn_label
+    # El spawn del jugador nunca es un bloque de NAV_BLOCKING (P o suelo)
+    nav_labels = ring_labels(~block_mask(grid, NAV_BLOCKING))[0]
+    nav_reachable = nav_labels == nav_labels[spawn[1], spawn[0]] if spawn else reachable
+    report["celdas_alcanzables"] = int(reachable.sum())
+
+    unknown_blocks = set(unknown)
+    report["inalcanzables"] = {
+        "enemigos": _positions(block_mask(grid, ENEMIES) & ~reachable),
+        "objetos": _positions(block_mask(grid, ITEMS | unknown_blocks) & ~reachable),
+        "puertas": _positions(block_mask(grid, DOORS) & ~reachable),
+    }
+    report["sin_navegacion"] = _positions(block_mask(grid, ENEMIES) & reachable & ~nav_reachable)
+
+    # Primera celda de cada región, como ejemplo de dónde está
+    flat = labels.ravel()
+    first = np.full(components, flat.size, dtype=np.int64)
+    np.minimum.at(first, flat[flat >= 0], np.flatnonzero(flat >= 0))
+    isolated = [
+        {"celdas": int(sizes[label]), "ejemplo": [int(first[label] % grid.width), int(first[label] // grid.width)]}
+        for label in np.argsort(-sizes, kind="stable").tolist() if label != spawn_label
+    ]
+    report["regiones_aisladas"] = isolated
+    return report
+
+
+def problems(report):
+    """Lista de problemas (texto) de un informe; vacía si el mapa está bien."""
+    found = []
+
+    def listed(positions):
+        text = ", ".join(f"({x}, {y})" for x, y in positions[:MAX_LISTED])
+        return text + (f" y {len(positions) - MAX_LISTED} más" if len(positions) > MAX_LISTED else "")
+
+    if report["filas_irregulares"]:
+        rows = report["filas_irregulares"]
+        found.append(f"{len(rows)} filas de ancho distinto a la primera: "
+                     + ", ".join(f"línea {r['linea']} ({r['ancho']})" for r in rows[:MAX_LISTED]))
+    if report["jugadores"] == 0:
+        spawn = report["spawn"]
+        found.append("no hay jugador (P); MapLoader lo pondrá en " + (f"({spawn[0]}, {spawn[1]})" if spawn else "el aire"))
+    elif report["jugadores"] > 1:
+        found.append(f"hay {report['jugadores']} jugadores (P); sólo cuenta el último")
+    for block, info in report["desconocidos"].items():
+        x, y = info["primera"]
+        found.append(f"código desconocido ({block}) en {info['celdas']} celdas, la primera en ({x}, {y})")
+    for kind, positions in report["inalcanzables"].items():
+        if positions:
+            found.append(f"{len(positions)} {kind} inalcanzables: {listed(positions)}")
+    if report["sin_navegacion"]:
+        positions = report["sin_navegacion"]
+        found.append(f"{len(positions)} enemigos sólo llegan al jugador entre árboles, "
+                     f"que la navegación no cruza: {listed(positions)}")
+    return found
+
+
+def format_report(report):
+    lines = [f"{report['ancho']}x{report['alto']}, {report['regiones']} regiones transitables, "
+             f"{report['celdas_alcanzables']} celdas alcanzables desde el spawn"]
+    isolated = report["regiones_aisladas"]
+    if isolated:
+        lines.append(f"{len(isolated)} regiones aisladas (la mayor: {isolated[0]['celdas']} celdas en "
+                     f"({isolated[0]['ejemplo'][0]}, {isolated[0]['ejemplo'][1]}))")
+    lines.extend(problems(report))
+    return lines
+
+
+def unreachable_cells(report):
+    """Todas las posiciones inalcanzables del informe (para resaltarlas en el editor)."""
+    cells = [pos for positions in report["inalcanzables"].values() for pos in positions]
+    return cells + report["sin_navegacion"]
+# [Fin de sección]
@@ -0,0 +1,396 @@
+# sección [CONSTRUIR ASSETS] Pipeline de assets incremental y en paralelo
+"""Construye todos los assets descritos en ``assets/assets.json``.
+
+Cada entrada del manifiesto es un asset con su tipo (``modelo``, ``textura``,
+``atlas``, ``mapa``, ``navegacion``, ``bloques``, ``indice``, ``visibilidad`` o
+``sectores``) y sus ajustes, por ejemplo:
+
+    {
+      "nombre": "palmera",
+      "tipo": "modelo",
+      "fuente": "assets/3D/fuentes/palmera.obj",
+      "mtl": "assets/3D/fuentes/palmera.mtl",
+      "salida": "assets/3D/palmera.obj",
+      "transformaciones": [{"escalar": [0.1]}, {"reordenar": ["x", "z", "y"]}],
+      "lods": [0.5, 0.2, 0.05],
+      "bake": true
+    }
+
+Las fuentes nunca se modifican: si hay transformaciones, ``salida`` es
+obligatoria y distinta de ``fuente``. Un asset con ``"opcional": true`` se
+omite (sin error) mientras falte alguna de sus fuentes, para ficheros que no
+están en el repositorio y cada uno añade a mano. Los assets se reparten entre procesos
+(uno por asset) y se saltan los que no han cambiado: la caché guarda, por
+asset, un hash de sus entradas y ajustes. Los hashes de los ficheros se
+reutilizan mientras no cambien su tamaño ni su fecha de modificación, así que
+una reconstrucción sin cambios no lee ningún fichero.
+
+    python -m herramientas.construir_assets [-j N] [--forzar] [nombre ...]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+
+from herramientas.copias import file_hash
+from herramientas.ficheros import replace_file
+
+MANIFEST_PATH = "assets/assets.json"
+CACHE_PATH = "assets/.cache_build.json"
+
+# Guardado de la caché desde varias construcciones a la vez (herramientas.vigilar)
+_CACHE_LOCK = threading.Lock()
+
+# Subir al cambiar el comportamiento de algún paso para invalidar la caché
+PIPELINE_VERSION = 6
+
+
+# ----- MODELOS -----
+
+def _model_output(asset):
+    return asset.get("salida") or asset["fuente"]
+
+
+def model_outputs(asset):
+    salida = _model_output(asset)
+    base = os.path.splitext(salida)[0]
+    folder = os.path.dirname(salida)
+    outputs = []
+    if salida != asset["fuente"]:
+        outputs.append(salida)
+        if asset.get("mtl"):
+            outputs.append(os.path.join(folder, os.path.basename(asset["mtl"])))
+    for n in range(1, len(asset.get("lods", [])) + 1):
+        outputs.append(f"{base}_lod{n}.obj")
+    if asset.get("lods"):
+        outputs.append(base + ".lod.json")
+    if asset.get("bake", True):
+        outputs.extend((base + ".mesh.json", base + ".mesh.bin"))
+    return outputs
+
+
+def build_model(asset):
+    from herramientas.exportar_malla import bake
+    from herramientas.simplificar_malla import generate_lods
+    from herramientas.transformar_obj import build_op, transform_obj
+
+    salida = _model_output(asset)
+    ops = []
+    for step in asset.get("transformaciones", []):
+        (name, values), = step.items()
+        ops.append(build_op(name, values if isinstance(values, list) else [values]))
+
+    if ops:
+        if salida == asset["fuente"]:
+            raise ValueError("Con transformaciones la salida debe ser distinta de la fuente")
+        mtl = asset.get("mtl")
+        mtl_out = os.path.join(os.path.dirname(salida), os.path.basename(mtl)) if mtl else None
+        transform_obj(asset["fuente"], ops, obj_out=salida, mtl_in=mtl, mtl_out=mtl_out,
+                      make_backup=False)
+
+    if asset.get("lods"):
+        generate_lods(salida, asset["lods"])
+    if asset.get("bake", True):
+        bake(salida, optimize=asset.get("optimizar", True))
+
+
+def model_inputs(asset):
+    paths = [asset["fuente"]]
+    if asset.get("mtl"):
+        paths.append(asset["mtl"])
+    return paths
+
+
+# ----- TEXTURAS -----
+
+def _texture_options(asset):
+    from herramientas.texturas import DEFAULT_MAX_SIZE, DEFAULT_TIERS
+    return {
+        "tiers": asset.get("calidades", DEFAULT_TIERS),
+        "fmt": asset.get("formato"),
+        "mips": asset.get("mips", True),
+        "max_size": asset.get("max", DEFAULT_MAX_SIZE),
+    }
+
+
+def build_texture(asset):
+    from herramientas.texturas import process_texture
+    process_texture(asset["fuente"], asset["directorio"], **_texture_options(asset))
+
+
+def texture_outputs(asset):
+    from herramientas.texturas import texture_outputs as outputs
+    return outputs(asset["fuente"], asset["directorio"], **_texture_options(asset))
+
+
+def _atlas_options(asset):
+    from herramientas.texturas import DEFAULT_ATLAS_MAX_SIZE, DEFAULT_PADDING, DEFAULT_TIERS
+    return {
+        "tiers": asset.get("calidades", DEFAULT_TIERS),
+        "max_size": asset.get("max", DEFAULT_ATLAS_MAX_SIZE),
+        "padding": asset.get("margen", DEFAULT_PADDING),
+    }
+
+
+def build_atlas(asset):
+    from herramientas.texturas import pack_atlas
+    pack_atlas(asset["nombre"], asset["fuentes"], asset["directorio"], **_atlas_options(asset))
+
+
+def atlas_outputs(asset):
+    from herramientas.texturas import atlas_outputs as outputs
+    return outputs(asset["nombre"], asset["directorio"], _atlas_options(asset)["tiers"])
+
+
+# ----- MAPAS -----
+
+def _map_output(asset):
+    from herramientas.mapa_binario import EXTENSION
+    return asset.get("salida") or os.path.splitext(asset["fuente"])[0] + EXTENSION
+
+
+def build_map(asset):
+    from herramientas.mapa_binario import convert
+    print(f"{asset['fuente']} -> {convert(asset['fuente'], _map_output(asset))}")
+
+
+def _navigation_output(asset):
+    from herramientas.navegacion import EXTENSION
+    return asset.get("salida") or os.path.splitext(asset["fuente"])[0] + EXTENSION
+
+
+def build_navigation(asset):
+    from herramientas.navegacion import DEFAULT_SECTOR, bake_file
+    dest = bake_file(asset["fuente"], _navigation_output(asset), asset.get("sector", DEFAULT_SECTOR),
+                     asset.get("campos", True))
+    print(f"{asset['fuente']} -> {dest}")
+
+
+def _blocks_output(asset):
+    from herramientas.fusionar_bloques import EXTENSION
+    return asset.get("salida") or os.path.splitext(asset["fuente"])[0] + EXTENSION
+
+
+def build_blocks(asset):
+    from herramientas.fusionar_bloques import BLOCK_SIZE, bake_file
+    dest, data = bake_file(asset["fuente"], _blocks_output(asset), asset.get("bloque", BLOCK_SIZE))
+    print(f"{asset['fuente']} -> {dest} ({sum(len(b) for b in data['cajas'].values())} cajas)")
+
+
+def _index_output(asset):
+    from herramientas.indice_espacial import EXTENSION
+    return asset.get("salida") or os.path.splitext(asset["fuente"])[0] + EXTENSION
+
+
+def build_index(asset):
+    from herramientas.indice_espacial import BLOCK_SIZE, bake_file
+    dest = bake_file(asset["fuente"], _index_output(asset), asset.get("bloque", BLOCK_SIZE), asset.get("celda"))
+    print(f"{asset['fuente']} -> {dest}")
+
+
+def _visibility_output(asset):
+    from herramientas.visibilidad import EXTENSION
+    return asset.get("salida") or os.path.splitext(asset["fuente"])[0] + EXTENSION
+
+
+def build_visibility(asset):
+    from herramientas.visibilidad import MARGIN, MAX_DISTANCE, bake_file
+    dest = bake_file(asset["fuente"], _visibility_output(asset), group=asset.get("grupo", 1),
+                     max_distance=asset.get("distancia", MAX_DISTANCE), margin=asset.get("margen", MARGIN))
+    print(f"{asset['fuente']} -> {dest}")
+
+
+def _sectors_output(asset):
+    from herramientas.sectores import EXTENSION, MANIFEST
+    directory = asset.get("salida") or os.path.splitext(asset["fuente"])[0] + EXTENSION
+    return os.path.join(directory, MANIFEST)
+
+
+def build_sectors(asset):
+    from herramientas.sectores import SECTOR_SIZE, export_file, summary
+    manifest, dest = export_file(asset["fuente"], asset.get("salida"), asset.get("tam", SECTOR_SIZE))
+    print(f"{asset['fuente']} -> {dest}: {summary(manifest)}")
+
+
+# Tipo de asset -> (construcción, ficheros de entrada, ficheros de salida)
+BUILDERS = {
+    "modelo": (build_model, model_inputs, model_outputs),
+    "textura": (build_texture, lambda asset: [asset["fuente"]], texture_outputs),
+    "atlas": (build_atlas, lambda asset: list(asset["fuentes"]), atlas_outputs),
+    "mapa": (build_map, lambda asset: [asset["fuente"]], lambda asset: [_map_output(asset)]),
+    "navegacion": (build_navigation, lambda asset: [asset["fuente"]], lambda asset: [_navigation_output(asset)]),
+    "bloques": (build_blocks, lambda asset: [asset["fuente"]], lambda asset: [_blocks_output(asset)]),
+    "indice": (build_index, lambda asset: [asset["fuente"]], lambda asset: [_index_output(asset)]),
+    "visibilidad": (build_visibility, lambda asset: [asset["fuente"]], lambda asset: [_visibility_output(asset)]),
+    "sectores": (build_sectors, lambda asset: [asset["fuente"]], lambda asset: [_sectors_output(asset)]),
+}
+
+
+# ----- MANIFIESTO Y CACHÉ -----
+
+def load_manifest(path=MANIFEST_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        assets = json.load(f)["assets"]
+    seen = set()
+    for asset in assets:
+        asset.setdefault("tipo", "modelo")
+        if asset["tipo"] not in BUILDERS:
+            raise ValueError(f"Tipo de asset desconocido en {asset.get('nombre')}: {asset['tipo']}")
+        if asset["nombre"] in seen:
+            raise ValueError(f"Nombre de asset repetido: {asset['nombre']}")
+        seen.add(asset["nombre"])
+    return assets
+
+
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {"hashes": {}, "assets": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cache(cache, path=CACHE_PATH):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    replace_file(tmp_path, path)
+
+
+def cached_hash(path, hashes):
+    """Hash de ``path`` reutilizando el anterior si no cambian tamaño ni mtime."""
+    st = os.stat(path)
+    known = hashes.get(path)
+    if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+        return known[2]
+    digest = file_hash(path)
+    hashes[path] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def asset_key(asset, hashes):
+    """Clave de caché: ajustes del asset + hash de cada entrada + versión del pipeline."""
+    payload = {
+        "version": PIPELINE_VERSION,
+        "settings": asset,
+        "inputs": {path: cached_hash(path, hashes) for path in BUILDERS[asset["tipo"]][1](asset)},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+# ----- EJECUCIÓN -----
+
+def _build_one(asset):
+    """Construye un asset en un proceso aparte; devuelve (nombre, error, log, segundos)."""
+    log = io.StringIO()
+    start = time.perf_counter()
+    error = None
+    with contextlib.redirect_stdout(log):
+        try:
+            BUILDERS[asset["tipo"]][0](asset)
+        except Exception:
+            error = traceback.format_exc()
+    return asset["nombre"], error, log.getvalue(), time.perf_counter() - start
+
+
+def build(manifest_path=MANIFEST_PATH, cache_path=CACHE_PATH, jobs=None, force=False, names=None,
+          executor=None):
+    """Construye los assets pendientes. Devuelve el número de fallos.
+
+    Con ``executor`` se reutiliza ese pool de procesos en vez de crear uno
+    (herramientas.vigilar construye muchas veces seguidas, a veces a la vez
+    desde dos hilos); entonces todo se construye en el pool.
+    """
+    assets = load_manifest(manifest_path)
+    if names:
+        unknown = set(names) - {a["nombre"] for a in assets}
+        if unknown:
+            raise ValueError("Assets desconocidos: " + ", ".join(sorted(unknown)))
+        assets = [a for a in assets if a["nombre"] in names]
+
+    cache = load_cache(cache_path)
+    pending = []
+    keys = {}
+    failures = 0
+    omitted = 0
+    for asset in assets:
+        name = asset["nombre"]
+        if asset.get("opcional") and not all(os.path.exists(p) for p in BUILDERS[asset["tipo"]][1](asset)):
+            print(f"[OMITIDO] {name}: faltan sus fuentes")
+            omitted += 1
+            continue
+        try:
+            keys[name] = asset_key(asset, cache["hashes"])
+        except OSError as e:
+            print(f"[ERROR] {name}: {e}")
+            failures += 1
+            continue
+        outputs = BUILDERS[asset["tipo"]][2](asset)
+        up_to_date = (
+            cache["assets"].get(name, {}).get("key") == keys[name]
+            and all(os.path.exists(p) for p in outputs)
+        )
+        if force or not up_to_date:
+            pending.append(asset)
+
+    skipped = len(assets) - len(pending) - failures - omitted
+    built = 0
+    updated = {}
+    parallel = bool(pending) and (executor is not None or (len(pending) > 1 and jobs != 1))
+    own_executor = parallel and executor is None
+    if not parallel:
+        results = (_build_one(asset) for asset in pending)
+    else:
+        if own_executor:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+        futures = [executor.submit(_build_one, asset) for asset in pending]
+        results = (future.result() for future in concurrent.futures.as_completed(futures))
+
+    for name, error, log, elapsed in results:
+        if error:
+            failures += 1
+            print(f"[ERROR] {name} ({elapsed:.2f}s)\n{log}{error}")
+        else:
+            built += 1
+            updated[name] = {"key": keys[name]}
+            print(f"[OK] {name} ({elapsed:.2f}s)")
+            if log:
+                print("    " + log.rstrip().replace("\n", "\n    "))
+
+    if own_executor:
+        executor.shutdown()
+
+    with _CACHE_LOCK:
+        # Otra construcción puede haber guardado la caché mientras tanto: sólo se añade lo nuevo
+        saved = load_cache(cache_path)
+        saved["hashes"].update(cache["hashes"])
+        saved["assets"].update(updated)
+        save_cache(saved, cache_path)
+    print(f"{built} construidos, {skipped} sin cambios, {omitted} omitidos, {failures} con errores")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construye los assets del manifiesto (incremental y en paralelo).")
+    parser.add_argument("nombres", nargs="*", help="Assets a construir (por defecto, todos)")
+    parser.add_argument("-m", "--manifiesto", default=MANIFEST_PATH, help=f"Manifiesto (por defecto {MANIFEST_PATH})")
+    parser.add_argument("-j", "--procesos", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--forzar", action="store_true", help="Reconstruir aunque no haya cambios")
+    args = parser.parse_args(argv)
+
+    try:
+        failures = build(args.manifiesto, jobs=args.procesos, force=args.forzar, names=args.nombres)
+    except (OSError, ValueError, KeyError) as e:
+        parser.exit(2, f"Error en el manifiesto: {e}\n")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
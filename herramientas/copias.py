@@ -0,0 +1,203 @@
+# sección [COPIAS] Almacén de copias de seguridad direccionado por contenido
+"""Copias de seguridad deduplicadas y comprimidas.
+
+Cada fichero se identifica por el SHA-256 de su contenido y se guarda una sola
+vez en ``copias_seguridad/objetos/`` comprimido con zstd (si está instalado el
+paquete ``zstandard``) o con gzip. ``copias_seguridad/indice.jsonl`` registra
+las entradas (fichero, fecha, hash, tamaño); volver a copiar un fichero que no
+ha cambiado sólo cuesta calcular su hash.
+
+    python -m herramientas.copias guardar assets/3D/modelo.obj
+    python -m herramientas.copias listar [fichero]
+    python -m herramientas.copias restaurar assets/3D/modelo.obj [--hash H] [-o destino]
+"""
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from herramientas.ficheros import replace_file
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BACKUP_DIR = "copias_seguridad"
+INDEX_NAME = "indice.jsonl"
+OBJECTS_DIR = "objetos"
+
+CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path):
+    """SHA-256 del contenido de ``path`` leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _object_paths(digest, backup_dir):
+    folder = os.path.join(backup_dir, OBJECTS_DIR, digest[:2])
+    return folder, [os.path.join(folder, digest + ext) for ext in (".zst", ".gz")]
+
+
+def _find_object(digest, backup_dir):
+    _, candidates = _object_paths(digest, backup_dir)
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _store_object(path, digest, backup_dir):
+    folder, (zst_path, gz_path) = _object_paths(digest, backup_dir)
+    os.makedirs(folder, exist_ok=True)
+    dest = zst_path if zstandard else gz_path
+
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with open(path, "rb") as src, os.fdopen(fd, "wb") as raw:
+            if zstandard:
+                with zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            else:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        replace_file(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return dest
+
+
+def _open_object(path):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Hace falta el paquete zstandard para leer " + path)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, "rb")
+
+
+def _key(path):
+    """Ruta con la que se indexa un fichero (relativa al directorio actual)."""
+    return os.path.relpath(os.path.abspath(path)).replace(os.sep, "/")
+
+
+def list_entries(path=None, backup_dir=BACKUP_DIR):
+    """Entradas del índice (todas o sólo las de ``path``), de la más antigua a la más reciente."""
+    index_path = os.path.join(backup_dir, INDEX_NAME)
+    if not os.path.exists(index_path):
+        return []
+    key = _key(path) if path else None
+    entries = []
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if key is None or entry["file"] == key:
+                    entries.append(entry)
+    return entries
+
+
+def backup(path, backup_dir=BACKUP_DIR):
+    """Guarda ``path`` en el almacén y devuelve su hash.
+
+    Si el contenido ya estaba guardado no se escribe nada más; si además es la
+    última versión registrada de ese fichero tampoco se añade entrada al índice.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    digest = file_hash(path)
+    if _find_object(digest, backup_dir) is None:
+        _store_object(path, digest, backup_dir)
+
+    history = list_entries(path, backup_dir)
+    if not history or history[-1]["hash"] != digest:
+        entry = {
+            "file": _key(path),
+            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+            "hash": digest,
+            "size": os.path.getsize(path),
+        }
+        with open(os.path.join(backup_dir, INDEX_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    return digest
+
+
+def restore(path, digest=None, timestamp=None, dest=None, backup_dir=BACKUP_DIR):
+    """Restaura ``path`` (o lo escribe en ``dest``) desde el almacén.
+
+    Sin ``digest`` ni ``timestamp`` se usa la copia más reciente. Ambos aceptan
+    prefijos. Devuelve la entrada restaurada.
+    """
+    entries = list_entries(path, backup_dir)
+    if digest:
+        entries = [e for e in entries if e["hash"].startswith(digest)]
+    if timestamp:
+        entries = [e for e in entries if e["timestamp"].startswith(timestamp)]
+    if not entries:
+        raise LookupError(f"No hay copias de {path} que coincidan")
+    entry = entries[-1]
+
+    source = _find_object(entry["hash"], backup_dir)
+    if source is None:
+        raise LookupError(f"Falta el objeto {entry['hash']} en {backup_dir}")
+
+    dest = dest or path
+    out_dir = os.path.dirname(os.path.abspath(dest))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    try:
+        with _open_object(source) as src, os.fdopen(fd, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        replace_file(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copias de seguridad deduplicadas de assets.")
+    parser.add_argument("--almacen", default=BACKUP_DIR, help=f"Carpeta del almacén (por defecto {BACKUP_DIR})")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_save = sub.add_parser("guardar", help="Guarda copias de los ficheros")
+    p_save.add_argument("ficheros", nargs="+")
+
+    p_list = sub.add_parser("listar", help="Lista las copias registradas")
+    p_list.add_argument("fichero", nargs="?")
+
+    p_restore = sub.add_parser("restaurar", help="Restaura una copia")
+    p_restore.add_argument("fichero")
+    p_restore.add_argument("--hash", help="Hash (o prefijo) de la versión a restaurar")
+    p_restore.add_argument("--fecha", help="Fecha (o prefijo, AAAA-MM-DD_HH-MM-SS) de la versión")
+    p_restore.add_argument("-o", "--salida", help="Escribir en otra ruta en vez de sobrescribir")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "guardar":
+        for path in args.ficheros:
+            print(f"{path}: {backup(path, args.almacen)}")
+    elif args.comando == "listar":
+        for entry in list_entries(args.fichero, args.almacen):
+            print(f"{entry['timestamp']}  {entry['hash'][:12]}  {entry['size']:>10}  {entry['file']}")
+    else:
+        try:
+            entry = restore(args.fichero, args.hash, args.fecha, args.salida, args.almacen)
+        except LookupError as e:
+            parser.exit(1, f"Error: {e}\n")
+        print(f"Restaurado {entry['file']} ({entry['timestamp']}, {entry['hash'][:12]}) "
+              f"en {args.salida or args.fichero}")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,207 @@
+# sección [EXPORTAR MALLA] Bake de OBJ+MTL a buffers binarios indexados
+"""Convierte un OBJ+MTL en un formato binario listo para subir a la GPU.
+
+Genera dos ficheros junto al OBJ (o con el prefijo indicado en ``-o``):
+
+* ``<nombre>.mesh.bin``: buffer de vértices intercalado en float32
+  (posición xyz, normal xyz, uv) seguido del buffer de índices uint16/uint32.
+* ``<nombre>.mesh.json``: cabecera con el layout, los grupos por material,
+  los materiales y los límites precalculados.
+
+World.create3DModelsFromMap usa estos ficheros si existen y sólo recurre al
+OBJ en texto cuando no se ha hecho el bake.
+
+    python -m herramientas.exportar_malla assets/3D/10446_Palm_Tree_v1_max2010_iteration-2.obj
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from herramientas.ficheros import replace_file
+from herramientas.malla_obj import load_mtl, load_obj, mtl_paths
+from herramientas.optimizar_malla import format_stats, optimize_buffers
+
+FORMAT_VERSION = 1
+
+# Floats por vértice: posición (3) + normal (3) + uv (2)
+VERTEX_FLOATS = 8
+
+
+def compute_normals(positions, triangles):
+    """Normales suavizadas por vértice (ponderadas por área)."""
+    p0, p1, p2 = (positions[triangles[:, k]] for k in range(3))
+    face_normals = np.cross(p1 - p0, p2 - p0)
+    normals = np.zeros_like(positions)
+    for k in range(3):
+        np.add.at(normals, triangles[:, k], face_normals)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+    return normals
+
+
+def build_buffers(mesh):
+    """Devuelve (vértices intercalados (n, 8) float32, índices, grupos).
+
+    Cada combinación distinta (v, vt, vn) de las caras pasa a ser un vértice.
+    Los triángulos se ordenan por material para que cada grupo sea un rango
+    contiguo del buffer de índices.
+    """
+    order = np.argsort(mesh.face_materials, kind="stable")
+    corners = mesh.corners.reshape(-1, 3, 3)[order].reshape(-1, 3)
+    face_materials = mesh.face_materials[order]
+
+    unique, inverse = np.unique(corners, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    vertices = np.zeros((len(unique), VERTEX_FLOATS), dtype=np.float32)
+    vertices[:, 0:3] = mesh.positions[unique[:, 0]]
+
+    has_normals = len(mesh.normals) > 0 and (unique[:, 2] >= 0).all()
+    if has_normals:
+        vertices[:, 3:6] = mesh.normals[unique[:, 2]]
+    else:
+        vertices[:, 3:6] = compute_normals(vertices[:, 0:3], inverse.reshape(-1, 3))
+
+    has_uvs = unique[:, 1] >= 0
+    if len(mesh.uvs):
+        vertices[has_uvs, 6:8] = mesh.uvs[unique[has_uvs, 1]]
+
+    index_type = np.uint16 if len(unique) <= 0xFFFF else np.uint32
+    indices = inverse.astype(index_type)
+
+    groups = []
+    ids, starts, counts = np.unique(face_materials, return_index=True, return_counts=True)
+    for material, start, count in zip(ids, starts, counts):
+        groups.append({
+            "start": int(start) * 3,
+            "count": int(count) * 3,
+            "material": mesh.materials[material],
+        })
+
+    return vertices, indices, groups
+
+
+def bounds_header(vertices):
+    positions = vertices[:, 0:3]
+    low = positions.min(axis=0)
+    high = positions.max(axis=0)
+    center = (low + high) / 2
+    radius = float(np.linalg.norm(positions - center, axis=1).max())
+    return {
+        "min": low.tolist(),
+        "max": high.tolist(),
+        "center": center.tolist(),
+        "radius": radius,
+    }
+
+
+def material_header(obj_path, mesh):
+    """Materiales usados por la malla con color difuso y textura (relativa al OBJ)."""
+    library = {}
+    for path in mtl_paths(obj_path, mesh):
+        library.update(load_mtl(path))
+
+    materials = {}
+    for name in mesh.materials:
+        info = library.get(name, {})
+        materials[name] = {
+            "color": info.get("Kd", [1.0, 1.0, 1.0]),
+            "map": info.get("map_Kd"),
+            "opacity": info.get("d", 1.0),
+        }
+    return materials
+
+
+def _write_file(path, data):
+    """Escribe ``data`` de forma atómica (fichero temporal + ``replace_file``)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def bake(obj_path, out_prefix=None, optimize=True):
+    """Hace el bake de ``obj_path`` y devuelve (ruta json, ruta bin, cabecera).
+
+    Con ``optimize`` se sueldan los vértices y se reordenan para la caché
+    (ver herramientas.optimizar_malla).
+    """
+    mesh = load_obj(obj_path)
+    if mesh.triangle_count == 0:
+        raise ValueError(f"El OBJ no tiene caras: {obj_path}")
+
+    vertices, indices, groups = build_buffers(mesh)
+    stats = None
+    if optimize:
+        vertices, indices, stats = optimize_buffers(vertices, indices, groups)
+
+    out_prefix = out_prefix or os.path.splitext(obj_path)[0]
+    json_path = out_prefix + ".mesh.json"
+    bin_path = out_prefix + ".mesh.bin"
+
+    vertex_bytes = vertices.astype("<f4").tobytes()
+    index_bytes = indices.astype(indices.dtype.newbyteorder("<")).tobytes()
+
+    header = {
+        "version": FORMAT_VERSION,
+        "binary": os.path.basename(bin_path),
+        "vertexCount": len(vertices),
+        "indexCount": len(indices),
+        "indexType": "uint16" if indices.dtype == np.uint16 else "uint32",
+        "vertexStride": VERTEX_FLOATS,
+        "attributes": {
+            "position": {"offset": 0, "size": 3},
+            "normal": {"offset": 3, "size": 3},
+            "uv": {"offset": 6, "size": 2},
+        },
+        "buffers": {
+            "vertices": {"byteOffset": 0, "byteLength": len(vertex_bytes)},
+            # vertex_bytes es múltiplo de 4, así que los índices quedan alineados
+            "indices": {"byteOffset": len(vertex_bytes), "byteLength": len(index_bytes)},
+        },
+        "bounds": bounds_header(vertices),
+        "groups": groups,
+        "materials": material_header(obj_path, mesh),
+    }
+    if stats:
+        header["optimization"] = stats
+
+    # El .bin antes que la cabecera que lo describe
+    _write_file(bin_path, vertex_bytes + index_bytes)
+    _write_file(json_path, json.dumps(header, indent=2).encode("utf-8"))
+
+    return json_path, bin_path, header
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bake de OBJ+MTL a buffers binarios indexados.")
+    parser.add_argument("obj", nargs="+", help="Ficheros OBJ de entrada")
+    parser.add_argument("-o", "--salida", help="Prefijo de salida (sólo con un OBJ)")
+    parser.add_argument("--sin-optimizar", action="store_true",
+                        help="No soldar vértices ni reordenar para la caché")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.obj) > 1:
+        parser.error("-o sólo se puede usar con un único OBJ")
+
+    for obj_path in args.obj:
+        json_path, bin_path, header = bake(obj_path, args.salida, not args.sin_optimizar)
+        print(f"{obj_path}: {header['vertexCount']} vértices, "
+              f"{header['indexCount'] // 3} triángulos ({header['indexType']})")
+        if "optimization" in header:
+            print("  ", format_stats(header["optimization"]))
+        print("  ->", json_path)
+        print("  ->", bin_path)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,29 @@
+# sección [FICHEROS] Sustitución atómica de ficheros
+"""Utilidades comunes para escribir ficheros de forma atómica.
+
+Las herramientas escriben en un temporal (``tempfile.mkstemp`` en el mismo
+directorio) y lo mueven sobre el destino con ``os.replace``. mkstemp crea el
+temporal con permisos 0600, así que sin más el fichero guardado dejaría de
+ser legible para el resto (el servidor del juego, otros usuarios).
+"""
+import os
+import stat
+
+# os.umask sólo se puede leer cambiándola: se lee una vez al importar, antes de
+# que haya hilos que creen ficheros
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def replace_file(tmp_path, path):
+    """``os.replace(tmp_path, path)`` conservando los permisos de ``path``.
+
+    Si ``path`` no existe, quedan los de un fichero nuevo (0666 menos la umask).
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+# [Fin de sección]
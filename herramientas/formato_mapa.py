@@ -0,0 +1,180 @@
+# sección [FORMATO MAPA] Lectura y escritura de mapas de texto
+"""Parser y serializador del formato de ``mapas/*.txt``.
+
+Cada fila es una línea de tokens ``(bloque)`` o ``(bloque[rotación])``, por
+ejemplo ``(#)(.)(P[180])(MA)``. Las líneas en blanco se ignoran, un token
+vacío ``()`` es suelo y las filas cortas se completan con suelo.
+
+Las líneas bien formadas se trocean de una vez con ``split``; sólo las que no
+cuadran pasan por la expresión regular, que localiza el error. Los errores se
+lanzan como ``MapFormatError`` con línea y columna (contando desde 1).
+
+    grid = read_map("mapas/mapa1.txt")
+    write_map(grid, "mapas/copia.txt")
+
+    with open("mapas/enorme.txt", encoding="utf-8") as f:
+        for lineno, row in iter_rows(f):
+            ...
+"""
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from herramientas.ficheros import replace_file
+from herramientas.mapa import FLOOR, MapGrid
+
+# Token con rotación: bloque[grados]
+ROTATION_RE = re.compile(r"(.*?)\[(\d+)\]")
+
+# Análisis detallado de una línea: token, espacios o carácter suelto (error)
+SCAN_RE = re.compile(r"\(([^()]*)\)|\s+|(.)")
+
+MAX_ROTATION = 0xFFFF
+
+
+class MapFormatError(ValueError):
+    def __init__(self, message, line, column, path=None):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.path = path
+        where = f"{path}:" if path else "línea "
+        super().__init__(f"{where}{line}:{column}: {message}")
+
+
+def _scan_tokens(line, lineno):
+    """Tokens de una línea que no ha pasado el troceado rápido; lanza el primer error."""
+    tokens = []
+    for match in SCAN_RE.finditer(line):
+        if match.group(2) is not None:
+            if match.group(2) == "(":
+                raise MapFormatError("token sin cerrar", lineno, match.start() + 1)
+            raise MapFormatError(f"carácter inesperado {match.group(2)!r}", lineno, match.start() + 1)
+        if match.group(1) is not None:
+            tokens.append((match.group(1), match.start() + 1))
+    return tokens
+
+
+def _split_line(line, lineno):
+    """Tokens de una línea (sin el salto de línea)."""
+    stripped = line.strip()
+    if not stripped:
+        return []
+    tokens = stripped[1:-1].split(")(")
+    if (stripped[0] == "(" and stripped[-1] == ")"
+            and stripped.count("(") == len(tokens) == stripped.count(")")):
+        return tokens
+    return [token for token, _ in _scan_tokens(line, lineno)]
+
+
+def _token_column(line, index):
+    """Columna del token número ``index`` de una línea ya validada."""
+    return [column for _, column in _scan_tokens(line, 0)][index]
+
+
+def _parse_token(token, line, lineno, index):
+    if "[" not in token:
+        return token or FLOOR, 0
+    match = ROTATION_RE.fullmatch(token)
+    if match is None:
+        raise MapFormatError(f"rotación no válida en ({token})", lineno, _token_column(line, index))
+    rotation = int(match.group(2))
+    if rotation > MAX_ROTATION:
+        raise MapFormatError(f"rotación fuera de rango en ({token})", lineno, _token_column(line, index))
+    return match.group(1) or FLOOR, rotation
+
+
+def parse_line(line, lineno=1):
+    """Celdas (bloque, rotación) de una línea."""
+    tokens = _split_line(line, lineno)
+    if "[" not in line:
+        return [(token or FLOOR, 0) for token in tokens]
+    return [_parse_token(token, line, lineno, i) for i, token in enumerate(tokens)]
+
+
+def iter_rows(lines):
+    """Recorre un fichero (o cualquier iterable de líneas) fila a fila: (nº de línea, celdas)."""
+    for lineno, line in enumerate(lines, start=1):
+        row = parse_line(line, lineno)
+        if row:
+            yield lineno, row
+
+
+def parse_map(lines):
+    """MapGrid a partir de un iterable de líneas."""
+    grid = MapGrid(0, 0)
+    code = grid.code
+    floor = code(FLOOR)
+    # Copia local de la paleta con el token vacío como suelo
+    lookup = dict(grid.codes)
+    lookup[""] = floor
+
+    code_rows = []
+    rotations = {}
+    for lineno, line in enumerate(lines, start=1):
+        if "[" in line:
+            row = parse_line(line, lineno)
+            if row:
+                rotations.update({(len(code_rows), x): r for x, (_, r) in enumerate(row) if r})
+                code_rows.append([code(block) for block, _ in row])
+            continue
+        tokens = _split_line(line, lineno)
+        if not tokens:
+            continue
+        codes = list(map(lookup.get, tokens))
+        if None in codes:
+            codes = [code(token or FLOOR) for token in tokens]
+            lookup.update(grid.codes)
+        code_rows.append(codes)
+
+    width = max((len(row) for row in code_rows), default=0)
+    if any(len(row) != width for row in code_rows):
+        code_rows = [row + [floor] * (width - len(row)) for row in code_rows]
+    blocks = np.array(code_rows, dtype=np.uint8).reshape(len(code_rows), width)
+    grid_rotations = np.zeros(blocks.shape, dtype=np.uint16)
+    for (y, x), rotation in rotations.items():
+        grid_rotations[y, x] = rotation
+    return MapGrid.from_arrays(blocks, grid_rotations, grid.palette)
+
+
+def read_map(path):
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return parse_map(f)
+        except MapFormatError as e:
+            raise MapFormatError(e.message, e.line, e.column, path) from None
+
+
+def format_lines(grid):
+    """Líneas de texto (sin salto de línea) del mapa."""
+    labels = [f"({block})" for block in grid.palette]
+    palette = grid.palette
+    rotated_rows = set(np.nonzero(grid.rotations.any(axis=1))[0].tolist())
+    for y, codes in enumerate(grid.blocks.tolist()):
+        tokens = [labels[c] for c in codes]
+        if y in rotated_rows:
+            row_rotations = grid.rotations[y]
+            for x in np.nonzero(row_rotations)[0].tolist():
+                tokens[x] = f"({palette[codes[x]]}[{row_rotations[x]}])"
+        yield "".join(tokens)
+
+
+def format_map(grid):
+    return "".join(line + "\n" for line in format_lines(grid))
+
+
+def write_map(grid, path):
+    """Escribe el mapa de forma atómica (fichero temporal + ``os.replace``)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            for line in format_lines(grid):
+                f.write(line + "\n")
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+# [Fin de sección]
@@ -0,0 +1,184 @@
+# sección [FUSIONAR BLOQUES] Cajas de render y colisión fusionadas
+"""Fusiona muros, arbustos y ladrillos contiguos en rectángulos grandes.
+
+World.createWallsFromMap crea una malla y una caja de colisión por celda; con
+este bake crea una por rectángulo. La fusión es voraz: primero tramos
+horizontales de celdas del mismo tipo, y luego se apilan los tramos idénticos
+(mismo inicio, fin y tipo) de filas consecutivas.
+
+Las rotaciones múltiplo de 90° no cambian un cubo de base cuadrada, así que
+esas celdas se fusionan como si no estuvieran rotadas. Las demás se quedan en
+cajas de una celda, que el juego rota como antes.
+
+El resultado (``mapas/<mapa>.bloques.json``) tiene:
+
+* ``cajas``: por tipo (``wall``, ``bush``, ``brick``), rectángulos
+  ``[x, y, ancho, alto, rotación]`` en celdas, para el render.
+* ``colisiones``: lista plana de AABB en coordenadas del mundo
+  (``minX, minY, minZ, maxX, maxY, maxZ`` por caja), igual que las que
+  calcula ``Box3.setFromObject`` para cada malla.
+* ``fuente``: huella del mapa de texto de origen (ver
+  mapa_binario.source_hash). El juego ignora el fichero si no coincide con
+  la del mapa cargado, es decir, si el mapa se editó después del bake.
+
+    python -m herramientas.fusionar_bloques mapas/mapa1.txt   # -> mapas/mapa1.bloques.json
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from herramientas.ficheros import replace_file
+from herramientas.mapa_binario import load_any, map_source_hash
+
+EXTENSION = ".bloques.json"
+VERSION = 2
+BLOCK_SIZE = 10
+
+# Bloque -> (tipo en World.js, lado y altura en fracciones de BLOCK_SIZE);
+# debe coincidir con blockTypes de World.createWallsFromMap
+BOX_TYPES = {
+    "#": ("wall", 1.0, 1.0),
+    "B": ("bush", 1.0, 0.5),
+    "L": ("brick", 0.7, 0.6),
+}
+
+def merge_rectangles(keys):
+    """Rectángulos voraces de celdas con la misma clave (>= 0; -1 = vacía).
+
+    Devuelve arrays (x, y, ancho, alto, clave).
+    """
+    height, width = keys.shape
+    if keys.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty, empty
+
+    # Tramos horizontales de clave constante
+    change = np.ones(keys.shape, dtype=bool)
+    change[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    rows, starts = np.nonzero(change)
+    flat = rows * width + starts
+    ends = np.minimum(np.append(flat[1:], keys.size) - rows * width, width)
+    run_keys = keys[rows, starts]
+    solid = run_keys >= 0
+    rows, starts, ends, run_keys = rows[solid], starts[solid], ends[solid], run_keys[solid]
+
+    # Apilar tramos idénticos de filas consecutivas
+    order = np.lexsort((rows, run_keys, ends, starts))
+    rows, starts, ends, run_keys = rows[order], starts[order], ends[order], run_keys[order]
+    continues = np.zeros(len(rows), dtype=bool)
+    continues[1:] = ((starts[1:] == starts[:-1]) & (ends[1:] == ends[:-1])
+                     & (run_keys[1:] == run_keys[:-1]) & (rows[1:] == rows[:-1] + 1))
+    heads = np.flatnonzero(~continues)
+    heights = np.diff(np.append(heads, len(rows)))
+    return starts[heads], rows[heads], ends[heads] - starts[heads], heights, run_keys[heads]
+
+
+def _cell_types(grid):
+    """Índice en BOX_TYPES de cada celda (-1 si no es caja) y su rotación (0 si es múltiplo de 90)."""
+    block_type = np.full(len(grid.palette), -1, dtype=np.int64)
+    for index, block in enumerate(BOX_TYPES):
+        if block in grid.codes:
+            block_type[grid.codes[block]] = index
+    rotations = grid.rotations.astype(np.int64) % 360
+    rotations[rotations % 90 == 0] = 0
+    return block_type[grid.blocks], rotations
+
+
+def collision_box(grid, x, y, w, h, rotation, side, box_height, block_size=BLOCK_SIZE):
+    """AABB (minX, minY, minZ, maxX, maxY, maxZ) de un rectángulo de celdas, como en World.js."""
+    center_x = (x + w / 2) * block_size - grid.width * block_size / 2
+    center_z = (y + h / 2) * block_size - grid.height * block_size / 2
+    # Ladrillos: el rectángulo conserva el margen exterior de cada celda
+    half_x = ((w - 1) + side) * block_size / 2
+    half_z = ((h - 1) + side) * block_size / 2
+    if rotation:
+        angle = math.radians(rotation)
+        cos, sin = abs(math.cos(angle)), abs(math.sin(angle))
+        half_x, half_z = half_x * cos + half_z * sin, half_x * sin + half_z * cos
+    return (center_x - half_x, 0.0, center_z - half_z,
+            center_x + half_x, box_height * block_size, center_z + half_z)
+
+
+def merge_blocks(grid, block_size=BLOCK_SIZE, source=None):
+    """Dict serializable con las cajas fusionadas de ``grid`` (``source``: huella del mapa)."""
+    types, rotations = _cell_types(grid)
+    # Las celdas con rotación no múltiplo de 90 no se fusionan
+    rotated = (types >= 0) & (rotations != 0)
+    xs, ys, ws, hs, keys = merge_rectangles(np.where(rotated, -1, types))
+    single_ys, single_xs = np.nonzero(rotated)
+    xs = np.concatenate((xs, single_xs))
+    ys = np.concatenate((ys, single_ys))
+    ws = np.concatenate((ws, np.ones(len(single_xs), dtype=np.int64)))
+    hs = np.concatenate((hs, np.ones(len(single_xs), dtype=np.int64)))
+    keys = np.concatenate((keys, types[single_ys, single_xs]))
+    cell_rotations = np.concatenate((np.zeros(len(xs) - len(single_xs), dtype=np.int64),
+                                     rotations[single_ys, single_xs]))
+
+    kinds = list(BOX_TYPES.values())
+    boxes = {kind: [] for kind, _, _ in kinds}
+    collisions = []
+    for x, y, w, h, key, rotation in zip(xs.tolist(), ys.tolist(), ws.tolist(), hs.tolist(), keys.tolist(),
+                                         cell_rotations.tolist()):
+        kind, side, box_height = kinds[key]
+        boxes[kind].append([x, y, w, h, rotation])
+        collisions.extend(round(v, 4) for v in collision_box(grid, x, y, w, h, rotation, side,
+                                                              box_height, block_size))
+    return {
+        "version": VERSION,
+        "ancho": grid.width,
+        "alto": grid.height,
+        "tamBloque": block_size,
+        "fuente": source,
+        "celdas": int((types >= 0).sum()),
+        "cajas": boxes,
+        "colisiones": collisions,
+    }
+
+
+def write_blocks(grid, path, block_size=BLOCK_SIZE, source=None):
+    data = merge_blocks(grid, block_size, source)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return data
+
+
+def bake_file(source, dest=None, block_size=BLOCK_SIZE):
+    """Genera el ``.bloques.json`` de un mapa (por defecto junto al original); devuelve (ruta, datos)."""
+    dest = dest or os.path.splitext(source)[0] + EXTENSION
+    return dest, write_blocks(load_any(source), dest, block_size, map_source_hash(source))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fusiona muros, arbustos y ladrillos en cajas grandes.")
+    parser.add_argument("mapas", nargs="+", help="Mapas de entrada (.txt o .mapb)")
+    parser.add_argument("-o", "--salida", help="Ruta de salida (sólo con un mapa)")
+    parser.add_argument("--bloque", type=float, default=BLOCK_SIZE,
+                        help=f"Tamaño de bloque del juego (por defecto {BLOCK_SIZE})")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+
+    for source in args.mapas:
+        try:
+            dest, data = bake_file(source, args.salida, args.bloque)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error: {e}\n")
+        boxes = sum(len(kind) for kind in data["cajas"].values())
+        print(f"{source} -> {dest}: {data['celdas']} celdas en {boxes} cajas")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,274 @@
+# sección [GENERAR MAPA] Mapas de carga de cualquier tamaño
+"""Generador de mapas de prueba para medir MapLoader, World y los enemigos.
+
+mapas/cargaBruta.txt es un único mapa de 40x30 hecho a mano; este módulo
+genera mapas válidos del formato de siempre a cualquier escala. La
+distribución se elige con ``modo``:
+
+* ``arena``: espacio abierto rodeado de muro.
+* ``laberinto``: laberinto perfecto (algoritmo sidewinder) con pasillos de
+  ``pasillo`` celdas de ancho; ``ciclos`` abre además una fracción de los
+  muros interiores para que haya varios caminos.
+* ``pasillos``: pasillos horizontales separados por muros con aberturas
+  (al menos una por muro).
+
+Después se reparten bloques sobre el suelo libre según ``densidades``
+(fracción de celdas de suelo por bloque: muros, arbustos, ladrillos, árboles,
+comida, munición y enemigos ``1``-``6``). La densidad de puertas (``D``) es
+la fracción de aberturas de laberintos y pasillos que se cierran con una
+puerta; una arena no tiene aberturas ni puertas. El
+jugador aparece en la región transitable más grande, y lo que queda
+inalcanzable desde él (enemigos, objetos y puertas) se vuelve suelo, igual que
+los enemigos que la navegación no lleva hasta él (los árboles le cortan el
+paso), así que ``python -m herramientas.mapas validar`` acepta todos los
+mapas generados.
+
+Todo es vectorial y sale de un único ``numpy.random.Generator``: la misma
+semilla con los mismos ajustes da siempre el mismo mapa, también en mapas de
+millones de celdas.
+
+    python -m herramientas.generar_mapa mapas/laberinto.txt --ancho 1000 --alto 1000 \\
+        --modo laberinto --semilla 7 --densidad T=0.02 --densidad 3=0.001
+"""
+import argparse
+import os
+
+import numpy as np
+
+from herramientas.analizar_mapa import BLOCKING, ENEMIES, NAV_BLOCKING, block_mask, ring_labels
+from herramientas.mapa import FLOOR, MapGrid
+from herramientas.mapa_binario import save_any
+
+MODES = ("arena", "laberinto", "pasillos")
+
+# Fracción de celdas de suelo que ocupa cada bloque si no se indica otra. Los
+# bloques que cortan el paso empiezan a 0: en un laberinto de pasillos de una
+# celda cada uno aísla una parte del mapa
+DEFAULT_DENSITIES = {
+    "#": 0.0, "B": 0.0, "L": 0.0, "T": 0.02, "D": 0.1,
+    "+": 0.002, "MA": 0.001, "MP": 0.001,
+    "1": 0.001, "2": 0.001, "3": 0.001, "4": 0.001, "5": 0.001, "6": 0.001,
+}
+# Bloques que se reparten sobre el suelo (las puertas van en las aberturas)
+SCATTERED = ("#", "B", "L", "T", "+", "MA", "MP", "1", "2", "3", "4", "5", "6")
+
+MIN_SIZE = 3
+
+
+class MapGenerationError(ValueError):
+    pass
+
+
+# ----- DISTRIBUCIONES -----
+# Cada una devuelve la máscara de muros y las aberturas: GAP_ROW en una fila
+# de muro (la puerta se queda a 0°) o GAP_COLUMN en una columna (puerta a 90°)
+
+GAP_ROW, GAP_COLUMN = 1, 2
+
+
+def _arena(width, height, rng, corridor, loops):
+    walls = np.zeros((height, width), dtype=bool)
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+    return walls, np.zeros(walls.shape, dtype=np.int8)
+
+
+def _maze(width, height, rng, corridor, loops):
+    pitch = corridor + 1
+    columns, rows = (width - 1) // pitch, (height - 1) // pitch
+    if columns < 1 or rows < 1:
+        raise MapGenerationError(f"Un laberinto con pasillos de {corridor} celdas necesita al menos "
+                                 f"{pitch + 1}x{pitch + 1} celdas")
+
+    # Sidewinder: la primera fila es un único pasillo; en las demás cada tramo
+    # horizontal se cierra al azar y abre un paso hacia arriba desde una de sus celdas
+    close = rng.random((rows, columns)) < 0.5
+    close[:, -1] = True
+    close[0, :-1] = False
+    east = ~close
+    north = np.zeros((rows, columns), dtype=bool)
+    ends = np.flatnonzero(close[1:])
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    picks = starts + (rng.random(len(ends)) * (ends - starts + 1)).astype(np.int64)
+    north[1:].flat[picks] = True
+    if loops:
+        east |= rng.random(east.shape) < loops
+        east[:, -1] = False
+        north |= rng.random(north.shape) < loops
+        north[0] = False
+
+    walls = np.ones((height, width), dtype=bool)
+    gaps = np.zeros(walls.shape, dtype=np.int8)
+    span = np.arange(corridor)
+    ys = 1 + np.arange(rows) * pitch
+    xs = 1 + np.arange(columns) * pitch
+    cell_ys = (ys[:, None] + span).ravel()
+    cell_xs = (xs[:, None] + span).ravel()
+    walls[np.ix_(cell_ys, cell_xs)] = False
+
+    # Pasos: la columna de muro a la derecha de un nodo o la fila de muro encima
+    node_y, node_x = np.nonzero(east)
+    gap_y = (ys[node_y][:, None] + span).ravel()
+    gap_x = np.repeat(xs[node_x] + corridor, corridor)
+    walls[gap_y, gap_x] = False
+    gaps[gap_y, gap_x] = GAP_COLUMN
+    node_y, node_x = np.nonzero(north)
+    gap_y = np.repeat(ys[node_y] - 1, corridor)
+    gap_x = (xs[node_x][:, None] + span).ravel()
+    walls[gap_y, gap_x] = False
+    gaps[gap_y, gap_x] = GAP_ROW
+    return walls, gaps
+
+
+def _corridors(width, height, rng, corridor, loops):
+    walls = np.zeros((height, width), dtype=bool)
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+    gaps = np.zeros(walls.shape, dtype=np.int8)
+    lines = np.arange(corridor + 1, height - 1, corridor + 1)
+    inner = width - 2
+    if len(lines) == 0 or inner < 1:
+        return walls, gaps
+
+    walls[lines, 1:-1] = True
+    # Aberturas de ``corridor`` celdas: una segura por muro y más con probabilidad ``loops``
+    openings = rng.random((len(lines), inner)) < loops / max(corridor, 1)
+    openings[np.arange(len(lines)), rng.integers(0, inner, len(lines))] = True
+    line_index, starts = np.nonzero(openings)
+    xs = (starts[:, None] + np.arange(corridor)).ravel() + 1
+    ys = np.repeat(lines[line_index], corridor)
+    inside = xs < width - 1
+    walls[ys[inside], xs[inside]] = False
+    gaps[ys[inside], xs[inside]] = GAP_ROW
+    return walls, gaps
+
+
+LAYOUTS = {"arena": _arena, "laberinto": _maze, "pasillos": _corridors}
+
+
+# ----- GENERACIÓN -----
+
+def generate(width, height, mode="arena", seed=0, densities=None, corridor=1, loops=0.05):
+    """MapGrid generado; ``densidades`` completa o sustituye DEFAULT_DENSITIES."""
+    if width < MIN_SIZE or height < MIN_SIZE:
+        raise MapGenerationError(f"El mapa debe medir al menos {MIN_SIZE}x{MIN_SIZE}")
+    if mode not in LAYOUTS:
+        raise MapGenerationError(f"Modo desconocido: {mode} (modos: {', '.join(MODES)})")
+    if corridor < 1:
+        raise MapGenerationError("El pasillo debe tener al menos una celda de ancho")
+    if not 0 <= loops <= 1:
+        raise MapGenerationError("La fracción de ciclos debe estar entre 0 y 1")
+    densities = dict(DEFAULT_DENSITIES, **(densities or {}))
+    unknown = set(densities) - set(DEFAULT_DENSITIES)
+    if unknown:
+        raise MapGenerationError(f"No se pueden repartir los bloques: {', '.join(sorted(unknown))}")
+    if any(not 0 <= value <= 1 for value in densities.values()):
+        raise MapGenerationError("Las densidades deben estar entre 0 y 1")
+    total = sum(densities[block] for block in SCATTERED)
+    if total > 1:
+        raise MapGenerationError(f"Las densidades suman {total:g}; como mucho pueden sumar 1")
+
+    rng = np.random.default_rng(seed)
+    walls, gaps = LAYOUTS[mode](width, height, rng, corridor, loops)
+
+    grid = MapGrid(width, height)
+    codes = np.full(walls.shape, grid.code(FLOOR), dtype=np.uint8)
+    codes[walls] = grid.code("#")
+
+    doors = (gaps > 0) & (rng.random(walls.shape) < densities["D"])
+    codes[doors] = grid.code("D")
+
+    # Un número al azar por celda de suelo y tramos consecutivos de [0, 1) por bloque;
+    # las aberturas se quedan libres para no cerrar los pasos
+    free = ~walls & ~doors & (gaps == 0)
+    draws = rng.random(walls.shape)
+    bounds = np.cumsum([densities[block] for block in SCATTERED])
+    kinds = np.searchsorted(bounds, draws, side="right")
+    scattered = free & (kinds < len(SCATTERED))
+    lookup = np.array([grid.code(block) for block in SCATTERED], dtype=np.uint8)
+    codes[scattered] = lookup[kinds[scattered]]
+
+    rotations = np.zeros(walls.shape, dtype=np.uint16)
+    trees = codes == grid.code("T")
+    rotations[trees] = rng.integers(0, 360, int(trees.sum()))
+    rotations[doors & (gaps == GAP_COLUMN)] = 90
+
+    grid.blocks, grid.rotations = codes, rotations
+    _place_player(grid, rng)
+    return grid
+
+
+def _place_player(grid, rng):
+    """Pone P en el suelo de la región más grande y vacía lo inalcanzable desde ella."""
+    blocking = block_mask(grid, BLOCKING)
+    labels = ring_labels(~blocking)[0]
+    walkable = labels >= 0
+    if not walkable.any():
+        raise MapGenerationError("Las densidades no dejan ninguna celda transitable")
+    largest = np.bincount(labels[walkable]).argmax()
+    reachable = labels == largest
+
+    floor = grid.code(FLOOR)
+    unreachable = ~reachable & ~blocking & (grid.blocks != floor) & (grid.blocks != grid.code("T"))
+    grid.blocks[unreachable] = floor
+    grid.rotations[unreachable] = 0
+
+    # Dentro de esa región, el jugador va en la zona más grande para la
+    # navegación y los enemigos que quedan fuera de ella pasan a suelo
+    nav_labels = ring_labels(~block_mask(grid, NAV_BLOCKING))[0]
+    nav_cells = reachable & (nav_labels >= 0)
+    if nav_cells.any():
+        nav_reachable = nav_labels == np.bincount(nav_labels[nav_cells]).argmax()
+        stranded = block_mask(grid, ENEMIES) & ~nav_reachable
+        grid.blocks[stranded] = floor
+        grid.rotations[stranded] = 0
+        reachable = nav_reachable
+
+    ys, xs = np.nonzero(reachable & (grid.blocks == floor))
+    if len(ys) == 0:
+        ys, xs = np.nonzero(reachable)
+    pick = rng.integers(len(ys))
+    grid.blocks[ys[pick], xs[pick]] = grid.code("P")
+    grid.rotations[ys[pick], xs[pick]] = 0
+
+
+def parse_density(text):
+    """``BLOQUE=VALOR`` -> (bloque, valor) para ``--densidad``."""
+    block, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Se esperaba BLOQUE=VALOR: {text}")
+    try:
+        return block.strip("()"), float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Densidad no numérica: {text}") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera mapas de prueba de cualquier tamaño.")
+    parser.add_argument("salida", help="Mapa de salida (.txt o .mapb)")
+    parser.add_argument("--ancho", type=int, required=True)
+    parser.add_argument("--alto", type=int, required=True)
+    parser.add_argument("--modo", choices=MODES, default="arena", help="Distribución (por defecto arena)")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla (por defecto 0)")
+    parser.add_argument("--densidad", type=parse_density, action="append", default=[], metavar="BLOQUE=VALOR",
+                        help="Fracción de suelo para un bloque (# B L T D + MA MP 1-6); se puede repetir")
+    parser.add_argument("--pasillo", type=int, default=1, help="Ancho de los pasillos en celdas (por defecto 1)")
+    parser.add_argument("--ciclos", type=float, default=0.05,
+                        help="Fracción de muros interiores abiertos de más (por defecto 0.05)")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = generate(args.ancho, args.alto, args.modo, args.semilla, dict(args.densidad),
+                        args.pasillo, args.ciclos)
+        save_any(grid, args.salida)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Error: {e}\n")
+    counts = grid.count()
+    summary = ", ".join(f"{n} ({block})" for block, n in sorted(counts.items(), key=lambda item: -item[1]))
+    print(f"{args.salida}: {grid.width}x{grid.height} ({args.modo}, semilla {args.semilla}, "
+          f"{os.path.getsize(args.salida)} bytes): {summary}")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,243 @@
+# sección [ÍNDICE ESPACIAL] Rejilla uniforme de colisiones precalculada
+"""Índice espacial (``.indice``) de los objetos estáticos de un mapa.
+
+Player y EnemyManager comprueban cada frame todos los muros, puertas y
+objetos del mapa, así que el coste crece con el tamaño del mapa. Con este
+índice sólo miran las celdas de la rejilla que tocan su caja.
+
+Objetos indexados, cada uno con su AABB en coordenadas del mundo y su
+posición en la lista correspondiente del juego (orden de lectura del mapa):
+
+    0 muro       cajas fusionadas de muros, arbustos y ladrillos (fusionar_bloques)
+    1 puerta     Door.instances
+    2 comida     World.foodMeshes (caja = radio de recogida)
+    3 municion   World.ammoMeshes (caja = radio de recogida)
+    4 modelo     colliders de 5x5 de los árboles
+
+Todo en little-endian, cada sección alineada a 4 bytes:
+
+    cabecera      "SIDX", versión u16, flags u16, ancho y alto del mapa u32,
+                  columnas y filas de la rejilla u32, lado de celda f32,
+                  esquina mínima (x, z) f32, nº de objetos u32, nº de
+                  entradas u32, huella del mapa u32 (si flags & SOURCE_HASH)
+    objetos       categoría u8 por objeto, índice u32 por objeto y AABB
+                  (minX, minY, minZ, maxX, maxY, maxZ) f32 por objeto
+    rejilla       (columnas x filas + 1) x u32: primera entrada de cada celda
+    entradas      u32 por entrada: objeto (un objeto está en todas las celdas
+                  que toca su caja)
+
+Los índices de objeto apuntan a listas del juego, así que un índice de una
+versión anterior del mapa apuntaría a objetos equivocados: el juego lo
+ignora si la huella (ver mapa_binario.source_hash) no es la del mapa cargado.
+
+    python -m herramientas.indice_espacial mapas/mapa1.txt   # -> mapas/mapa1.indice
+"""
+import argparse
+import math
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from herramientas.ficheros import replace_file
+from herramientas.fusionar_bloques import BLOCK_SIZE, merge_blocks
+from herramientas.mapa_binario import load_any, map_source_hash
+
+MAGIC = b"SIDX"
+VERSION = 2
+EXTENSION = ".indice"
+
+HEADER = struct.Struct("<4sHHIIIIfffIII")
+
+# flags
+SOURCE_HASH = 1
+
+CATEGORIES = ("muro", "puerta", "comida", "municion", "modelo")
+WALL, DOOR, FOOD, AMMO, MODEL = range(len(CATEGORIES))
+
+# Medidas en unidades del mundo; deben coincidir con World.js, Player.js y main.js
+PICKUP_RADIUS = 2.0
+ITEM_HEIGHT = 2.0
+MODEL_SIDE = 5.0
+MODEL_HEIGHT = 500.0
+
+
+class SpatialIndexError(ValueError):
+    pass
+
+
+def _cell_centers(grid, ys, xs, block_size):
+    return (xs * block_size - grid.width * block_size / 2 + block_size / 2,
+            ys * block_size - grid.height * block_size / 2 + block_size / 2)
+
+
+def _cells_of(grid, blocks):
+    """Celdas (ys, xs) con bloque en ``blocks``, en orden de lectura (como MapLoader)."""
+    codes = [grid.codes[block] for block in blocks if block in grid.codes]
+    return np.nonzero(np.isin(grid.blocks, codes))
+
+
+def collect_items(grid, block_size=BLOCK_SIZE):
+    """Objetos del mapa: (categorías, índices en su lista, cajas (N, 6))."""
+    categories, refs, boxes = [], [], []
+
+    def add(category, category_boxes):
+        category_boxes = np.asarray(category_boxes, dtype=np.float64).reshape(-1, 6)
+        categories.append(np.full(len(category_boxes), category, dtype=np.uint8))
+        refs.append(np.arange(len(category_boxes)))
+        boxes.append(category_boxes)
+
+    add(WALL, merge_blocks(grid, block_size)["colisiones"])
+
+    # Puertas: plano de un bloque de ancho girado en Y
+    ys, xs = _cells_of(grid, ("D",))
+    cx, cz = _cell_centers(grid, ys, xs, block_size)
+    angles = np.radians(grid.rotations[ys, xs].astype(np.float64))
+    half_x = np.abs(np.cos(angles)) * block_size / 2
+    half_z = np.abs(np.sin(angles)) * block_size / 2
+    zeros = np.zeros(len(ys))
+    add(DOOR, np.column_stack((cx - half_x, zeros, cz - half_z, cx + half_x, zeros + block_size, cz + half_z)))
+
+    # Comida y munición: caja del radio de recogida alrededor del sprite
+    for category, blocks in ((FOOD, ("+",)), (AMMO, ("MA", "MP"))):
+        ys, xs = _cells_of(grid, blocks)
+        cx, cz = _cell_centers(grid, ys, xs, block_size)
+        r = PICKUP_RADIUS
+        y = np.full(len(ys), ITEM_HEIGHT)
+        add(category, np.column_stack((cx - r, y - r, cz - r, cx + r, y + r, cz + r)))
+
+    ys, xs = _cells_of(grid, ("T",))
+    cx, cz = _cell_centers(grid, ys, xs, block_size)
+    half = MODEL_SIDE / 2
+    add(MODEL, np.column_stack((cx - half, np.zeros(len(ys)), cz - half, cx + half,
+                                np.full(len(ys), MODEL_HEIGHT), cz + half)))
+
+    return np.concatenate(categories), np.concatenate(refs), np.concatenate(boxes)
+
+
+def build_grid(boxes, min_x, min_z, cell, columns, rows):
+    """Reparte las cajas en la rejilla: (inicio por celda, objetos)."""
+    x0 = np.clip(np.floor((boxes[:, 0] - min_x) / cell), 0, columns - 1).astype(np.int64)
+    x1 = np.clip(np.floor((boxes[:, 3] - min_x) / cell), 0, columns - 1).astype(np.int64)
+    z0 = np.clip(np.floor((boxes[:, 2] - min_z) / cell), 0, rows - 1).astype(np.int64)
+    z1 = np.clip(np.floor((boxes[:, 5] - min_z) / cell), 0, rows - 1).astype(np.int64)
+    spans_x = x1 - x0 + 1
+    counts = spans_x * (z1 - z0 + 1)
+
+    # Un par (celda, objeto) por cada celda que toca cada caja
+    items = np.repeat(np.arange(len(boxes)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    span = np.repeat(spans_x, counts)
+    cells = (np.repeat(z0, counts) + offsets // span) * columns + np.repeat(x0, counts) + offsets % span
+
+    order = np.argsort(cells, kind="stable")
+    starts = np.searchsorted(cells[order], np.arange(columns * rows + 1))
+    return starts, items[order]
+
+
+def bake(grid, block_size=BLOCK_SIZE, cell=None, source=None):
+    """Bytes ``.indice`` de un MapGrid; por defecto una celda de la rejilla por bloque.
+
+    ``source`` es la huella del mapa de texto de origen, si se conoce.
+    """
+    cell = float(cell or block_size)
+    if cell <= 0:
+        raise SpatialIndexError("El lado de celda debe ser positivo")
+    categories, refs, boxes = collect_items(grid, block_size)
+    min_x = -grid.width * block_size / 2
+    min_z = -grid.height * block_size / 2
+    columns = max(1, math.ceil(grid.width * block_size / cell))
+    rows = max(1, math.ceil(grid.height * block_size / cell))
+    starts, entries = build_grid(boxes, min_x, min_z, cell, columns, rows)
+
+    flags = SOURCE_HASH if source is not None else 0
+    parts = [HEADER.pack(MAGIC, VERSION, flags, grid.width, grid.height, columns, rows, cell, min_x, min_z,
+                         len(boxes), len(entries), source or 0)]
+    parts.append(categories.tobytes() + bytes(-len(categories) % 4))
+    parts.append(refs.astype("<u4").tobytes())
+    parts.append(boxes.astype("<f4").tobytes())
+    parts.append(starts.astype("<u4").tobytes())
+    parts.append(entries.astype("<u4").tobytes())
+    return b"".join(parts)
+
+
+def decode(data):
+    """Contenido de un ``.indice`` como dict de arrays."""
+    if len(data) < HEADER.size:
+        raise SpatialIndexError("Fichero demasiado corto")
+    (magic, version, flags, width, height, columns, rows, cell, min_x, min_z,
+     count, entry_count, source) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SpatialIndexError("No es un índice espacial (falta la marca SIDX)")
+    if version != VERSION:
+        raise SpatialIndexError(f"Versión {version} no soportada (se espera {VERSION})")
+    offset = HEADER.size
+    try:
+        categories = np.frombuffer(data, dtype="u1", count=count, offset=offset)
+        offset += count + (-count % 4)
+        refs = np.frombuffer(data, dtype="<u4", count=count, offset=offset)
+        offset += refs.nbytes
+        boxes = np.frombuffer(data, dtype="<f4", count=6 * count, offset=offset).reshape(-1, 6)
+        offset += boxes.nbytes
+        starts = np.frombuffer(data, dtype="<u4", count=columns * rows + 1, offset=offset)
+        offset += starts.nbytes
+        entries = np.frombuffer(data, dtype="<u4", count=entry_count, offset=offset)
+    except ValueError:
+        raise SpatialIndexError("Fichero truncado") from None
+    return {
+        "ancho": width, "alto": height, "columnas": columns, "filas": rows, "celda": cell,
+        "minimo": (min_x, min_z), "fuente": source if flags & SOURCE_HASH else None, "categorias": categories, "indices": refs, "cajas": boxes,
+        "inicios": starts, "entradas": entries,
+    }
+
+
+def write_index(grid, path, block_size=BLOCK_SIZE, cell=None, source=None):
+    data = bake(grid, block_size, cell, source)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+
+def bake_file(source, dest=None, block_size=BLOCK_SIZE, cell=None):
+    """Genera el ``.indice`` de un mapa (por defecto junto al original); devuelve la ruta."""
+    dest = dest or os.path.splitext(source)[0] + EXTENSION
+    write_index(load_any(source), dest, block_size, cell, map_source_hash(source))
+    return dest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el índice espacial (.indice) de colisiones de un mapa.")
+    parser.add_argument("mapas", nargs="+", help="Mapas de entrada (.txt o .mapb)")
+    parser.add_argument("-o", "--salida", help="Ruta de salida (sólo con un mapa)")
+    parser.add_argument("--celda", type=float, help="Lado de celda de la rejilla (por defecto, un bloque)")
+    parser.add_argument("--bloque", type=float, default=BLOCK_SIZE,
+                        help=f"Tamaño de bloque del juego (por defecto {BLOCK_SIZE})")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+
+    for source in args.mapas:
+        try:
+            dest = bake_file(source, args.salida, args.bloque, args.celda)
+            with open(dest, "rb") as f:
+                index = decode(f.read())
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error: {e}\n")
+        counts = np.bincount(index["categorias"], minlength=len(CATEGORIES))
+        summary = ", ".join(f"{n} {name}" for name, n in zip(CATEGORIES, counts.tolist()) if n)
+        print(f"{source} -> {dest} ({os.path.getsize(dest)} bytes): {index['columnas']}x{index['filas']} "
+              f"celdas, {summary or 'sin objetos'}")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
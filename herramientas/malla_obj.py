@@ -0,0 +1,203 @@
+# sección [MALLA OBJ] Carga de OBJ/MTL en arrays contiguos
+"""Lectura y escritura de OBJ (y lectura de MTL) con arrays de NumPy.
+
+``load_obj`` deja los registros ``v``/``vt``/``vn`` en arrays float32 y las caras
+triangulizadas (en abanico) como esquinas ``(v, vt, vn)`` con índices desde 0
+(-1 si falta la componente). Es la base común de las herramientas de bake,
+simplificación y optimización de mallas.
+"""
+import os
+
+import numpy as np
+
+
+class ObjMesh:
+    """Malla OBJ triangulizada.
+
+    positions: (N, 3) float32
+    uvs:       (M, 2) float32
+    normals:   (K, 3) float32
+    corners:   (T * 3, 3) int32, índices (v, vt, vn) de cada esquina
+    face_materials: (T,) int32, índice en ``materials`` de cada triángulo
+    materials: nombres de material en orden de aparición (``usemtl``)
+    mtllibs:   ficheros MTL referenciados (``mtllib``)
+    """
+
+    def __init__(self, positions, uvs, normals, corners, face_materials, materials, mtllibs):
+        self.positions = positions
+        self.uvs = uvs
+        self.normals = normals
+        self.corners = corners
+        self.face_materials = face_materials
+        self.materials = materials
+        self.mtllibs = mtllibs
+
+    @property
+    def triangle_count(self):
+        return len(self.face_materials)
+
+    def bounds(self):
+        """Devuelve (mínimo, máximo) de las posiciones usadas."""
+        if len(self.positions) == 0:
+            zero = np.zeros(3, dtype=np.float32)
+            return zero, zero
+        return self.positions.min(axis=0), self.positions.max(axis=0)
+
+
+def _to_array(tokens, size):
+    return np.array(tokens, dtype=np.float32).reshape(-1, size)
+
+
+def _resolve(index, count):
+    """Índice OBJ (1-based o negativo relativo) a índice desde 0."""
+    i = int(index)
+    return i - 1 if i > 0 else count + i
+
+
+def load_obj(path):
+    """Lee un OBJ completo y lo devuelve como ``ObjMesh``."""
+    pos_tokens = []
+    uv_tokens = []
+    normal_tokens = []
+    corners = []
+    face_materials = []
+    materials = []
+    material_ids = {}
+    mtllibs = []
+    current_material = -1
+
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            tag = parts[0]
+
+            if tag == "v":
+                pos_tokens.extend(parts[1:4])
+            elif tag == "vt":
+                uv_tokens.extend((parts[1:3] + ["0"])[:2])
+            elif tag == "vn":
+                normal_tokens.extend(parts[1:4])
+            elif tag == "f":
+                counts = (len(pos_tokens) // 3, len(uv_tokens) // 2, len(normal_tokens) // 3)
+                face = []
+                for ref in parts[1:]:
+                    fields = ref.split("/")
+                    corner = [-1, -1, -1]
+                    for k, field in enumerate(fields[:3]):
+                        if field:
+                            corner[k] = _resolve(field, counts[k])
+                    face.append(corner)
+                # Triangulación en abanico
+                for k in range(1, len(face) - 1):
+                    corners.extend((face[0], face[k], face[k + 1]))
+                    face_materials.append(current_material)
+            elif tag == "usemtl" and len(parts) > 1:
+                name = " ".join(parts[1:])
+                if name not in material_ids:
+                    material_ids[name] = len(materials)
+                    materials.append(name)
+                current_material = material_ids[name]
+            elif tag == "mtllib":
+                mtllibs.extend(parts[1:])
+
+    face_materials = np.array(face_materials, dtype=np.int32)
+    if len(face_materials) and (face_materials < 0).any():
+        # Caras sin usemtl: material por defecto
+        materials.append("default")
+        face_materials[face_materials < 0] = len(materials) - 1
+
+    return ObjMesh(
+        positions=_to_array(pos_tokens, 3),
+        uvs=_to_array(uv_tokens, 2),
+        normals=_to_array(normal_tokens, 3),
+        corners=np.array(corners, dtype=np.int32).reshape(-1, 3),
+        face_materials=face_materials,
+        materials=materials,
+        mtllibs=mtllibs,
+    )
+
+
+def load_mtl(path):
+    """Lee un MTL y devuelve ``{material: {clave: valor}}`` con las claves usadas en el juego."""
+    materials = {}
+    current = None
+    if not os.path.exists(path):
+        return materials
+
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            tag = parts[0]
+            if tag == "newmtl":
+                current = materials.setdefault(" ".join(parts[1:]), {})
+            elif current is None:
+                continue
+            elif tag in ("Ka", "Kd", "Ks", "Ke"):
+                current[tag] = [float(c) for c in parts[1:4]]
+            elif tag in ("Ns", "d", "Ni"):
+                current[tag] = float(parts[1])
+            elif tag.startswith("map_") or tag in ("bump", "norm"):
+                # La ruta es el último token (delante pueden ir opciones como -bm)
+                current[tag] = parts[-1]
+    return materials
+
+
+def _format_corner(v, vt, vn):
+    if vt >= 0 and vn >= 0:
+        return f"{v + 1}/{vt + 1}/{vn + 1}"
+    if vn >= 0:
+        return f"{v + 1}//{vn + 1}"
+    if vt >= 0:
+        return f"{v + 1}/{vt + 1}"
+    return f"{v + 1}"
+
+
+def write_obj(mesh, path, comment=None):
+    """Escribe la malla como OBJ conservando mtllib/usemtl.
+
+    Sólo se escriben los v/vt/vn referenciados por alguna cara, reindexados.
+    """
+    corners = mesh.corners
+    remapped = np.full_like(corners, -1)
+    streams = []
+    for k, data in enumerate((mesh.positions, mesh.uvs, mesh.normals)):
+        used = corners[:, k] >= 0
+        keep = np.unique(corners[used, k])
+        lookup = np.full(len(data), -1, dtype=np.int32)
+        lookup[keep] = np.arange(len(keep), dtype=np.int32)
+        remapped[used, k] = lookup[corners[used, k]]
+        streams.append(data[keep])
+
+    order = np.argsort(mesh.face_materials, kind="stable")
+    triangles = remapped.reshape(-1, 3, 3)
+
+    with open(path, "w") as f:
+        if comment:
+            f.write(f"# {comment}\n")
+        for name in mesh.mtllibs:
+            f.write(f"mtllib {name}\n")
+        for tag, data in zip(("v", "vt", "vn"), streams):
+            if len(data):
+                fmt = tag + " %.7g" * data.shape[1] + "\n"
+                f.write((fmt * len(data)) % tuple(data.ravel().tolist()))
+
+        current = None
+        for face in order:
+            material = mesh.face_materials[face]
+            if material != current:
+                current = material
+                f.write(f"usemtl {mesh.materials[material]}\n")
+            f.write("f " + " ".join(_format_corner(*c) for c in triangles[face].tolist()) + "\n")
+
+
+def mtl_paths(obj_path, mesh):
+    """Rutas de los MTL referenciados por la malla (o el MTL homónimo del OBJ)."""
+    folder = os.path.dirname(obj_path)
+    if mesh.mtllibs:
+        return [os.path.join(folder, name) for name in mesh.mtllibs]
+    return [os.path.splitext(obj_path)[0] + ".mtl"]
+# [Fin de sección]
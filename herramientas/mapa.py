@@ -0,0 +1,179 @@
+# sección [MAPA] Modelo de mapa respaldado por arrays
+"""Modelo de mapa compartido por el editor y las herramientas.
+
+Cada celda es un bloque (``#``, ``P``, ``MA``...) y una rotación en grados.
+En vez de listas de listas con cadenas y ``[bloque, rotación]`` mezclados, el
+mapa guarda dos arrays de NumPy:
+
+* ``blocks`` (uint8): código de bloque, índice en ``palette``.
+* ``rotations`` (uint16): rotación de cada celda.
+
+La paleta empieza con los bloques conocidos (``BLOCKS``, el suelo ``.`` es
+el código 0) y crece si aparece alguno nuevo, así que un código nunca cambia
+de significado dentro de un mapa. Las operaciones masivas (redimensionar,
+recortar, rellenar, contar, comparar) son vectoriales.
+"""
+import numpy as np
+
+FLOOR = "."
+
+# Bloques conocidos; el orden fija su código
+BLOCKS = (".", "#", "D", "+", "P", "1", "2", "3", "4", "5", "6", "MP", "MA", "T", "B", "L", " ")
+
+MAX_CODES = 256
+
+
+class MapGrid:
+    def __init__(self, width, height, palette=None):
+        self.palette = list(palette or BLOCKS)
+        self.codes = {block: code for code, block in enumerate(self.palette)}
+        self.blocks = np.zeros((height, width), dtype=np.uint8)
+        self.rotations = np.zeros((height, width), dtype=np.uint16)
+        floor = self.code(FLOOR)
+        if floor:
+            self.blocks.fill(floor)
+
+    @classmethod
+    def from_arrays(cls, blocks, rotations, palette):
+        grid = cls(0, 0, palette)
+        grid.blocks = np.ascontiguousarray(blocks, dtype=np.uint8)
+        grid.rotations = np.ascontiguousarray(rotations, dtype=np.uint16)
+        return grid
+
+    @classmethod
+    def from_cells(cls, rows):
+        """Mapa a partir de filas de (bloque, rotación); las filas cortas se rellenan con suelo."""
+        width = max((len(row) for row in rows), default=0)
+        grid = cls(width, len(rows))
+        for y, row in enumerate(rows):
+            if row:
+                blocks, rotations = zip(*row)
+                grid.blocks[y, :len(row)] = [grid.code(block) for block in blocks]
+                grid.rotations[y, :len(row)] = rotations
+        return grid
+
+    @property
+    def width(self):
+        return self.blocks.shape[1]
+
+    @property
+    def height(self):
+        return self.blocks.shape[0]
+
+    def code(self, block):
+        """Código de ``block``, añadiéndolo a la paleta si es nuevo."""
+        code = self.codes.get(block)
+        if code is None:
+            if len(self.palette) >= MAX_CODES:
+                raise ValueError(f"Demasiados tipos de bloque distintos (máximo {MAX_CODES})")
+            code = len(self.palette)
+            self.palette.append(block)
+            self.codes[block] = code
+        return code
+
+    # ----- CELDAS -----
+
+    def get(self, x, y):
+        return self.palette[self.blocks[y, x]], int(self.rotations[y, x])
+
+    def set(self, x, y, block, rotation=0):
+        self.blocks[y, x] = self.code(block)
+        self.rotations[y, x] = rotation
+
+    def rows(self):
+        """Filas de (bloque, rotación), para serializar."""
+        palette = self.palette
+        for blocks, rotations in zip(self.blocks.tolist(), self.rotations.tolist()):
+            yield [(palette[b], r) for b, r in zip(blocks, rotations)]
+
+    # ----- OPERACIONES MASIVAS -----
+
+    def copy(self):
+        return MapGrid.from_arrays(self.blocks.copy(), self.rotations.copy(), self.palette)
+
+    def resize(self, width, height):
+        """Nuevo mapa de ``width`` x ``height`` con el contenido anclado arriba a la izquierda."""
+        grid = MapGrid(width, height, self.palette)
+        h, w = min(height, self.height), min(width, self.width)
+        grid.blocks[:h, :w] = self.blocks[:h, :w]
+        grid.rotations[:h, :w] = self.rotations[:h, :w]
+        return grid
+
+    def crop(self, x, y, width, height):
+        """Nuevo mapa con el rectángulo indicado (acotado a los límites del mapa)."""
+        return MapGrid.from_arrays(
+            self.blocks[y:y + height, x:x + width].copy(),
+            self.rotations[y:y + height, x:x + width].copy(),
+            self.palette,
+        )
+
+    def fill(self, x0, y0, x1, y1, block, rotation=0):
+        """Rellena el rectángulo [x0, x1) x [y0, y1)."""
+        self.blocks[y0:y1, x0:x1] = self.code(block)
+        self.rotations[y0:y1, x0:x1] = rotation
+
+    def codes_of(self, other):
+        """Bloques de ``other`` traducidos a códigos de este mapa (ampliando la paleta)."""
+        translate = np.array([self.code(block) for block in other.palette], dtype=np.uint8)
+        return translate[other.blocks]
+
+    def flood_region(self, x, y):
+        """Celdas (xs, ys) conectadas a (x, y) en 4 direcciones con su mismo bloque y rotación."""
+        # Importación tardía: analizar_mapa importa este módulo
+        from herramientas.analizar_mapa import label_components
+
+        same = (self.blocks == self.blocks[y, x]) & (self.rotations == self.rotations[y, x])
+        labels, _ = label_components(same)
+        ys, xs = np.nonzero(labels == labels[y, x])
+        return xs, ys
+
+    def count(self):
+        """Número de celdas de cada tipo de bloque presente."""
+        counts = np.bincount(self.blocks.ravel(), minlength=len(self.palette))
+        return {self.palette[code]: int(n) for code, n in enumerate(counts.tolist()) if n}
+
+    def _comparable(self, other):
+        """Bloques de ``other`` traducidos a los códigos de esta paleta."""
+        if other.blocks.shape != self.blocks.shape:
+            raise ValueError(f"Tamaños distintos: {self.width}x{self.height} y {other.width}x{other.height}")
+        if other.palette == self.palette[:len(other.palette)]:
+            return other.blocks
+        translate = np.array([self.codes.get(block, MAX_CODES) for block in other.palette], dtype=np.int32)
+        return translate[other.blocks]
+
+    def diff(self, other):
+        """Coordenadas (x, y) de las celdas que difieren de ``other`` (mismo tamaño)."""
+        changed = (self.blocks != self._comparable(other)) | (self.rotations != other.rotations)
+        ys, xs = np.nonzero(changed)
+        return np.column_stack((xs, ys))
+
+    def __eq__(self, other):
+        if not isinstance(other, MapGrid):
+            return NotImplemented
+        return self.blocks.shape == other.blocks.shape and len(self.diff(other)) == 0
+
+    def nbytes(self):
+        return self.blocks.nbytes + self.rotations.nbytes
+
+
+# ----- GEOMETRÍA DE HERRAMIENTAS -----
+
+def line_cells(x0, y0, x1, y1):
+    """Celdas (xs, ys) de la línea entre dos celdas (ambas incluidas), una por paso del eje mayor."""
+    steps = max(abs(x1 - x0), abs(y1 - y0))
+    t = np.linspace(0.0, 1.0, steps + 1)
+    xs = np.rint(x0 + (x1 - x0) * t).astype(np.int64)
+    ys = np.rint(y0 + (y1 - y0) * t).astype(np.int64)
+    return xs, ys
+
+
+def rect_cells(x0, y0, x1, y1, filled=True):
+    """Celdas (xs, ys) del rectángulo entre dos esquinas (incluidas), relleno o sólo el borde."""
+    x0, x1 = sorted((x0, x1))
+    y0, y1 = sorted((y0, y1))
+    ys, xs = np.mgrid[y0:y1 + 1, x0:x1 + 1]
+    if not filled:
+        border = (xs == x0) | (xs == x1) | (ys == y0) | (ys == y1)
+        return xs[border], ys[border]
+    return xs.ravel(), ys.ravel()
+# [Fin de sección]
@@ -0,0 +1,263 @@
+# sección [MAPA BINARIO] Formato binario RLE de mapas
+"""Formato binario compacto de mapas (``.mapb``) y conversión con ``.txt``.
+
+Todo en little-endian:
+
+    cabecera      "MAPB", versión u16, flags u16, ancho u32, alto u32,
+                  nº de bloques de la paleta u16, nº de tramos u32,
+                  nº de rotaciones u32
+    paleta        por bloque: longitud u8 + bytes UTF-8
+    índice filas  (si flags & ROW_INDEX) alto x u32: primer tramo de cada fila
+    tramos        nº de tramos x (código u8, longitud u16)
+    rotaciones    nº de rotaciones x u32 (celda = y * ancho + x),
+                  seguido de nº de rotaciones x u16 (grados)
+    fuente        (si flags & SOURCE_HASH) u32: huella del .txt de origen
+
+Los tramos son secuencias de celdas con el mismo código, recorriendo el mapa
+por filas. Ningún tramo cruza de una fila a otra, así que con el índice de
+filas se puede decodificar cualquier rango de filas sin leer el resto. Sólo
+se guardan las rotaciones distintas de cero. El orden de la paleta es el del
+MapGrid, así que la conversión es exacta en los dos sentidos.
+
+La huella de la fuente (``source_hash``) permite al juego descartar un
+``.mapb`` que ya no corresponde a su ``.txt`` (el mapa se editó después de
+convertirlo). Es una suma polinómica de los bytes módulo 2^32 que se calcula
+igual en MapLoader.sourceHash.
+
+    python -m herramientas.mapa_binario mapas/mapa1.txt            # -> mapas/mapa1.mapb
+    python -m herramientas.mapa_binario mapas/mapa1.mapb -o copia.txt
+"""
+import argparse
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from herramientas.ficheros import replace_file
+from herramientas.formato_mapa import format_map, read_map, write_map
+from herramientas.mapa import MapGrid
+
+MAGIC = b"MAPB"
+VERSION = 1
+EXTENSION = ".mapb"
+
+# flags
+ROW_INDEX = 1
+SOURCE_HASH = 2
+
+HASH_BASE = 0x01000193
+
+HEADER = struct.Struct("<4sHHIIHII")
+RUN_DTYPE = np.dtype([("code", "u1"), ("length", "<u2")])
+MAX_RUN = 0xFFFF
+
+
+class BinaryMapError(ValueError):
+    pass
+
+
+def _runs(blocks):
+    """Inicio y código de cada tramo (sin cruzar filas ni pasar de MAX_RUN)."""
+    height, width = blocks.shape
+    flat = blocks.ravel()
+    change = np.ones(flat.size, dtype=bool)
+    change[1:] = flat[1:] != flat[:-1]
+    change[::width] = True
+    starts = np.flatnonzero(change)
+
+    lengths = np.diff(np.append(starts, flat.size))
+    pieces = (lengths + MAX_RUN - 1) // MAX_RUN
+    if pieces.max(initial=1) > 1:
+        # Partir los tramos largos en trozos de MAX_RUN
+        first = np.repeat(np.cumsum(pieces) - pieces, pieces)
+        starts = np.repeat(starts, pieces) + (np.arange(pieces.sum()) - first) * MAX_RUN
+    return starts, flat[starts]
+
+
+def source_hash(data):
+    """Huella de unos bytes: suma de (byte + 1) * HASH_BASE^(i + 1), módulo 2^32."""
+    values = np.frombuffer(data, dtype=np.uint8).astype(np.uint64) + 1
+    powers = np.cumprod(np.full(values.size, HASH_BASE, dtype=np.uint64))
+    return int(np.sum(values * powers, dtype=np.uint64) & 0xFFFFFFFF)
+
+
+def encode(grid, row_index=True, source=None):
+    """Bytes ``.mapb`` de un MapGrid; ``source`` es la huella del .txt de origen, si lo hay."""
+    height, width = grid.blocks.shape
+    palette = [block.encode("utf-8") for block in grid.palette]
+    if any(len(block) > 0xFF for block in palette):
+        raise BinaryMapError("Nombre de bloque demasiado largo para la paleta")
+
+    if grid.blocks.size:
+        starts, codes = _runs(grid.blocks)
+    else:
+        starts = codes = np.zeros(0, dtype=np.int64)
+    runs = np.empty(len(starts), dtype=RUN_DTYPE)
+    runs["code"] = codes
+    runs["length"] = np.diff(np.append(starts, grid.blocks.size))
+
+    rotated = np.flatnonzero(grid.rotations.ravel())
+    flags = (ROW_INDEX if row_index else 0) | (SOURCE_HASH if source is not None else 0)
+
+    parts = [HEADER.pack(MAGIC, VERSION, flags, width, height, len(palette), len(runs), len(rotated))]
+    parts.extend(bytes((len(block),)) + block for block in palette)
+    if row_index:
+        row_starts = np.searchsorted(starts, np.arange(height) * width)
+        parts.append(row_starts.astype("<u4").tobytes())
+    parts.append(runs.tobytes())
+    parts.append(rotated.astype("<u4").tobytes())
+    parts.append(grid.rotations.ravel()[rotated].astype("<u2").tobytes())
+    if source is not None:
+        parts.append(struct.pack("<I", source))
+    return b"".join(parts)
+
+
+def _read_header(data):
+    if len(data) < HEADER.size:
+        raise BinaryMapError("Fichero demasiado corto")
+    magic, version, flags, width, height, palette_len, run_count, rotation_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise BinaryMapError("No es un mapa binario (falta la marca MAPB)")
+    if version > VERSION:
+        raise BinaryMapError(f"Versión {version} no soportada (máximo {VERSION})")
+
+    offset = HEADER.size
+    palette = []
+    for _ in range(palette_len):
+        size = data[offset]
+        palette.append(bytes(data[offset + 1:offset + 1 + size]).decode("utf-8"))
+        offset += 1 + size
+
+    row_starts = None
+    if flags & ROW_INDEX:
+        row_starts = np.frombuffer(data, dtype="<u4", count=height, offset=offset)
+        offset += 4 * height
+    return width, height, palette, row_starts, run_count, rotation_count, offset
+
+
+def decode(data):
+    """MapGrid a partir de bytes ``.mapb``."""
+    width, height, palette, _, run_count, rotation_count, offset = _read_header(data)
+    try:
+        runs = np.frombuffer(data, dtype=RUN_DTYPE, count=run_count, offset=offset)
+        offset += runs.nbytes
+        cells = np.frombuffer(data, dtype="<u4", count=rotation_count, offset=offset)
+        values = np.frombuffer(data, dtype="<u2", count=rotation_count, offset=offset + cells.nbytes)
+    except ValueError:
+        raise BinaryMapError("Fichero truncado") from None
+
+    blocks = np.repeat(runs["code"], runs["length"])
+    if blocks.size != width * height:
+        raise BinaryMapError(f"Los tramos suman {blocks.size} celdas en vez de {width * height}")
+    rotations = np.zeros(width * height, dtype=np.uint16)
+    rotations[cells] = values
+    return MapGrid.from_arrays(blocks.reshape(height, width), rotations.reshape(height, width), palette)
+
+
+def decode_rows(data, y0, y1):
+    """Filas [y0, y1) como MapGrid, usando el índice de filas (sin decodificar el resto)."""
+    width, height, palette, row_starts, run_count, rotation_count, offset = _read_header(data)
+    if row_starts is None:
+        return decode(data).crop(0, y0, width, y1 - y0)
+    y0, y1 = max(0, y0), min(height, y1)
+    first = int(row_starts[y0]) if y0 < height else run_count
+    last = int(row_starts[y1]) if y1 < height else run_count
+    runs = np.frombuffer(data, dtype=RUN_DTYPE, count=last - first, offset=offset + first * RUN_DTYPE.itemsize)
+    blocks = np.repeat(runs["code"], runs["length"]).reshape(-1, width)
+
+    offset += run_count * RUN_DTYPE.itemsize
+    cells = np.frombuffer(data, dtype="<u4", count=rotation_count, offset=offset)
+    values = np.frombuffer(data, dtype="<u2", count=rotation_count, offset=offset + cells.nbytes)
+    lo, hi = np.searchsorted(cells, [y0 * width, y1 * width])
+    rotations = np.zeros(blocks.size, dtype=np.uint16)
+    rotations[cells[lo:hi] - y0 * width] = values[lo:hi]
+    return MapGrid.from_arrays(blocks, rotations.reshape(blocks.shape), palette)
+
+
+def read_binary(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def stored_source_hash(data):
+    """Huella del .txt de origen guardada en unos bytes ``.mapb``, o None."""
+    if len(data) < HEADER.size + 4:
+        return None
+    magic, _, flags, *_ = HEADER.unpack_from(data)
+    if magic != MAGIC or not flags & SOURCE_HASH:
+        return None
+    return struct.unpack_from("<I", data, len(data) - 4)[0]
+
+
+def map_source_hash(path):
+    """Huella del mapa de texto del que sale ``path`` (.txt o .mapb convertido); None si no se sabe."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(EXTENSION):
+        return stored_source_hash(data)
+    return source_hash(data)
+
+
+def write_binary(grid, path, row_index=True, source=None):
+    data = encode(grid, row_index, source)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_any(path):
+    """Lee un mapa de texto o binario según la extensión."""
+    if path.endswith(EXTENSION):
+        return read_binary(path)
+    return read_map(path)
+
+
+def save_any(grid, path, source=None):
+    """Guarda un mapa de texto o binario según la extensión.
+
+    Un ``.mapb`` lleva la huella ``source`` del .txt de origen; sin ella (mapas
+    generados o editados) la del texto que escribiría ``write_map``.
+    """
+    if path.endswith(EXTENSION):
+        if source is None:
+            source = source_hash(format_map(grid).encode("utf-8"))
+        write_binary(grid, path, source=source)
+    else:
+        write_map(grid, path)
+
+
+def convert(source, dest=None):
+    """Convierte ``.txt`` <-> ``.mapb``; por defecto junto al original con la otra extensión."""
+    base, ext = os.path.splitext(source)
+    dest = dest or base + (".txt" if ext == EXTENSION else EXTENSION)
+    save_any(load_any(source), dest, map_source_hash(source) if dest.endswith(EXTENSION) else None)
+    return dest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convierte mapas entre texto (.txt) y binario RLE (.mapb).")
+    parser.add_argument("mapas", nargs="+", help="Mapas de entrada (.txt o .mapb)")
+    parser.add_argument("-o", "--salida", help="Ruta de salida (sólo con un mapa)")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+
+    for source in args.mapas:
+        try:
+            dest = convert(source, args.salida)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error: {e}\n")
+        print(f"{source} ({os.path.getsize(source)} bytes) -> {dest} ({os.path.getsize(dest)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,247 @@
+# sección [MAPAS CLI] Operaciones por lotes sobre mapas sin interfaz gráfica
+"""Línea de comandos para mapas (``.txt`` o ``.mapb``), sin importar tkinter.
+
+    python -m herramientas.mapas validar mapas/*.txt
+    python -m herramientas.mapas estadisticas mapas/*.txt [--json]
+    python -m herramientas.mapas redimensionar mapas/mapa1.txt --ancho 60 --alto 40
+    python -m herramientas.mapas recortar mapas/mapa1.txt 0 0 20 20 -o mapas/trozo.txt
+    python -m herramientas.mapas convertir mapas/*.txt [--formato mapb] [-d build]
+    python -m herramientas.mapas diferencias mapas/mapa1.txt mapas/mapa2.txt
+
+Los comandos que reciben varios mapas los reparten entre procesos (``-j``).
+Sin ``-o`` ni ``-d``, redimensionar y recortar sobrescriben el mapa después
+de guardar una copia en el almacén de copias de seguridad.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+
+from herramientas.analizar_mapa import analyze, problems, text_row_widths
+from herramientas.copias import backup
+from herramientas.formato_mapa import MapFormatError
+from herramientas.mapa_binario import EXTENSION, convert as convert_file, load_any, save_any
+
+# Máximo de celdas distintas que lista ``diferencias``
+MAX_DIFF_LINES = 50
+
+
+# ----- COMANDOS (uno por mapa; devuelven (error, texto)) -----
+
+def validate(path, as_json=False):
+    """Integridad y alcanzabilidad (ver analizar_mapa); error si hay algún problema."""
+    grid = load_any(path)
+    row_widths = None if path.endswith(EXTENSION) else text_row_widths(path)
+    report = analyze(grid, row_widths)
+    found = problems(report)
+    if as_json:
+        return bool(found), dict(mapa=path, problemas=found, **report)
+    if found:
+        return True, "\n".join(f"{path}: {problem}" for problem in found)
+    return False, f"{path}: OK ({grid.width}x{grid.height}, {report['celdas_alcanzables']} celdas alcanzables)"
+
+
+def stats(path):
+    grid = load_any(path)
+    counts = grid.count()
+    data = {
+        "mapa": path,
+        "ancho": grid.width,
+        "alto": grid.height,
+        "bytes": os.path.getsize(path),
+        "rotadas": int((grid.rotations != 0).sum()),
+        "bloques": dict(sorted(counts.items(), key=lambda item: -item[1])),
+    }
+    return False, data
+
+
+def _format_stats(data):
+    lines = [f"{data['mapa']}: {data['ancho']}x{data['alto']}, {data['bytes']} bytes, "
+             f"{data['rotadas']} celdas rotadas"]
+    for block, n in data["bloques"].items():
+        lines.append(f"    ({block}) {n}")
+    return "\n".join(lines)
+
+
+def _output_path(path, output, directory, extension=None):
+    if output:
+        return output
+    base = os.path.basename(path)
+    if extension:
+        base = os.path.splitext(base)[0] + extension
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, base)
+    return os.path.join(os.path.dirname(path), base)
+
+
+def _save(grid, path, dest):
+    """Guarda ``grid`` en ``dest``; si sobrescribe ``path`` guarda antes una copia."""
+    if os.path.abspath(dest) == os.path.abspath(path):
+        backup(path)
+    save_any(grid, dest)
+
+
+def resize(path, width, height, output=None, directory=None):
+    grid = load_any(path)
+    dest = _output_path(path, output, directory)
+    _save(grid.resize(width, height), path, dest)
+    return False, f"{path}: {grid.width}x{grid.height} -> {width}x{height} en {dest}"
+
+
+def crop(path, x, y, width, height, output=None, directory=None):
+    grid = load_any(path)
+    cropped = grid.crop(x, y, width, height)
+    if cropped.blocks.size == 0:
+        return True, f"{path}: el recorte queda fuera del mapa ({grid.width}x{grid.height})"
+    dest = _output_path(path, output, directory)
+    _save(cropped, path, dest)
+    return False, f"{path}: recorte {cropped.width}x{cropped.height} desde ({x}, {y}) en {dest}"
+
+
+def convert(path, fmt=None, output=None, directory=None):
+    fmt = fmt or ("txt" if path.endswith(EXTENSION) else "mapb")
+    dest = _output_path(path, output, directory, ".txt" if fmt == "txt" else EXTENSION)
+    if os.path.abspath(dest) == os.path.abspath(path):
+        return True, f"{path}: ya está en formato {fmt}"
+    # Como mapa_binario.convert: el .mapb guarda la huella del .txt del que sale
+    convert_file(path, dest)
+    return False, f"{path} ({os.path.getsize(path)} bytes) -> {dest} ({os.path.getsize(dest)} bytes)"
+
+
+def diff(path_a, path_b):
+    a, b = load_any(path_a), load_any(path_b)
+    if (a.width, a.height) != (b.width, b.height):
+        return True, f"Tamaños distintos: {path_a} {a.width}x{a.height}, {path_b} {b.width}x{b.height}"
+    changed = a.diff(b)
+    if len(changed) == 0:
+        return False, "Mapas iguales"
+    lines = [f"{len(changed)} celdas distintas"]
+    for x, y in changed[:MAX_DIFF_LINES].tolist():
+        (block_a, rot_a), (block_b, rot_b) = a.get(x, y), b.get(x, y)
+        lines.append(f"    ({x}, {y}): {block_a}[{rot_a}] -> {block_b}[{rot_b}]")
+    if len(changed) > MAX_DIFF_LINES:
+        lines.append(f"    ... y {len(changed) - MAX_DIFF_LINES} más")
+    return True, "\n".join(lines)
+
+
+# ----- EJECUCIÓN -----
+
+def _run(task):
+    """Ejecuta un comando sobre un mapa capturando los errores de lectura."""
+    function, path, kwargs = task
+    try:
+        return function(path, **kwargs)
+    except MapFormatError as e:
+        # read_map ya incluye la ruta en el mensaje
+        return True, str(e) if e.path else f"{path}: {e}"
+    except (OSError, ValueError) as e:
+        return True, f"{path}: {e}"
+
+
+def run_many(function, paths, jobs=None, **kwargs):
+    """Aplica ``function`` a cada mapa (en paralelo si hay varios); resultados en orden."""
+    tasks = [(function, path, kwargs) for path in paths]
+    if len(tasks) > 1 and jobs != 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_run, tasks))
+    return [_run(task) for task in tasks]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Operaciones sobre mapas sin interfaz gráfica.")
+    parser.add_argument("-j", "--procesos", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def add_outputs(p):
+        group = p.add_mutually_exclusive_group()
+        group.add_argument("-o", "--salida", help="Ruta de salida (sólo con un mapa)")
+        group.add_argument("-d", "--directorio", help="Carpeta de salida")
+
+    p = sub.add_parser("validar", help="Comprueba formato, filas, jugador, bloques y alcanzabilidad")
+    p.add_argument("mapas", nargs="+")
+    p.add_argument("--json", action="store_true", help="Informe completo en JSON")
+
+    p = sub.add_parser("estadisticas", help="Tamaño y número de celdas de cada bloque")
+    p.add_argument("mapas", nargs="+")
+    p.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p = sub.add_parser("redimensionar", help="Cambia el tamaño (el contenido queda arriba a la izquierda)")
+    p.add_argument("mapas", nargs="+")
+    p.add_argument("--ancho", type=int, required=True)
+    p.add_argument("--alto", type=int, required=True)
+    add_outputs(p)
+
+    p = sub.add_parser("recortar", help="Se queda con un rectángulo del mapa")
+    p.add_argument("mapas", nargs="+")
+    p.add_argument("x", type=int)
+    p.add_argument("y", type=int)
+    p.add_argument("ancho", type=int)
+    p.add_argument("alto", type=int)
+    add_outputs(p)
+
+    p = sub.add_parser("convertir", help="Convierte entre texto (.txt) y binario (.mapb)")
+    p.add_argument("mapas", nargs="+")
+    p.add_argument("--formato", choices=("txt", "mapb"), help="Por defecto, el contrario al de cada mapa")
+    add_outputs(p)
+
+    p = sub.add_parser("diferencias", help="Celdas distintas entre dos mapas del mismo tamaño")
+    p.add_argument("a")
+    p.add_argument("b")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.comando == "diferencias":
+        try:
+            failed, text = diff(args.a, args.b)
+        except (OSError, ValueError) as e:
+            failed, text = True, f"Error: {e}"
+        print(text)
+        raise SystemExit(1 if failed else 0)
+
+    if getattr(args, "salida", None) and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+    outputs = {"output": getattr(args, "salida", None), "directory": getattr(args, "directorio", None)}
+
+    if args.comando == "validar":
+        function, kwargs = validate, {"as_json": args.json}
+    elif args.comando == "estadisticas":
+        function, kwargs = stats, {}
+    elif args.comando == "redimensionar":
+        if args.ancho <= 0 or args.alto <= 0:
+            parser.error("El ancho y el alto deben ser positivos")
+        function, kwargs = resize, dict(width=args.ancho, height=args.alto, **outputs)
+    elif args.comando == "recortar":
+        if args.x < 0 or args.y < 0 or args.ancho <= 0 or args.alto <= 0:
+            parser.error("El recorte necesita x, y >= 0 y ancho, alto > 0")
+        function, kwargs = crop, dict(x=args.x, y=args.y, width=args.ancho, height=args.alto, **outputs)
+    else:
+        function, kwargs = convert, dict(fmt=args.formato, **outputs)
+
+    results = run_many(function, args.mapas, args.procesos, **kwargs)
+
+    if getattr(args, "json", False):
+        # En JSON los mapas que no se han podido leer van a stderr
+        reports = [result for _, result in results if isinstance(result, dict)]
+        json.dump(reports, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        for _, result in results:
+            if not isinstance(result, dict):
+                print(result, file=sys.stderr)
+    elif args.comando == "estadisticas":
+        for failed, result in results:
+            print(result if failed else _format_stats(result))
+    else:
+        for _, text in results:
+            print(text)
+    raise SystemExit(1 if any(failed for failed, _ in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
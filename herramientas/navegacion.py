@@ -0,0 +1,382 @@
+# sección [NAVEGACIÓN] Datos de navegación precalculados para los enemigos
+"""Genera el fichero de navegación (``.nav``) que usa EnemyManager.
+
+En vez de avanzar en línea recta hacia el jugador y comprobar cada frame la
+caja del enemigo contra todos los muros, el juego consulta datos precalculados
+a partir de la rejilla, todos indexables en O(1) por enemigo:
+
+* Mapa de bits de celdas transitables (muros, arbustos y ladrillos bloquean,
+  como en analizar_mapa, y también los árboles), que sustituye al recorrido
+  de los muros y de los colliders de los árboles.
+* Grafo de regiones: el mapa se divide en sectores de ``sector`` x ``sector``
+  celdas y cada componente conexa de un sector es una región. Las aristas unen
+  regiones vecinas y guardan la celda de paso (mediana de la frontera). El
+  suelo de fuera del mapa es un nodo más (exterior), conectado a las regiones
+  del borde. El juego recorre este grafo (pocos nodos) sólo cuando el jugador
+  cambia de región.
+* Campos de distancia y dirección hacia puntos clave (spawn del jugador,
+  puertas y spawns de enemigos): distancia en pasos y una de 8 direcciones
+  hacia la celda vecina más cercana al objetivo.
+
+Todo en little-endian, cada sección alineada a 4 bytes:
+
+    cabecera      "NAVM", versión u16, sector u16, ancho u32, alto u32,
+                  nº de regiones u32, nº de aristas u32, nº de campos u16,
+                  flags u16, huella del mapa u32 (si flags & SOURCE_HASH)
+    transitables  ancho x alto bits (1 = transitable, orden de bits little)
+    región local  ancho x alto u8: región dentro de su sector (255 = bloqueada)
+    sectores      (nº de sectores + 1) x u32: primera región de cada sector
+    aristas       (nº de regiones + 2) x u32 de inicio por región (la última
+                  región es el exterior), destinos u32 y celdas de paso (x, y)
+                  i32 (fuera del mapa si el destino es el exterior)
+    campos        por campo: nombre (16 bytes), distancia u16 por celda
+                  (65535 = inalcanzable) y dirección u8 por celda (0 = ninguna)
+
+Con el ``.nav`` cargado los enemigos no miran los muros, así que el juego lo
+ignora si la huella (ver mapa_binario.source_hash) o el tamaño no son los del
+mapa cargado: el mapa se editó después del bake.
+
+    python -m herramientas.navegacion mapas/mapa1.txt     # -> mapas/mapa1.nav
+"""
+import argparse
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from herramientas.analizar_mapa import (DOORS, ENEMIES, NAV_BLOCKING, block_mask, label_components,
+                                        player_spawn)
+from herramientas.ficheros import replace_file
+from herramientas.mapa_binario import load_any, map_source_hash
+
+MAGIC = b"NAVM"
+VERSION = 2
+EXTENSION = ".nav"
+
+HEADER = struct.Struct("<4sHHIIIIHHI")
+NAME_SIZE = 16
+
+DEFAULT_SECTOR = 8
+# Con sectores de 16x16 caben como mucho 128 regiones por sector en un u8
+MAX_SECTOR = 16
+BLOCKED = 0xFF
+UNREACHABLE = 0xFFFF
+
+# flags
+SOURCE_HASH = 1
+
+# Direcciones (dx, dy) de los códigos 1..8; y crece hacia +z en el mundo
+DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, 1), (-1, -1), (1, -1))
+
+
+class NavigationError(ValueError):
+    pass
+
+
+def walkable_mask(grid):
+    """Celdas transitables para los enemigos: el mapa de bits es por celdas, así que
+    el collider de un árbol (5x5 en el centro de la celda) bloquea su celda entera."""
+    return ~block_mask(grid, NAV_BLOCKING)
+
+
+def _key_points(grid):
+    """Celdas origen de cada campo: nombre -> máscara."""
+    spawn = player_spawn(grid)[0]
+    player = np.zeros(grid.blocks.shape, dtype=bool)
+    if spawn:
+        player[spawn[1], spawn[0]] = True
+    return {
+        "jugador": player,
+        "puertas": block_mask(grid, DOORS),
+        "spawns": block_mask(grid, ENEMIES),
+    }
+
+
+# ----- REGIONES -----
+
+def sector_regions(mask, sector):
+    """Regiones (componentes conexas dentro de cada sector), numeradas por sector.
+
+    Devuelve (región global por celda con -1 si está bloqueada, primera región
+    de cada sector, nº de regiones).
+    """
+    height, width = mask.shape
+    sectors_x = -(-width // sector)
+    sectors_y = -(-height // sector)
+    # Separar los sectores con filas y columnas bloqueadas y etiquetar de una vez
+    split = np.insert(mask, np.arange(sector, width, sector), False, axis=1)
+    split = np.insert(split, np.arange(sector, height, sector), False, axis=0)
+    labels, count = label_components(split)
+    rows = np.arange(height) + np.arange(height) // sector
+    cols = np.arange(width) + np.arange(width) // sector
+    labels = labels[np.ix_(rows, cols)]
+
+    ys, xs = np.nonzero(mask)
+    cell_sector = (ys // sector) * sectors_x + xs // sector
+    label_sector = np.zeros(count, dtype=np.int64)
+    label_sector[labels[ys, xs]] = cell_sector
+    order = np.lexsort((np.arange(count), label_sector))
+    renumber = np.empty(count, dtype=np.int64)
+    renumber[order] = np.arange(count)
+
+    regions = np.full(mask.shape, -1, dtype=np.int64)
+    regions[ys, xs] = renumber[labels[ys, xs]]
+    sector_base = np.searchsorted(label_sector[order], np.arange(sectors_x * sectors_y + 1))
+    return regions, sector_base, count
+
+
+def region_graph(regions, count):
+    """Aristas entre regiones vecinas agrupadas por origen: (inicios, destinos, celdas de paso).
+
+    La región ``count`` es el exterior del mapa.
+    """
+    height, width = regions.shape
+    src, dst, px, py = [], [], [], []
+
+    def add(a, b, x, y):
+        src.append(a)
+        dst.append(b)
+        px.append(x)
+        py.append(y)
+
+    # Vecinas en horizontal y en vertical, en los dos sentidos
+    left, right = regions[:, :-1], regions[:, 1:]
+    ys, xs = np.nonzero((left >= 0) & (right >= 0) & (left != right))
+    add(left[ys, xs], right[ys, xs], xs + 1, ys)
+    add(right[ys, xs], left[ys, xs], xs, ys)
+    top, bottom = regions[:-1], regions[1:]
+    ys, xs = np.nonzero((top >= 0) & (bottom >= 0) & (top != bottom))
+    add(top[ys, xs], bottom[ys, xs], xs, ys + 1)
+    add(bottom[ys, xs], top[ys, xs], xs, ys)
+
+    # Borde del mapa <-> exterior: la celda de paso hacia fuera queda fuera del mapa
+    for xs, ys, outside_x, outside_y in (
+        (np.zeros(height, dtype=np.int64), np.arange(height), -1, None),
+        (np.full(height, width - 1), np.arange(height), width, None),
+        (np.arange(width), np.zeros(width, dtype=np.int64), None, -1),
+        (np.arange(width), np.full(width, height - 1), None, height),
+    ):
+        inside = regions[ys, xs]
+        xs, ys, inside = xs[inside >= 0], ys[inside >= 0], inside[inside >= 0]
+        exterior = np.full(len(inside), count)
+        add(inside, exterior, xs if outside_x is None else np.full(len(xs), outside_x),
+            ys if outside_y is None else np.full(len(ys), outside_y))
+        add(exterior, inside, xs, ys)
+
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    px, py = np.concatenate(px), np.concatenate(py)
+
+    # Una arista por (origen, destino), con la celda mediana de su frontera
+    key = src * (count + 1) + dst
+    order = np.lexsort((py, px, key))
+    key = key[order]
+    starts = np.flatnonzero(np.diff(key, prepend=-1))
+    sizes = np.diff(np.append(starts, len(key)))
+    median = order[starts + sizes // 2]
+    edge_src = src[order[starts]]
+    offsets = np.searchsorted(edge_src, np.arange(count + 2))
+    portals = np.column_stack((px[median], py[median]))
+    return offsets, dst[order[starts]], portals
+
+
+# ----- CAMPOS -----
+
+def _padded(mask):
+    """Máscara con un anillo transitable (suelo exterior) y otro bloqueado alrededor."""
+    height, width = mask.shape
+    padded = np.zeros((height + 4, width + 4), dtype=bool)
+    padded[1:-1, 1:-1] = True
+    padded[2:-2, 2:-2] = mask
+    return padded
+
+
+def distance_field(mask, sources):
+    """Distancia en pasos (4 vecinos) desde las celdas de ``sources``, con el suelo exterior."""
+    padded = _padded(mask)
+    stride = padded.shape[1]
+    visited = ~padded.ravel()
+    dist = np.full(padded.size, UNREACHABLE, dtype=np.uint16)
+
+    ys, xs = np.nonzero(sources & mask)
+    frontier = (ys + 2) * stride + xs + 2
+    visited[frontier] = True
+    dist[frontier] = 0
+    step = 0
+    # BFS por frentes: cada iteración expande todo el frente de golpe
+    while frontier.size:
+        step += 1
+        neighbours = np.concatenate((frontier - 1, frontier + 1, frontier - stride, frontier + stride))
+        frontier = np.unique(neighbours[~visited[neighbours]])
+        visited[frontier] = True
+        dist[frontier] = min(step, UNREACHABLE - 1)
+    return dist.reshape(padded.shape)
+
+
+def direction_field(mask, padded_dist):
+    """Código de dirección (1..8, 0 = ninguna) hacia la vecina con menor distancia.
+
+    Las diagonales sólo valen si las dos celdas ortogonales son transitables,
+    para no cortar esquinas de muros.
+    """
+    padded = _padded(mask)
+    height, width = mask.shape
+    dist = padded_dist.astype(np.int32)
+    inner = (slice(2, height + 2), slice(2, width + 2))
+    best = dist[inner].copy()
+    codes = np.zeros(mask.shape, dtype=np.uint8)
+
+    def shifted(array, dx, dy):
+        return array[2 + dy:height + 2 + dy, 2 + dx:width + 2 + dx]
+
+    for code, (dx, dy) in enumerate(DIRECTIONS, start=1):
+        candidate = shifted(dist, dx, dy)
+        better = candidate < best
+        if dx and dy:
+            better &= shifted(padded, dx, 0) & shifted(padded, 0, dy)
+        best[better] = candidate[better]
+        codes[better] = code
+    codes[~mask] = 0
+    return codes
+
+
+# ----- FICHERO -----
+
+def _pad(parts):
+    size = sum(len(part) for part in parts)
+    if size % 4:
+        parts.append(bytes(4 - size % 4))
+
+
+def bake(grid, sector=DEFAULT_SECTOR, fields=True, source=None):
+    """Bytes ``.nav`` de un MapGrid (``source``: huella del mapa de texto de origen, si se conoce)."""
+    if not 1 <= sector <= MAX_SECTOR:
+        raise NavigationError(f"El sector debe estar entre 1 y {MAX_SECTOR} celdas")
+    mask = walkable_mask(grid)
+    height, width = mask.shape
+    regions, sector_base, count = sector_regions(mask, sector)
+    offsets, targets, portals = region_graph(regions, count)
+
+    cell_sector = (np.arange(height)[:, None] // sector) * -(-width // sector) + np.arange(width) // sector
+    local = np.where(regions >= 0, regions - sector_base[cell_sector], BLOCKED).astype(np.uint8)
+
+    key_points = {name: points for name, points in _key_points(grid).items() if points.any()} if fields else {}
+
+    flags = SOURCE_HASH if source is not None else 0
+    parts = [HEADER.pack(MAGIC, VERSION, sector, width, height, count, len(targets), len(key_points),
+                         flags, source or 0)]
+    parts.append(np.packbits(mask.ravel(), bitorder="little").tobytes())
+    _pad(parts)
+    parts.append(local.tobytes())
+    _pad(parts)
+    parts.append(sector_base.astype("<u4").tobytes())
+    parts.append(offsets.astype("<u4").tobytes())
+    parts.append(targets.astype("<u4").tobytes())
+    parts.append(portals.astype("<i4").tobytes())
+    for name, points in key_points.items():
+        dist = distance_field(mask, points)
+        parts.append(name.encode("ascii").ljust(NAME_SIZE, b"\0"))
+        parts.append(dist[2:-2, 2:-2].astype("<u2").tobytes())
+        _pad(parts)
+        parts.append(direction_field(mask, dist).tobytes())
+        _pad(parts)
+    return b"".join(parts)
+
+
+def decode(data):
+    """Contenido de un ``.nav`` como dict de arrays (para comprobarlo desde Python)."""
+    if len(data) < HEADER.size:
+        raise NavigationError("Fichero demasiado corto")
+    magic, version, sector, width, height, count, edges, field_count, flags, source = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise NavigationError("No es un fichero de navegación (falta la marca NAVM)")
+    if version != VERSION:
+        raise NavigationError(f"Versión {version} no soportada (se espera {VERSION})")
+
+    cells = width * height
+    offset = HEADER.size
+
+    def take(dtype, count, align=True):
+        nonlocal offset
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        if align:
+            offset += -offset % 4
+        return array
+
+    try:
+        walkable = np.unpackbits(take("u1", -(-cells // 8)), count=cells, bitorder="little")
+        local = take("u1", cells)
+        sector_base = take("<u4", -(-width // sector) * -(-height // sector) + 1)
+        offsets = take("<u4", count + 2)
+        targets = take("<u4", edges)
+        portals = take("<i4", 2 * edges).reshape(-1, 2)
+        fields = {}
+        for _ in range(field_count):
+            name = bytes(data[offset:offset + NAME_SIZE]).rstrip(b"\0").decode("ascii")
+            offset += NAME_SIZE
+            dist = take("<u2", cells).reshape(height, width)
+            fields[name] = (dist, take("u1", cells).reshape(height, width))
+    except ValueError:
+        raise NavigationError("Fichero truncado") from None
+
+    return {
+        "sector": sector,
+        "fuente": source if flags & SOURCE_HASH else None,
+        "walkable": walkable.reshape(height, width).astype(bool),
+        "local": local.reshape(height, width),
+        "sector_base": sector_base,
+        "offsets": offsets,
+        "targets": targets,
+        "portals": portals,
+        "fields": fields,
+    }
+
+
+def write_navigation(grid, path, sector=DEFAULT_SECTOR, fields=True, source=None):
+    data = bake(grid, sector, fields, source)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+
+def bake_file(source, dest=None, sector=DEFAULT_SECTOR, fields=True):
+    """Genera el ``.nav`` de un mapa (por defecto junto al original); devuelve la ruta."""
+    dest = dest or os.path.splitext(source)[0] + EXTENSION
+    write_navigation(load_any(source), dest, sector, fields, map_source_hash(source))
+    return dest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los datos de navegación (.nav) de los enemigos.")
+    parser.add_argument("mapas", nargs="+", help="Mapas de entrada (.txt o .mapb)")
+    parser.add_argument("-o", "--salida", help="Ruta de salida (sólo con un mapa)")
+    parser.add_argument("--sector", type=int, default=DEFAULT_SECTOR,
+                        help=f"Lado del sector en celdas (por defecto {DEFAULT_SECTOR}, máximo {MAX_SECTOR})")
+    parser.add_argument("--sin-campos", action="store_true", help="No generar los campos de distancia")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+
+    for source in args.mapas:
+        try:
+            dest = bake_file(source, args.salida, args.sector, not args.sin_campos)
+            with open(dest, "rb") as f:
+                nav = decode(f.read())
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error: {e}\n")
+        print(f"{source} -> {dest} ({os.path.getsize(dest)} bytes): {len(nav['offsets']) - 2} regiones, "
+              f"{len(nav['targets'])} aristas, campos: {', '.join(nav['fields']) or 'ninguno'}")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,260 @@
+# sección [OPTIMIZAR MALLA] Soldado de vértices y reordenación para la caché de vértices
+"""Optimización de buffers de malla indexados.
+
+Pasos (en este orden):
+
+1. Soldado: los vértices con la misma posición/uv/normal se funden usando un
+   índice hash sobre los bytes de cada vértice.
+2. Un único buffer de índices para toda la malla.
+3. Reordenación de triángulos para la caché post-transformación (algoritmo
+   lineal de Tom Forsyth), dentro de cada grupo de material.
+4. Reordenación de vértices por orden de primer uso, para que las lecturas
+   del buffer de vértices sean lo más secuenciales posible.
+
+El informe compara el número de vértices y el ACMR (fallos de caché por
+triángulo, simulando una FIFO) antes y después.
+
+    python -m herramientas.optimizar_malla assets/3D/modelo.obj [-o salida.obj]
+"""
+import argparse
+from collections import deque
+
+import numpy as np
+
+from herramientas.malla_obj import ObjMesh, load_obj, write_obj
+
+# Tamaño de la caché LRU que modela el algoritmo de Forsyth; las 3 primeras
+# posiciones son las del último triángulo, así que hace falta al menos una más
+CACHE_SIZE = 32
+MIN_CACHE_SIZE = 4
+
+# Tamaño de la FIFO con la que se mide el ACMR
+ACMR_CACHE_SIZE = 16
+
+# Parámetros de puntuación de Forsyth
+CACHE_DECAY_POWER = 1.5
+LAST_TRI_SCORE = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+
+
+# ----- SOLDADO -----
+
+def weld(vertices):
+    """Funde vértices idénticos. Devuelve (vértices únicos, remapeo viejo -> nuevo)."""
+    # +0.0 unifica -0.0 y 0.0, que tienen bytes distintos
+    rows = np.ascontiguousarray(vertices + np.float32(0.0))
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).reshape(-1)
+
+    index = {}
+    first = []
+    remap = np.empty(len(rows), dtype=np.int64)
+    for i, key in enumerate(keys.tolist()):
+        new = index.setdefault(key, len(index))
+        if new == len(first):
+            first.append(i)
+        remap[i] = new
+    return rows[first], remap
+
+
+# ----- CACHÉ DE VÉRTICES -----
+
+def acmr(indices, cache_size=ACMR_CACHE_SIZE):
+    """Fallos de caché por triángulo simulando una FIFO de ``cache_size`` vértices."""
+    if len(indices) == 0:
+        return 0.0
+    cache = deque()
+    cached = set()
+    misses = 0
+    for v in indices.tolist():
+        if v not in cached:
+            misses += 1
+            cache.append(v)
+            cached.add(v)
+            if len(cache) > cache_size:
+                cached.discard(cache.popleft())
+    return misses / (len(indices) // 3)
+
+
+def _score_tables(cache_size, max_valence):
+    if cache_size < MIN_CACHE_SIZE:
+        raise ValueError(f"El tamaño de caché debe ser al menos {MIN_CACHE_SIZE} (es {cache_size})")
+    cache_scores = [LAST_TRI_SCORE] * 3
+    scale = 1.0 / (cache_size - 3)
+    for pos in range(3, cache_size):
+        cache_scores.append((1.0 - (pos - 3) * scale) ** CACHE_DECAY_POWER)
+    valence_scores = [0.0] + [
+        VALENCE_BOOST_SCALE * r ** -VALENCE_BOOST_POWER for r in range(1, max_valence + 1)
+    ]
+    return cache_scores, valence_scores
+
+
+def optimize_vertex_cache(indices, vertex_count, cache_size=CACHE_SIZE):
+    """Reordena los triángulos de ``indices`` para la caché post-transformación."""
+    triangles = indices.reshape(-1, 3).tolist()
+    tri_count = len(triangles)
+    if tri_count == 0:
+        return indices.copy()
+
+    valence = np.bincount(indices, minlength=vertex_count)
+    order = (np.argsort(indices, kind="stable") // 3).tolist()
+    ends = np.cumsum(valence).tolist()
+    vertex_tris = [order[end - count:end] for end, count in zip(ends, valence.tolist())]
+
+    cache_scores, valence_scores = _score_tables(cache_size, int(valence.max()))
+    remaining = valence.tolist()
+    position = [-1] * vertex_count
+
+    def vertex_score(v):
+        r = remaining[v]
+        if r == 0:
+            return -1.0
+        pos = position[v]
+        return (cache_scores[pos] if pos >= 0 else 0.0) + valence_scores[r]
+
+    score = [vertex_score(v) for v in range(vertex_count)]
+    tri_score = [score[a] + score[b] + score[c] for a, b, c in triangles]
+    emitted = [False] * tri_count
+
+    cache = []
+    best = max(range(tri_count), key=tri_score.__getitem__)
+    next_unemitted = 0
+    out = []
+
+    for _ in range(tri_count):
+        if best < 0:
+            # Nada útil en caché: siguiente triángulo pendiente en orden original
+            while emitted[next_unemitted]:
+                next_unemitted += 1
+            best = next_unemitted
+
+        tri = triangles[best]
+        emitted[best] = True
+        out.append(best)
+        for v in tri:
+            vertex_tris[v].remove(best)
+            remaining[v] -= 1
+
+        new_cache = list(tri) + [v for v in cache if v not in tri]
+        evicted = new_cache[cache_size:]
+        cache = new_cache[:cache_size]
+        for v in evicted:
+            position[v] = -1
+            score[v] = vertex_score(v)
+        for i, v in enumerate(cache):
+            position[v] = i
+            score[v] = vertex_score(v)
+
+        best = -1
+        best_score = -1.0
+        for v in cache:
+            for t in vertex_tris[v]:
+                a, b, c = triangles[t]
+                s = score[a] + score[b] + score[c]
+                tri_score[t] = s
+                if s > best_score:
+                    best, best_score = t, s
+
+    return indices.reshape(-1, 3)[out].reshape(-1)
+
+
+def optimize_vertex_fetch(vertices, indices):
+    """Renumera los vértices por orden de primer uso y descarta los no usados."""
+    used, first = np.unique(indices, return_index=True)
+    order = used[np.argsort(first)]
+    remap = np.empty(len(vertices), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return vertices[order], remap[indices]
+
+
+# ----- PIPELINE -----
+
+def optimize_buffers(vertices, indices, groups, cache_size=CACHE_SIZE):
+    """Aplica los cuatro pasos a un buffer intercalado con grupos de material.
+
+    Devuelve (vértices, índices, estadísticas). Los grupos siguen siendo los
+    mismos rangos del buffer de índices porque sólo se reordena dentro de cada
+    uno.
+    """
+    stats = {
+        "trianglesIn": len(indices) // 3,
+        "verticesIn": len(vertices),
+        "acmrIn": acmr(indices),
+    }
+
+    vertices, remap = weld(vertices)
+    indices = remap[indices.astype(np.int64)]
+    stats["verticesWelded"] = len(vertices)
+
+    reordered = np.empty_like(indices)
+    for group in groups:
+        start, end = group["start"], group["start"] + group["count"]
+        reordered[start:end] = optimize_vertex_cache(indices[start:end], len(vertices), cache_size)
+    indices = reordered
+
+    vertices, indices = optimize_vertex_fetch(vertices, indices)
+    index_type = np.uint16 if len(vertices) <= 0xFFFF else np.uint32
+    indices = indices.astype(index_type)
+
+    stats["verticesOut"] = len(vertices)
+    stats["acmrOut"] = acmr(indices)
+    return vertices, indices, stats
+
+
+def format_stats(stats):
+    return (f"{stats['trianglesIn']} triángulos | vértices GPU: "
+            f"{stats['trianglesIn'] * 3} sin índices -> {stats['verticesIn']} (v/vt/vn) -> "
+            f"{stats['verticesOut']} soldados | ACMR: {stats['acmrIn']:.3f} -> {stats['acmrOut']:.3f}")
+
+
+def buffers_to_mesh(vertices, indices, groups, mesh):
+    """ObjMesh equivalente a un buffer intercalado (un índice común para v/vt/vn)."""
+    corners = np.repeat(indices.astype(np.int32)[:, None], 3, axis=1)
+    materials = {name: i for i, name in enumerate(mesh.materials)}
+    face_materials = np.empty(len(indices) // 3, dtype=np.int32)
+    for group in groups:
+        face_materials[group["start"] // 3:(group["start"] + group["count"]) // 3] = \
+            materials[group["material"]]
+    return ObjMesh(
+        positions=vertices[:, 0:3],
+        uvs=vertices[:, 6:8],
+        normals=vertices[:, 3:6],
+        corners=corners,
+        face_materials=face_materials,
+        materials=mesh.materials,
+        mtllibs=mesh.mtllibs,
+    )
+
+
+def main(argv=None):
+    # Import local: exportar_malla también importa este módulo
+    from herramientas.exportar_malla import build_buffers
+
+    parser = argparse.ArgumentParser(
+        description="Suelda vértices y reordena para la caché de vértices; informa del ACMR."
+    )
+    parser.add_argument("obj", nargs="+", help="Ficheros OBJ de entrada")
+    parser.add_argument("-o", "--salida", help="Escribe el OBJ optimizado (sólo con un OBJ)")
+    parser.add_argument("--cache", type=int, default=CACHE_SIZE,
+                        help=f"Tamaño de caché para la reordenación (por defecto {CACHE_SIZE}, mínimo {MIN_CACHE_SIZE})")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.obj) > 1:
+        parser.error("-o sólo se puede usar con un único OBJ")
+    if args.cache < MIN_CACHE_SIZE:
+        parser.error(f"--cache debe ser al menos {MIN_CACHE_SIZE}")
+
+    for obj_path in args.obj:
+        mesh = load_obj(obj_path)
+        vertices, indices, groups = build_buffers(mesh)
+        vertices, indices, stats = optimize_buffers(vertices, indices, groups, args.cache)
+        print(f"{obj_path}: {format_stats(stats)}")
+        if args.salida:
+            write_obj(buffers_to_mesh(vertices, indices, groups, mesh), args.salida,
+                      comment=f"Optimizado desde {obj_path}")
+            print("  ->", args.salida)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,290 @@
+# sección [PERFIL EDITOR] Latencias de las operaciones del editor de mapas
+"""Instrumentación opcional de ``creador_mapas.MapEditor``.
+
+Se activa con la variable de entorno ``PERFIL_EDITOR`` (ruta del informe
+JSON; con ``1`` se usa ``perfil_editor.json``). Sin ella el editor no cambia.
+Con ``PERFIL_EDITOR_CPROFILE=1`` además se ejecuta el editor bajo cProfile y
+se guardan las estadísticas junto al informe (``.prof``, para ``pstats`` o
+snakeviz).
+
+Se mide cada operación del editor (ver ``OPERATIONS``): eventos de pincel,
+cierre de trazos, hacer/deshacer, herramientas, carga, guardado,
+redimensionado y redibujado. Los tiempos son inclusivos: pintar incluye el
+volcado de las celdas que cambia. ``tk`` es lo que tarda Tk en quedar libre
+(dibujar el canvas) tras cada operación de primer nivel. Por operación se
+guarda un histograma con todas las muestras, las últimas ``WINDOW`` para los
+percentiles y el número de celdas que trata. Una etiqueta sobre el canvas
+muestra los percentiles en vivo y al cerrar se escribe el informe.
+
+    PERFIL_EDITOR=perfil.json python creador_mapas.py
+    python -m herramientas.perfil_editor perfil.json     # resumen del informe
+"""
+import argparse
+import bisect
+import collections
+import cProfile
+import functools
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from herramientas.ficheros import replace_file
+
+ENV_VAR = "PERFIL_EDITOR"
+ENV_CPROFILE = "PERFIL_EDITOR_CPROFILE"
+DEFAULT_REPORT = "perfil_editor.json"
+VERSION = 1
+
+# Muestras recientes por operación para los percentiles
+WINDOW = 2000
+
+# Límites superiores (ms) de los cubos del histograma; el último cubo es el resto
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Refresco de la etiqueta en pantalla (ms)
+OVERLAY_INTERVAL = 500
+
+
+def _stroke_cells(editor, args):
+    return len(editor.stroke)
+
+
+def _dirty_cells(editor, args):
+    return len(editor.dirty)
+
+
+def _grid_cells(editor, args):
+    return editor.map.width * editor.map.height
+
+
+def _applied_cells(editor, args):
+    return len(args[0])
+
+
+def _last_entry_cells(editor, forward):
+    """Celdas de la entrada que deshará (forward=False) o rehará (forward=True) el historial."""
+    index = editor.history_index if forward else editor.history_index - 1
+    if not 0 <= index < len(editor.history):
+        return 0
+    entry = editor.history[index]
+    if entry[0] == "celdas":
+        return len(entry[1])
+    snapshot = entry[2] if forward else entry[1]
+    return snapshot.width * snapshot.height
+
+
+# Método de MapEditor -> (operación, celdas tratadas(editor, args) o None, omitir si no trata ninguna)
+OPERATIONS = {
+    "paint_block": ("pintar", None, False),
+    "commit_stroke": ("trazo", _stroke_cells, True),
+    "undo": ("deshacer", lambda editor, args: _last_entry_cells(editor, False), False),
+    "redo": ("rehacer", lambda editor, args: _last_entry_cells(editor, True), False),
+    "apply_cells": ("herramienta", _applied_cells, False),
+    "load_file": ("cargar", None, False),
+    "save_file": ("guardar", _grid_cells, False),
+    "resize_to": ("redimensionar", None, False),
+    "draw_grid": ("redibujar", _grid_cells, False),
+    "flush_dirty": ("volcar", _dirty_cells, True),
+    "update_viewport": ("vista", None, False),
+}
+TK_OPERATION = "tk"
+
+
+class LatencyStats:
+    """Latencias (ms) y celdas de una operación."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = collections.deque(maxlen=WINDOW)
+        self.cells = 0
+        self.max_cells = 0
+
+    def add(self, ms, cells=None):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.histogram[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+        if cells is not None:
+            self.cells += cells
+            self.max_cells = max(self.max_cells, cells)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        if not self.recent:
+            return [0.0] * len(qs)
+        return np.percentile(np.fromiter(self.recent, dtype=np.float64), qs).tolist()
+
+    def to_json(self):
+        p50, p95, p99 = self.percentiles()
+        return {
+            "n": self.count, "total_ms": round(self.total_ms, 3),
+            "media_ms": round(self.total_ms / self.count, 4) if self.count else 0.0,
+            "p50_ms": round(p50, 4), "p95_ms": round(p95, 4), "p99_ms": round(p99, 4),
+            "max_ms": round(self.max_ms, 4),
+            "histograma": {"limites_ms": list(BUCKETS_MS), "cuentas": self.histogram},
+            "celdas": self.cells, "max_celdas": self.max_cells,
+        }
+
+
+class EditorProfiler:
+    """Recoge las latencias de un MapEditor instrumentado con ``instrument``."""
+
+    def __init__(self, report_path=DEFAULT_REPORT, use_cprofile=False):
+        self.report_path = report_path
+        self.stats = collections.defaultdict(LatencyStats)
+        self.depth = 0
+        self.root = None
+        self.idle_start = None
+        self.overlay = None
+        self.profile = cProfile.Profile() if use_cprofile else None
+        self.started = time.perf_counter()
+
+    @classmethod
+    def from_environment(cls, environ=os.environ):
+        """Perfilador según ``PERFIL_EDITOR``; None si no está activado."""
+        path = environ.get(ENV_VAR)
+        if not path or path == "0":
+            return None
+        if path == "1":
+            path = DEFAULT_REPORT
+        return cls(path, environ.get(ENV_CPROFILE, "0") not in ("", "0"))
+
+    def record(self, operation, ms, cells=None):
+        self.stats[operation].add(ms, cells)
+
+    def instrument(self, editor_class):
+        """Subclase de ``editor_class`` con los métodos de OPERATIONS medidos."""
+        profiler = self
+
+        def timed(method, operation, count, skip_empty):
+            @functools.wraps(method)
+            def wrapper(editor, *args, **kwargs):
+                cells = count(editor, args) if count else None
+                if skip_empty and not cells:
+                    return method(editor, *args, **kwargs)
+                profiler.depth += 1
+                start = time.perf_counter()
+                try:
+                    return method(editor, *args, **kwargs)
+                finally:
+                    end = time.perf_counter()
+                    profiler.depth -= 1
+                    profiler.record(operation, (end - start) * 1000, cells)
+                    if profiler.depth == 0:
+                        profiler.wait_for_tk(end)
+            return wrapper
+
+        methods = {
+            name: timed(getattr(editor_class, name), operation, count, skip_empty)
+            for name, (operation, count, skip_empty) in OPERATIONS.items()
+        }
+        return type(f"Perfil{editor_class.__name__}", (editor_class,), methods)
+
+    # ----- TK -----
+
+    def wait_for_tk(self, start):
+        """Mide hasta que Tk procesa lo pendiente (incluido el redibujado del canvas)."""
+        if self.root is None or self.idle_start is not None:
+            return
+        self.idle_start = start
+        self.root.after_idle(self._tk_idle)
+
+    def _tk_idle(self):
+        self.record(TK_OPERATION, (time.perf_counter() - self.idle_start) * 1000)
+        self.idle_start = None
+
+    def attach(self, editor):
+        """Etiqueta en vivo sobre el canvas y medida de Tk; después de crear el editor."""
+        import tkinter as tk
+
+        self.root = editor.root
+        self.overlay = tk.Label(editor.canvas.master, font=("Courier", 8), justify=tk.LEFT,
+                                bg="#000000", fg="#00FF00", anchor="nw")
+        self.overlay.place(relx=1.0, rely=0.0, x=-18, y=2, anchor="ne")
+        self._refresh_overlay(editor)
+
+    def _refresh_overlay(self, editor):
+        lines = [f"{'operación':<13}{'p50':>7}{'p95':>8}{'max':>8}  ms      n"]
+        for operation, stats in sorted(self.stats.items()):
+            p50, p95 = stats.percentiles((50, 95))
+            lines.append(f"{operation:<13}{p50:7.2f}{p95:8.2f}{stats.max_ms:8.1f}{stats.count:9d}")
+        lines.append(f"{editor.map.width}x{editor.map.height}, historial {len(editor.history)} "
+                     f"({editor.history_bytes / 2**20:.1f} MiB), textos {len(getattr(editor, 'text_ids', ()))}")
+        self.overlay.config(text="\n".join(lines))
+        self.root.after(OVERLAY_INTERVAL, self._refresh_overlay, editor)
+
+    # ----- INFORME -----
+
+    def run(self, mainloop):
+        """Ejecuta el bucle del editor (bajo cProfile si se pidió)."""
+        if self.profile is None:
+            return mainloop()
+        return self.profile.runcall(mainloop)
+
+    def report(self, editor):
+        return {
+            "version": VERSION,
+            "segundos": round(time.perf_counter() - self.started, 3),
+            "mapa": {"ancho": editor.map.width, "alto": editor.map.height},
+            "historial": {"entradas": len(editor.history), "bytes": editor.history_bytes},
+            "operaciones": {name: stats.to_json() for name, stats in sorted(self.stats.items())},
+        }
+
+    def finish(self, editor):
+        """Escribe el informe JSON (y las estadísticas de cProfile); devuelve las rutas escritas."""
+        written = [self.report_path]
+        write_report(self.report(editor), self.report_path)
+        if self.profile is not None:
+            prof_path = os.path.splitext(self.report_path)[0] + ".prof"
+            self.profile.dump_stats(prof_path)
+            written.append(prof_path)
+        return written
+
+
+def write_report(report, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def format_report(report):
+    """Líneas de texto con el resumen de un informe."""
+    lines = [f"Mapa {report['mapa']['ancho']}x{report['mapa']['alto']}, {report['segundos']:.0f}s de sesión, "
+             f"historial {report['historial']['entradas']} entradas ({report['historial']['bytes'] / 2**20:.1f} MiB)",
+             f"{'operación':<14}{'n':>7}{'total ms':>11}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'celdas':>10}"]
+    for name, op in report["operaciones"].items():
+        lines.append(f"{name:<14}{op['n']:>7}{op['total_ms']:>11.1f}{op['p50_ms']:>9.2f}{op['p95_ms']:>9.2f}"
+                     f"{op['p99_ms']:>9.2f}{op['max_ms']:>9.1f}{op['celdas']:>10}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume un informe de latencias del editor de mapas.")
+    parser.add_argument("informe", nargs="?", default=DEFAULT_REPORT,
+                        help=f"Informe JSON (por defecto {DEFAULT_REPORT})")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.informe, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        lines = format_report(report)
+    except (OSError, ValueError, KeyError) as e:
+        parser.exit(1, f"Error: {e}\n")
+    print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,377 @@
+# sección [RENDIMIENTO] Benchmarks de las herramientas de assets y mapas
+"""Mide las herramientas de Python con casos fijos y los compara con una base.
+
+Casos (el sufijo es el tamaño):
+
+* ``obj_*``: transformación de un OBJ sintético (escalar + reordenar ejes, lo
+  que hacen reducir.py y rotate.py) con 10k, 100k y 1M vértices.
+* ``lod_*``: simplificación de una malla de rejilla a los LOD por defecto.
+* ``mapa_{leer,escribir}_{txt,mapb}_*``: leer y guardar mapas de 40x30 a
+  2000x2000 generados con herramientas.generar_mapa (semilla fija).
+* ``editor_*``: operaciones del modelo de creador_mapas.py (trazo de pincel,
+  deshacer/rehacer, redimensionar, relleno) sin interfaz: el canvas se
+  sustituye por métodos vacíos.
+
+De cada caso se guarda la mediana y el mínimo de ``repeticiones`` ejecuciones
+y el pico de memoria (tracemalloc, en una ejecución aparte para no falsear
+los tiempos). La preparación (generar ficheros y mapas) no se mide.
+
+Los resultados van a ``rendimiento/ultimo.json`` y se comparan con
+``rendimiento/base.json``: un caso empeora si su tiempo o su memoria pasan
+de la base en más de ``umbral`` (0.25 = 25 %) y la diferencia supera el
+ruido de medida. Con alguna regresión el comando termina con código 1. La
+base depende de la máquina: regenérala con ``--guardar-base`` en la misma
+máquina donde se vaya a comparar.
+
+    python -m herramientas.rendimiento                      # todos los casos
+    python -m herramientas.rendimiento mapa editor --rapido # por prefijo, sin los más grandes
+    python -m herramientas.rendimiento --guardar-base
+"""
+import argparse
+import datetime
+import functools
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from creador_mapas import MapEditor
+from herramientas.ficheros import replace_file
+from herramientas.formato_mapa import read_map, write_map
+from herramientas.generar_mapa import generate
+from herramientas.malla_obj import load_obj
+from herramientas.mapa_binario import read_binary, write_binary
+from herramientas.simplificar_malla import simplify_levels
+from herramientas.transformar_obj import Reorder, Scale, atomic_rewrite, transform_lines
+
+VERSION = 1
+RESULTS_PATH = os.path.join("rendimiento", "ultimo.json")
+BASELINE_PATH = os.path.join("rendimiento", "base.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEATS = 3
+
+# Diferencias menores que esto no cuentan como regresión
+NOISE_SECONDS = 0.005
+NOISE_BYTES = 256 * 1024
+
+# Métricas comparadas: (clave, ruido, unidad, factor de la unidad)
+METRICS = (("segundos", NOISE_SECONDS, "ms", 1000), ("memoria_pico", NOISE_BYTES, "MiB", 2 ** -20))
+
+OBJ_SIZES = (10_000, 100_000, 1_000_000)
+LOD_SIDES = (40, 100)
+MAP_SIZES = ((40, 30), (200, 200), (1000, 1000), (2000, 2000))
+EDITOR_SIZES = ((40, 30), (1000, 1000))
+STROKE_CELLS = 2000
+SEED = 1234
+
+
+# ----- DATOS SINTÉTICOS -----
+
+def write_grid_obj(path, vertices):
+    """OBJ de una rejilla de ~``vertices`` vértices con normales, UV y triángulos."""
+    side = max(2, int(round(vertices ** 0.5)))
+    ys, xs = np.mgrid[0:side, 0:side].astype(np.float64)
+    heights = np.sin(xs * 0.3) * np.cos(ys * 0.2)
+    positions = np.column_stack((xs.ravel(), heights.ravel(), ys.ravel()))
+    normals = np.tile((0.0, 1.0, 0.0), (side * side, 1))
+    uvs = np.column_stack((xs.ravel(), ys.ravel())) / (side - 1)
+
+    index = np.arange(side * side).reshape(side, side) + 1
+    a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+    c, d = index[1:, :-1].ravel(), index[1:, 1:].ravel()
+    triangles = np.concatenate((np.column_stack((a, c, b)), np.column_stack((b, c, d))))
+    with open(path, "w") as f:
+        np.savetxt(f, positions, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, uvs, fmt="vt %.6f %.6f")
+        np.savetxt(f, normals, fmt="vn %.6f %.6f %.6f")
+        np.savetxt(f, np.repeat(triangles, 3, axis=1), fmt="f %d/%d/%d %d/%d/%d %d/%d/%d")
+    return side * side
+
+
+class _Root:
+    """Ventana falsa: el editor sólo le pone título y tamaño."""
+
+    def title(self, *args):
+        pass
+
+    def geometry(self, *args):
+        pass
+
+
+class HeadlessEditor(MapEditor):
+    """MapEditor sin widgets: se mide el modelo (mapa e historial), no el dibujo."""
+
+    def __init__(self, grid):
+        super().__init__(_Root())
+        self.map = grid
+
+    def create_ui(self):
+        pass
+
+    def draw_grid(self):
+        self.dirty.clear()
+
+    def flush_dirty(self):
+        self.dirty.clear()
+
+
+def _stroke_cells(width, height, count, seed=SEED):
+    """Camino aleatorio (como un trazo de ratón) de ``count`` pasos dentro del mapa."""
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(-1, 2, size=(count, 2))
+    path = np.cumsum(steps, axis=0) + (width // 2, height // 2)
+    path[:, 0] = np.clip(path[:, 0], 0, width - 1)
+    path[:, 1] = np.clip(path[:, 1], 0, height - 1)
+    return path.tolist()
+
+
+# ----- CASOS -----
+# Cada caso es (nombre, preparación(carpeta temporal) -> estado, ejecución(estado),
+# unidades procesadas por ejecución o None). La preparación se repite antes de
+# cada ejecución, así que ésta puede modificar el estado.
+
+def _obj_cases(quick):
+    ops = [Scale(0.1), Reorder(("x", "z", "y"))]
+    for size in OBJ_SIZES[:-1] if quick else OBJ_SIZES:
+        def setup(tmp, size=size):
+            path = os.path.join(tmp, f"malla_{size}.obj")
+            if not os.path.exists(path):
+                write_grid_obj(path, size)
+            return path, os.path.join(tmp, "salida.obj")
+
+        def run(state):
+            source, dest = state
+            atomic_rewrite(source, dest, lambda lines: transform_lines(lines, ops))
+
+        yield f"obj_transformar_{size // 1000}k", setup, run, size
+
+
+def _lod_cases(quick):
+    for side in LOD_SIDES[:-1] if quick else LOD_SIDES:
+        def setup(tmp, side=side):
+            path = os.path.join(tmp, f"lod_{side}.obj")
+            if not os.path.exists(path):
+                write_grid_obj(path, side * side)
+            return load_obj(path)
+
+        yield f"lod_{side}x{side}", setup, simplify_levels, 2 * (side - 1) ** 2
+
+
+@functools.lru_cache(maxsize=1)
+def benchmark_map(width, height, mode):
+    """Mapa generado con la semilla fija; compartido por los casos del mismo tamaño (no modificar)."""
+    return generate(width, height, mode, SEED)
+
+
+def _map_cases(quick):
+    for width, height in MAP_SIZES[:-1] if quick else MAP_SIZES:
+        size, cells = f"{width}x{height}", width * height
+
+        def written(tmp, ext, writer, width=width, height=height):
+            path = os.path.join(tmp, f"mapa_{width}x{height}{ext}")
+            if not os.path.exists(path):
+                writer(benchmark_map(width, height, "laberinto"), path)
+            return path
+
+        def output(tmp, ext, width=width, height=height):
+            return benchmark_map(width, height, "laberinto"), os.path.join(tmp, "salida" + ext)
+
+        yield (f"mapa_leer_txt_{size}", lambda tmp, written=written: written(tmp, ".txt", write_map),
+               read_map, cells)
+        yield (f"mapa_escribir_txt_{size}", lambda tmp, output=output: output(tmp, ".txt"),
+               lambda state: write_map(*state), cells)
+        yield (f"mapa_leer_mapb_{size}", lambda tmp, written=written: written(tmp, ".mapb", write_binary),
+               read_binary, cells)
+        yield (f"mapa_escribir_mapb_{size}", lambda tmp, output=output: output(tmp, ".mapb"),
+               lambda state: write_binary(*state), cells)
+
+
+def _editor_cases(quick):
+    for width, height in EDITOR_SIZES:
+        size = f"{width}x{height}"
+        cells = _stroke_cells(width, height, STROKE_CELLS)
+
+        def fresh(tmp, width=width, height=height):
+            return HeadlessEditor(benchmark_map(width, height, "arena").copy())
+
+        def stroke(editor, cells=cells):
+            for x, y in cells:
+                editor.record_change(x, y, "#")
+            editor.commit_stroke()
+            return editor
+
+        def stroked(tmp, fresh=fresh, stroke=stroke):
+            return stroke(fresh(tmp))
+
+        def undo_redo(editor):
+            editor.undo()
+            editor.redo()
+
+        def resize(editor, width=width, height=height):
+            editor.replace_grid(editor.map.resize(width + 100, height + 100))
+            editor.undo()
+
+        def fill(editor, width=width, height=height):
+            editor.apply_block(*editor.map.flood_region(width // 2, height // 2), "B")
+
+        yield f"editor_trazo_{size}", fresh, stroke, STROKE_CELLS
+        yield f"editor_deshacer_{size}", stroked, undo_redo, STROKE_CELLS
+        yield f"editor_redimensionar_{size}", fresh, resize, width * height
+        yield f"editor_relleno_{size}", fresh, fill, width * height
+
+
+def all_cases(quick=False):
+    for group in (_obj_cases, _lod_cases, _map_cases, _editor_cases):
+        yield from group(quick)
+
+
+# ----- MEDIDA -----
+
+def measure(setup, run, tmp, repeats):
+    """(tiempos de cada repetición, pico de memoria en bytes)."""
+    times = []
+    for _ in range(repeats):
+        state = setup(tmp)
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+
+    state = setup(tmp)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return times, peak
+
+
+def run_cases(prefixes=(), quick=False, repeats=DEFAULT_REPEATS, report=print):
+    """Ejecuta los casos cuyo nombre empieza por algún prefijo (todos si no hay)."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="rendimiento_") as tmp:
+        for name, setup, run, units in all_cases(quick):
+            if prefixes and not name.startswith(tuple(prefixes)):
+                continue
+            times, peak = measure(setup, run, tmp, repeats)
+            median = statistics.median(times)
+            result = {"segundos": median, "minimo": min(times), "repeticiones": len(times), "memoria_pico": peak}
+            if units:
+                result["unidades"] = units
+                result["por_segundo"] = units / median if median else None
+            results[name] = result
+            report(f"{name:<32} {median * 1000:10.1f} ms {peak / 2**20:9.1f} MiB")
+    return {
+        "version": VERSION,
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "entorno": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sistema": platform.platform(),
+            "procesador": platform.machine(),
+        },
+        "casos": results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Líneas de comparación y lista de regresiones de ``results`` frente a ``baseline``."""
+    lines, regressions = [], []
+    base_cases = baseline.get("casos", {})
+    for name, now in results["casos"].items():
+        before = base_cases.get(name)
+        if before is None:
+            lines.append(f"{name:<32} (sin base)")
+            continue
+        changes = []
+        for key, noise, unit, scale in METRICS:
+            old, new = before[key], now[key]
+            ratio = new / old - 1 if old else 0.0
+            change = f"{old * scale:.1f} -> {new * scale:.1f} {unit} ({ratio:+.0%})"
+            if new - old > max(threshold * old, noise):
+                regressions.append(f"{name}: {key} {change}")
+                change += " REGRESIÓN"
+            changes.append(change)
+        lines.append(f"{name:<32} " + ", ".join(changes))
+    return lines, regressions
+
+
+def write_json(data, path):
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las herramientas de assets y mapas.")
+    parser.add_argument("casos", nargs="*", help="Prefijos de los casos a ejecutar (por defecto, todos)")
+    parser.add_argument("-r", "--repeticiones", type=int, default=DEFAULT_REPEATS,
+                        help=f"Ejecuciones medidas por caso (por defecto {DEFAULT_REPEATS})")
+    parser.add_argument("--rapido", action="store_true", help="Sin el tamaño más grande de cada grupo")
+    parser.add_argument("-o", "--salida", default=RESULTS_PATH, help=f"Resultados en JSON (por defecto {RESULTS_PATH})")
+    parser.add_argument("--base", default=BASELINE_PATH, help=f"Base con la que comparar (por defecto {BASELINE_PATH})")
+    parser.add_argument("--umbral", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Empeoramiento tolerado, 0.25 = 25 %% (por defecto {DEFAULT_THRESHOLD})")
+    parser.add_argument("--guardar-base", action="store_true", help="Guarda los resultados como nueva base")
+    parser.add_argument("--listar", action="store_true", help="Sólo lista los casos")
+    args = parser.parse_args(argv)
+
+    if args.repeticiones < 1:
+        parser.error("Hace falta al menos una repetición")
+    if args.umbral < 0:
+        parser.error("El umbral no puede ser negativo")
+    if args.listar:
+        for name, _, _, _ in all_cases(args.rapido):
+            if not args.casos or name.startswith(tuple(args.casos)):
+                print(name)
+        return
+
+    results = run_cases(args.casos, args.rapido, args.repeticiones)
+    if not results["casos"]:
+        parser.exit(1, "Error: ningún caso coincide con los prefijos indicados\n")
+    try:
+        write_json(results, args.salida)
+        if args.guardar_base:
+            write_json(results, args.base)
+            print(f"Base guardada en {args.base}")
+            return
+        with open(args.base, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No hay base en {args.base}; crea una con --guardar-base")
+        return
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Error: {e}\n")
+
+    lines, regressions = compare(results, baseline, args.umbral)
+    print(f"\nComparación con {args.base} (umbral {args.umbral:.0%}):")
+    for line in lines:
+        print("    " + line)
+    if regressions:
+        print(f"\n{len(regressions)} regresiones:", file=sys.stderr)
+        for line in regressions:
+            print("    " + line, file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
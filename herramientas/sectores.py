@@ -0,0 +1,254 @@
+# sección [SECTORES] Exportación de mapas por sectores para carga progresiva
+"""Divide un mapa en sectores de tamaño fijo para cargarlo por regiones.
+
+Cada sector de ``S x S`` celdas (los del borde derecho e inferior pueden ser
+más pequeños) se guarda como un ``.mapb`` independiente dentro de
+``mapas/<nombre>.sectores/``. Los sectores vacíos (sólo suelo y el spawn) no
+generan fichero. Junto a ellos se escribe ``manifiesto.json``:
+
+    {
+      "version": 1, "ancho": 2000, "alto": 2000, "tamSector": 32,
+      "columnas": 63, "filas": 63,
+      "fuente": 2403619564,               # huella del mapa (mapa_binario.source_hash)
+      "jugador": {"x": 12, "y": 7, "rotacion": 0},
+      "sectores": [                       # por filas: índice = y * columnas + x
+        {
+          "x": 0, "y": 0, "limites": [0, 0, 32, 32],   # celda inicial, ancho, alto
+          "fichero": "0_0.mapb", "bytes": 812,          # null y 0 si está vacío
+          "conteos": {"muros": 210, "puertas": 3},      # sólo los no nulos
+          "vecinos": [1, 63],                           # sectores adyacentes (4 lados)
+          "portales": [                                 # tramos transitables en el borde común
+            {"sector": 1, "lado": "este", "tramos": [[3, 5], [20, 21]]}
+          ]
+        }
+      ]
+    }
+
+Los tramos de un portal son rangos ``[inicio, fin)`` de celdas globales a lo
+largo del borde (filas en los lados este y oeste, columnas en norte y sur)
+en los que las dos celdas vecinas son transitables (ver analizar_mapa.BLOCKING).
+El juego (src/core/Sectors.js) lee el manifiesto, carga los sectores cercanos
+al jugador y descarga los lejanos.
+
+    python -m herramientas.sectores mapas/mapa1.txt              # -> mapas/mapa1.sectores/
+    python -m herramientas.sectores mapas/grande.mapb --tam 64
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from herramientas.analizar_mapa import BLOCKING, ENEMIES, block_mask, player_spawn
+from herramientas.ficheros import replace_file
+from herramientas.mapa_binario import load_any, map_source_hash, write_binary
+
+VERSION = 1
+EXTENSION = ".sectores"
+MANIFEST = "manifiesto.json"
+SECTOR_SIZE = 32
+
+# Bloques que no crean nada en el juego: un sector sólo con ellos no se guarda
+EMPTY = frozenset((".", " ", "P"))
+
+# Categorías contadas por sector
+COUNTED = (
+    ("muros", ("#",)),
+    ("arbustos", ("B",)),
+    ("ladrillos", ("L",)),
+    ("puertas", ("D",)),
+    ("comida", ("+",)),
+    ("municion", ("MA", "MP")),
+    ("modelos", ("T",)),
+    ("enemigos", tuple(sorted(ENEMIES))),
+)
+
+
+class SectorError(ValueError):
+    pass
+
+
+def sector_layout(grid, size=SECTOR_SIZE):
+    """(columnas, filas) de sectores de un mapa."""
+    if size < 1:
+        raise SectorError("El tamaño de sector debe ser positivo")
+    return max(1, math.ceil(grid.width / size)), max(1, math.ceil(grid.height / size))
+
+
+def sector_counts(grid, size=SECTOR_SIZE):
+    """Recuento por sector y categoría: array (filas, columnas, len(COUNTED))."""
+    columns, rows = sector_layout(grid, size)
+    category = np.full(len(grid.palette), len(COUNTED), dtype=np.int64)
+    for i, (_, blocks) in enumerate(COUNTED):
+        for code, block in enumerate(grid.palette):
+            if block in blocks:
+                category[code] = i
+
+    ys, xs = np.indices(grid.blocks.shape)
+    sectors = (ys // size) * columns + xs // size
+    keys = sectors.ravel() * (len(COUNTED) + 1) + category[grid.blocks.ravel()]
+    counts = np.bincount(keys, minlength=columns * rows * (len(COUNTED) + 1))
+    return counts.reshape(rows, columns, len(COUNTED) + 1)[:, :, :len(COUNTED)]
+
+
+def _spans(mask, offset):
+    """Tramos [inicio, fin) de ``mask`` desplazados a coordenadas globales."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return [[int(a) + offset, int(b) + offset] for a, b in zip(starts, ends)]
+
+
+def portals(grid, size=SECTOR_SIZE):
+    """Portales entre sectores: {(sector, vecino): (lado, tramos)} en las dos direcciones."""
+    columns, rows = sector_layout(grid, size)
+    walkable = ~block_mask(grid, BLOCKING)
+    found = {}
+
+    def add(a, b, side, back, spans):
+        if spans:
+            found[a, b] = (side, spans)
+            found[b, a] = (back, spans)
+
+    # Bordes verticales: columna x - 1 | x
+    for sx in range(1, columns):
+        x = sx * size
+        crossing = walkable[:, x - 1] & walkable[:, x]
+        for sy in range(rows):
+            y0, y1 = sy * size, min((sy + 1) * size, grid.height)
+            a = sy * columns + sx - 1
+            add(a, a + 1, "este", "oeste", _spans(crossing[y0:y1], y0))
+
+    # Bordes horizontales: fila y - 1 / y
+    for sy in range(1, rows):
+        y = sy * size
+        crossing = walkable[y - 1, :] & walkable[y, :]
+        for sx in range(columns):
+            x0, x1 = sx * size, min((sx + 1) * size, grid.width)
+            a = (sy - 1) * columns + sx
+            add(a, a + columns, "sur", "norte", _spans(crossing[x0:x1], x0))
+    return found
+
+
+def _neighbours(sx, sy, columns, rows):
+    candidates = ((sx, sy - 1), (sx - 1, sy), (sx + 1, sy), (sx, sy + 1))
+    return [y * columns + x for x, y in candidates if 0 <= x < columns and 0 <= y < rows]
+
+
+def _empty_codes(grid):
+    return np.array([block in EMPTY for block in grid.palette])
+
+
+def export(grid, directory, size=SECTOR_SIZE, source=None):
+    """Escribe los sectores y el manifiesto en ``directory``; devuelve el manifiesto (dict).
+
+    ``source`` es la huella del mapa de texto de origen, si se conoce.
+    """
+    columns, rows = sector_layout(grid, size)
+    os.makedirs(directory, exist_ok=True)
+    counts = sector_counts(grid, size)
+    connections = portals(grid, size)
+    empty = _empty_codes(grid)
+
+    sectors, written = [], set()
+    for sy in range(rows):
+        for sx in range(columns):
+            x0, y0 = sx * size, sy * size
+            sector = grid.crop(x0, y0, size, size)
+            index = sy * columns + sx
+            entry = {"x": sx, "y": sy, "limites": [x0, y0, sector.width, sector.height],
+                     "fichero": None, "bytes": 0}
+
+            if not (empty[sector.blocks].all() and not sector.rotations.any()):
+                name = f"{sx}_{sy}.mapb"
+                write_binary(sector, os.path.join(directory, name))
+                entry["fichero"] = name
+                entry["bytes"] = os.path.getsize(os.path.join(directory, name))
+                written.add(name)
+
+            entry["conteos"] = {name: int(n) for (name, _), n in zip(COUNTED, counts[sy, sx]) if n}
+            entry["vecinos"] = _neighbours(sx, sy, columns, rows)
+            entry["portales"] = [
+                {"sector": other, "lado": connections[index, other][0], "tramos": connections[index, other][1]}
+                for other in entry["vecinos"] if (index, other) in connections
+            ]
+            sectors.append(entry)
+
+    # Sectores de una exportación anterior que ya no existen o quedaron vacíos
+    for name in os.listdir(directory):
+        if name.endswith(".mapb") and name not in written:
+            os.remove(os.path.join(directory, name))
+
+    spawn, _ = player_spawn(grid)
+    player = None
+    if spawn:
+        x, y = spawn
+        player = {"x": x, "y": y, "rotacion": int(grid.rotations[y, x])}
+    manifest = {
+        "version": VERSION, "ancho": grid.width, "alto": grid.height, "tamSector": size,
+        "columnas": columns, "filas": rows, "fuente": source, "jugador": player, "sectores": sectors,
+    }
+    write_manifest(manifest, os.path.join(directory, MANIFEST))
+    return manifest
+
+
+def write_manifest(manifest, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_file(source, dest=None, size=SECTOR_SIZE):
+    """Exporta un mapa (por defecto a ``<mapa>.sectores/`` junto al original); devuelve el manifiesto."""
+    dest = dest or os.path.splitext(source)[0] + EXTENSION
+    return export(load_any(source), dest, size, map_source_hash(source)), dest
+
+
+def load_sector(directory, manifest, sx, sy):
+    """MapGrid de un sector (None si está vacío), para comprobar exportaciones."""
+    entry = manifest["sectores"][sy * manifest["columnas"] + sx]
+    if entry["fichero"] is None:
+        return None
+    return load_any(os.path.join(directory, entry["fichero"]))
+
+
+def summary(manifest):
+    sectors = manifest["sectores"]
+    stored = [s for s in sectors if s["fichero"]]
+    total = sum(s["bytes"] for s in stored)
+    largest = max((s["bytes"] for s in stored), default=0)
+    portal_count = sum(len(p["tramos"]) for s in sectors for p in s["portales"]) // 2
+    return (f"{manifest['columnas']}x{manifest['filas']} sectores de {manifest['tamSector']}, "
+            f"{len(stored)} con contenido ({total} bytes, máximo {largest}), {portal_count} portales")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Divide un mapa en sectores (.mapb) con un manifiesto para carga progresiva.")
+    parser.add_argument("mapas", nargs="+", help="Mapas de entrada (.txt o .mapb)")
+    parser.add_argument("-o", "--salida", help="Directorio de salida (sólo con un mapa)")
+    parser.add_argument("--tam", type=int, default=SECTOR_SIZE,
+                        help=f"Lado del sector en celdas (por defecto {SECTOR_SIZE})")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+
+    for source in args.mapas:
+        try:
+            manifest, dest = export_file(source, args.salida, args.tam)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error: {e}\n")
+        print(f"{source} -> {dest}: {summary(manifest)}")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
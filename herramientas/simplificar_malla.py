@@ -0,0 +1,330 @@
+# sección [SIMPLIFICAR MALLA] Generación de LODs por colapso de aristas (QEM)
+"""Simplificación de mallas por colapso de aristas con métrica cuádrica de error.
+
+Sigue el método de Garland-Heckbert con colapsos a uno de los extremos
+(``u -> v``), de forma que los triángulos supervivientes siguen apuntando a
+registros ``v``/``vt``/``vn`` existentes y el OBJ resultante conserva el mismo
+``mtllib``, los ``usemtl`` y las coordenadas de textura.
+
+Los bordes abiertos y las costuras de UV se protegen con planos de restricción
+para que las hojas de la palmera no se encojan ni se rompan las texturas.
+
+Todos los niveles se sacan en una sola pasada: la simplificación avanza de
+mayor a menor número de triángulos y se guarda una instantánea al cruzar cada
+objetivo.
+
+    python -m herramientas.simplificar_malla assets/3D/modelo.obj --niveles 0.5 0.2 0.05
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+
+import numpy as np
+
+from herramientas.malla_obj import ObjMesh, load_obj, write_obj
+
+DEFAULT_RATIOS = (0.5, 0.2, 0.05)
+
+# Peso de los planos que protegen bordes abiertos y costuras de UV
+BOUNDARY_WEIGHT = 100.0
+
+
+# ----- CUÁDRICAS -----
+# Una cuádrica simétrica 4x4 se guarda como sus 10 coeficientes únicos:
+# (a², ab, ac, ad, b², bc, bd, c², cd, d²) del plano ax + by + cz + d = 0.
+
+def _plane_quadrics(normals, offsets, weights=None):
+    a, b, c = normals[:, 0], normals[:, 1], normals[:, 2]
+    d = offsets
+    q = np.stack([a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d], axis=1)
+    if weights is not None:
+        q *= weights[:, None]
+    return q
+
+
+def _quadric_error(q, p):
+    x, y, z = p
+    return (q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x
+            + q[4] * y * y + 2 * q[5] * y * z + 2 * q[6] * y
+            + q[7] * z * z + 2 * q[8] * z + q[9])
+
+
+def _constraint_edges(triangles, uv_corners):
+    """Aristas de borde, no manifold o de costura UV como pares (a, b, cara)."""
+    m = len(triangles)
+    a = triangles.reshape(-1)
+    b = triangles[:, [1, 2, 0]].reshape(-1)
+    ta = uv_corners.reshape(-1)
+    tb = uv_corners[:, [1, 2, 0]].reshape(-1)
+    faces = np.repeat(np.arange(m), 3)
+
+    # Forma canónica (menor, mayor) arrastrando las UV con cada extremo
+    swap = a > b
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    ta, tb = np.where(swap, tb, ta), np.where(swap, ta, tb)
+
+    order = np.lexsort((tb, ta, b, a))
+    a, b, ta, tb, faces = a[order], b[order], ta[order], tb[order], faces[order]
+
+    same_edge = (a[1:] == a[:-1]) & (b[1:] == b[:-1])
+    starts = np.flatnonzero(np.concatenate(([True], ~same_edge)))
+    counts = np.diff(np.concatenate((starts, [len(a)])))
+
+    constrained = np.zeros(len(a), dtype=bool)
+    # Bordes (1 cara) y aristas no manifold (>2 caras)
+    for start, count in zip(starts[counts != 2], counts[counts != 2]):
+        constrained[start:start + count] = True
+    # Costuras: dos caras que no comparten las UV de la arista
+    pairs = starts[counts == 2]
+    seam = (ta[pairs] != ta[pairs + 1]) | (tb[pairs] != tb[pairs + 1])
+    constrained[pairs[seam]] = True
+    constrained[pairs[seam] + 1] = True
+
+    return a[constrained], b[constrained], faces[constrained]
+
+
+def _initial_quadrics(positions, triangles, uv_corners):
+    p0, p1, p2 = (positions[triangles[:, k]] for k in range(3))
+    normals = np.cross(p1 - p0, p2 - p0)
+    length = np.linalg.norm(normals, axis=1)
+    valid = length > 0
+    normals[valid] /= length[valid, None]
+    offsets = -np.einsum("ij,ij->i", normals, p0)
+
+    face_quadrics = np.zeros((len(positions), 10))
+    face_q = _plane_quadrics(normals, offsets)
+    for k in range(3):
+        np.add.at(face_quadrics, triangles[:, k], face_q)
+    quadrics = face_quadrics.copy()
+
+    # Planos perpendiculares a la cara que contienen cada arista protegida
+    ea, eb, ef = _constraint_edges(triangles, uv_corners)
+    if len(ea):
+        direction = positions[eb] - positions[ea]
+        side = np.cross(direction, normals[ef])
+        side_len = np.linalg.norm(side, axis=1)
+        ok = side_len > 0
+        side = side[ok] / side_len[ok, None]
+        side_offsets = -np.einsum("ij,ij->i", side, positions[ea[ok]])
+        edge_q = _plane_quadrics(side, side_offsets, np.full(len(side), BOUNDARY_WEIGHT))
+        np.add.at(quadrics, ea[ok], edge_q)
+        np.add.at(quadrics, eb[ok], edge_q)
+
+    return normals, face_quadrics, quadrics
+
+
+# ----- SIMPLIFICADOR -----
+
+def _face_normal(p0, p1, p2):
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    return (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
+
+
+class _Simplifier:
+    def __init__(self, mesh):
+        self.mesh = mesh
+        corners = mesh.corners
+        triangles = corners[:, 0].reshape(-1, 3)
+
+        self.positions = mesh.positions.astype(np.float64).tolist()
+        _, face_quadrics, quadrics = _initial_quadrics(
+            mesh.positions.astype(np.float64), triangles, corners[:, 1].reshape(-1, 3)
+        )
+        # Los colapsos se ordenan con la cuádrica completa; la de las caras
+        # sola da el error geométrico, sin los planos de bordes y costuras
+        self.quadrics = quadrics.tolist()
+        self.face_quadrics = face_quadrics.tolist()
+
+        self.triangles = triangles.tolist()
+        # Atributos (vt, vn) de cada esquina
+        self.attrs = [list(map(tuple, face)) for face in corners[:, 1:].reshape(-1, 3, 2).tolist()]
+        self.face_alive = [True] * len(self.triangles)
+        self.alive = len(self.triangles)
+
+        self.vertex_faces = [set() for _ in self.positions]
+        for f, tri in enumerate(self.triangles):
+            for v in tri:
+                self.vertex_faces[v].add(f)
+        self.stamp = [0] * len(self.positions)
+        self.max_error = 0.0
+        self.max_boundary_error = 0.0
+
+        self.heap = []
+        edges = set()
+        for tri in self.triangles:
+            for k in range(3):
+                a, b = tri[k], tri[(k + 1) % 3]
+                edges.add((a, b) if a < b else (b, a))
+        for a, b in edges:
+            self._push(a, b)
+
+    def _neighbors(self, v):
+        result = set()
+        for f in self.vertex_faces[v]:
+            result.update(self.triangles[f])
+        result.discard(v)
+        return result
+
+    def _push(self, a, b):
+        """Encola el mejor sentido de colapso de la arista (a, b)."""
+        qa, qb = self.quadrics[a], self.quadrics[b]
+        q = [x + y for x, y in zip(qa, qb)]
+        cost_ab = _quadric_error(q, self.positions[b])
+        cost_ba = _quadric_error(q, self.positions[a])
+        if cost_ab <= cost_ba:
+            entry = (cost_ab, a, b, self.stamp[a], self.stamp[b])
+        else:
+            entry = (cost_ba, b, a, self.stamp[b], self.stamp[a])
+        heapq.heappush(self.heap, entry)
+
+    def _flips(self, u, v, faces):
+        """True si mover u a v invierte (o degenera) alguna de ``faces``."""
+        pv = self.positions[v]
+        for f in faces:
+            pts = [self.positions[w] for w in self.triangles[f]]
+            before = _face_normal(*pts)
+            pts = [pv if w == u else p for w, p in zip(self.triangles[f], pts)]
+            after = _face_normal(*pts)
+            dot = before[0] * after[0] + before[1] * after[1] + before[2] * after[2]
+            if dot <= 0:
+                return True
+        return False
+
+    def _collapse(self, u, v):
+        shared = self.vertex_faces[u] & self.vertex_faces[v]
+        moved = self.vertex_faces[u] - shared
+
+        # Atributos de u en las caras que desaparecen -> atributos de v en esas caras
+        remap = {}
+        for f in shared:
+            tri = self.triangles[f]
+            remap[self.attrs[f][tri.index(u)]] = self.attrs[f][tri.index(v)]
+            self.face_alive[f] = False
+            for w in tri:
+                if w != u:
+                    self.vertex_faces[w].discard(f)
+        self.alive -= len(shared)
+
+        for f in moved:
+            k = self.triangles[f].index(u)
+            self.triangles[f][k] = v
+            # Si la esquina no coincide con ninguna de las caras eliminadas
+            # (costura), conserva su propia UV
+            self.attrs[f][k] = remap.get(self.attrs[f][k], self.attrs[f][k])
+            self.vertex_faces[v].add(f)
+
+        self.vertex_faces[u] = set()
+        self.quadrics[v] = [x + y for x, y in zip(self.quadrics[u], self.quadrics[v])]
+        self.face_quadrics[v] = [x + y for x, y in zip(self.face_quadrics[u], self.face_quadrics[v])]
+        self.stamp[u] += 1
+        self.stamp[v] += 1
+        for w in self._neighbors(v):
+            self._push(w, v)
+
+    def run(self, target):
+        """Colapsa aristas hasta que queden ``target`` triángulos o no se pueda más."""
+        while self.alive > target and self.heap:
+            cost, u, v, su, sv = heapq.heappop(self.heap)
+            if su != self.stamp[u] or sv != self.stamp[v]:
+                continue
+            shared = self.vertex_faces[u] & self.vertex_faces[v]
+            if not shared:
+                continue
+            # Condición de enlace: evita crear geometría no manifold
+            if len(self._neighbors(u) & self._neighbors(v)) != len(shared):
+                continue
+            if self._flips(u, v, self.vertex_faces[u] - shared):
+                continue
+            face_q = [x + y for x, y in zip(self.face_quadrics[u], self.face_quadrics[v])]
+            error = _quadric_error(face_q, self.positions[v])
+            self.max_error = max(self.max_error, error)
+            self.max_boundary_error = max(self.max_boundary_error, (cost - error) / BOUNDARY_WEIGHT)
+            self._collapse(u, v)
+
+    def snapshot(self):
+        faces = [f for f, ok in enumerate(self.face_alive) if ok]
+        corners = np.empty((len(faces) * 3, 3), dtype=np.int32)
+        for i, f in enumerate(faces):
+            for k in range(3):
+                vt, vn = self.attrs[f][k]
+                corners[i * 3 + k] = (self.triangles[f][k], vt, vn)
+        return ObjMesh(
+            positions=self.mesh.positions,
+            uvs=self.mesh.uvs,
+            normals=self.mesh.normals,
+            corners=corners,
+            face_materials=self.mesh.face_materials[faces],
+            materials=self.mesh.materials,
+            mtllibs=self.mesh.mtllibs,
+        )
+
+
+def simplify_levels(mesh, ratios=DEFAULT_RATIOS):
+    """Devuelve ``[(ratio, malla, error, error_bordes)]`` para cada proporción de triángulos.
+
+    ``error`` es la raíz de la mayor cuádrica de caras colapsada hasta ese
+    nivel, una cota aproximada de la distancia a la malla original en unidades
+    del modelo. ``error_bordes`` es lo mismo con los planos que protegen bordes
+    y costuras (sin su peso): cuánto se han movido. Juntos en una sola raíz, el
+    peso de esos planos inflaría el error de cualquier malla con costuras.
+    """
+    simplifier = _Simplifier(mesh)
+    total = mesh.triangle_count
+    levels = []
+    for ratio in sorted(ratios, reverse=True):
+        simplifier.run(max(1, int(total * ratio)))
+        levels.append((ratio, simplifier.snapshot(), math.sqrt(max(simplifier.max_error, 0.0)),
+                       math.sqrt(max(simplifier.max_boundary_error, 0.0))))
+    return levels
+
+
+def generate_lods(obj_path, ratios=DEFAULT_RATIOS, out_dir=None):
+    """Genera ``<nombre>_lodN.obj`` para cada proporción y un resumen ``<nombre>.lod.json``."""
+    mesh = load_obj(obj_path)
+    base = os.path.splitext(os.path.basename(obj_path))[0]
+    out_dir = out_dir or os.path.dirname(obj_path)
+
+    low, high = mesh.bounds()
+    diagonal = float(np.linalg.norm(high - low)) or 1.0
+
+    summary = {"source": os.path.basename(obj_path), "triangles": mesh.triangle_count, "levels": []}
+    for n, (ratio, lod, error, boundary_error) in enumerate(simplify_levels(mesh, ratios), start=1):
+        path = os.path.join(out_dir, f"{base}_lod{n}.obj")
+        write_obj(lod, path, comment=f"LOD {n} de {os.path.basename(obj_path)} ({ratio:.0%})")
+        summary["levels"].append({
+            "file": os.path.basename(path),
+            "ratio": ratio,
+            "triangles": lod.triangle_count,
+            "error": error,
+            "relativeError": error / diagonal,
+            "boundaryError": boundary_error,
+        })
+        print(f"LOD {n}: {lod.triangle_count}/{mesh.triangle_count} triángulos, "
+              f"error {error:.4g} ({error / diagonal:.2%} de la diagonal), "
+              f"bordes {boundary_error:.4g} -> {path}")
+
+    summary_path = os.path.join(out_dir, f"{base}.lod.json")
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera LODs de un OBJ por colapso de aristas (QEM).")
+    parser.add_argument("obj", help="Fichero OBJ de entrada")
+    parser.add_argument("--niveles", nargs="+", type=float, default=list(DEFAULT_RATIOS),
+                        help="Proporciones de triángulos de cada LOD (por defecto 0.5 0.2 0.05)")
+    parser.add_argument("-d", "--directorio", help="Carpeta de salida (por defecto, la del OBJ)")
+    args = parser.parse_args(argv)
+
+    if any(not 0 < r <= 1 for r in args.niveles):
+        parser.error("Las proporciones deben estar en (0, 1]")
+    generate_lods(args.obj, args.niveles, args.directorio)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,266 @@
+# sección [TEXTURAS] Redimensionado, mipmaps, atlas y niveles de calidad
+"""Etapa de texturas del pipeline de assets (requiere Pillow).
+
+* ``process_texture``: redimensiona a potencia de dos (con tamaño máximo),
+  genera la cadena de mipmaps precalculada y una variante por nivel de
+  calidad.
+* ``pack_atlas``: empaqueta imágenes de una misma categoría (sprites de
+  enemigos, objetos...) en un atlas y escribe un manifiesto JSON con el
+  rectángulo y las UV de cada imagen (con ``flipY`` de three.js: v = 1 arriba).
+
+Las salidas de cada nivel van a ``<carpeta>/<nivel>/``. Se usan desde
+construir_assets (tipos ``textura`` y ``atlas``) o directamente:
+
+    python -m herramientas.texturas textura assets/textures/kebab.png -d assets/textures/build
+    python -m herramientas.texturas atlas enemigos assets/enemies/*.png -d assets/enemies/build
+"""
+import argparse
+import json
+import os
+
+from PIL import Image
+
+# Nivel de calidad -> factor de escala sobre el tamaño base
+DEFAULT_TIERS = {"alta": 1.0, "media": 0.5, "baja": 0.25}
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_ATLAS_MAX_SIZE = 2048
+DEFAULT_PADDING = 2
+JPEG_QUALITY = 85
+
+
+def power_of_two(n, max_size=None):
+    """Potencia de dos más cercana a ``n`` (en escala logarítmica), acotada por ``max_size``."""
+    low = 1 << max(0, n.bit_length() - 1)
+    pot = low * 2 if n - low > low * 2 - n else low
+    if max_size:
+        pot = min(pot, max_size)
+    return max(1, pot)
+
+
+def resize_power_of_two(img, max_size=DEFAULT_MAX_SIZE):
+    size = (power_of_two(img.width, max_size), power_of_two(img.height, max_size))
+    if size == img.size:
+        return img
+    return img.resize(size, Image.LANCZOS)
+
+
+def mip_chain(img):
+    """Niveles 1..N de mipmaps (el nivel 0 es la propia imagen) hasta 1x1."""
+    levels = []
+    current = img
+    while current.width > 1 or current.height > 1:
+        size = (max(1, current.width // 2), max(1, current.height // 2))
+        current = current.resize(size, Image.BOX)
+        levels.append(current)
+    return levels
+
+
+def _normalize_mode(img):
+    if img.mode in ("RGB", "RGBA"):
+        return img
+    has_alpha = img.mode in ("LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+    return img.convert("RGBA" if has_alpha else "RGB")
+
+
+def _save(img, path, fmt):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "jpg":
+        img.convert("RGB").save(path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    else:
+        img.save(path, "PNG", optimize=True)
+
+
+def _output_format(img, fmt):
+    if fmt:
+        return fmt
+    return "png" if img.mode == "RGBA" else "jpg"
+
+
+def scaled(img, factor):
+    if factor == 1.0:
+        return img
+    size = (max(1, int(img.width * factor)), max(1, int(img.height * factor)))
+    return img.resize(size, Image.LANCZOS)
+
+
+def _write_tiers(img, out_dir, name, fmt, tiers, mips):
+    """Escribe ``img`` en cada nivel (y sus mipmaps); devuelve las rutas."""
+    written = []
+    for tier, factor in tiers.items():
+        tier_img = scaled(img, factor)
+        path = os.path.join(out_dir, tier, f"{name}.{fmt}")
+        _save(tier_img, path, fmt)
+        written.append(path)
+        if mips:
+            for level, mip in enumerate(mip_chain(tier_img), start=1):
+                mip_path = os.path.join(out_dir, tier, f"{name}_mip{level}.{fmt}")
+                _save(mip, mip_path, fmt)
+                written.append(mip_path)
+    return written
+
+
+def texture_outputs(source, out_dir, tiers=DEFAULT_TIERS, fmt=None, mips=True, max_size=DEFAULT_MAX_SIZE):
+    """Rutas que generará ``process_texture`` (sin leer más que la cabecera de la imagen)."""
+    name = os.path.splitext(os.path.basename(source))[0]
+    with Image.open(source) as img:
+        fmt = fmt or ("png" if _normalize_mode(img).mode == "RGBA" else "jpg")
+        base = (power_of_two(img.width, max_size), power_of_two(img.height, max_size))
+    outputs = []
+    for tier, factor in tiers.items():
+        outputs.append(os.path.join(out_dir, tier, f"{name}.{fmt}"))
+        if mips:
+            w, h = max(1, int(base[0] * factor)), max(1, int(base[1] * factor))
+            level = 0
+            while w > 1 or h > 1:
+                w, h = max(1, w // 2), max(1, h // 2)
+                level += 1
+                outputs.append(os.path.join(out_dir, tier, f"{name}_mip{level}.{fmt}"))
+    return outputs
+
+
+def process_texture(source, out_dir, tiers=DEFAULT_TIERS, fmt=None, mips=True, max_size=DEFAULT_MAX_SIZE):
+    """Redimensiona ``source`` a potencia de dos y escribe sus niveles y mipmaps."""
+    name = os.path.splitext(os.path.basename(source))[0]
+    with Image.open(source) as img:
+        img.load()
+        img = _normalize_mode(img)
+        img = resize_power_of_two(img, max_size)
+    fmt = _output_format(img, fmt)
+    written = _write_tiers(img, out_dir, name, fmt, tiers, mips)
+    print(f"{source}: {img.width}x{img.height} -> {len(written)} ficheros en {out_dir}")
+    return written
+
+
+# ----- ATLAS -----
+
+def _shelf_pack(sizes, width, height):
+    """Empaquetado por estantes. Devuelve posiciones (x, y) o None si no cabe."""
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if w > width:
+            return None
+        if x + w > width:
+            y += shelf_height
+            x = shelf_height = 0
+        if y + h > height:
+            return None
+        positions[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions
+
+
+def _atlas_layout(sizes, max_size):
+    """Atlas de potencia de dos más pequeño (por área) en el que caben ``sizes``."""
+    area = sum(w * h for w, h in sizes)
+    candidates = []
+    w = 1
+    while w <= max_size:
+        h = 1
+        while h <= max_size:
+            if w * h >= area:
+                candidates.append((w * h, max(w, h), w, h))
+            h *= 2
+        w *= 2
+    for _, _, w, h in sorted(candidates):
+        positions = _shelf_pack(sizes, w, h)
+        if positions is not None:
+            return w, h, positions
+    raise ValueError(f"Las imágenes no caben en un atlas de {max_size}x{max_size}")
+
+
+def _extrude(atlas, img, x, y, padding):
+    """Pega ``img`` y repite sus bordes en el margen para evitar sangrado con mipmaps."""
+    atlas.paste(img, (x, y))
+    w, h = img.size
+    for k in range(1, padding + 1):
+        atlas.paste(img.crop((0, 0, w, 1)), (x, y - k))
+        atlas.paste(img.crop((0, h - 1, w, h)), (x, y + h - 1 + k))
+        atlas.paste(img.crop((0, 0, 1, h)), (x - k, y))
+        atlas.paste(img.crop((w - 1, 0, w, h)), (x + w - 1 + k, y))
+
+
+def atlas_outputs(name, out_dir, tiers=DEFAULT_TIERS):
+    outputs = [os.path.join(out_dir, tier, f"{name}.png") for tier in tiers]
+    outputs.append(os.path.join(out_dir, f"{name}.json"))
+    return outputs
+
+
+def pack_atlas(name, sources, out_dir, tiers=DEFAULT_TIERS, max_size=DEFAULT_ATLAS_MAX_SIZE,
+               max_image_size=DEFAULT_MAX_SIZE // 2, padding=DEFAULT_PADDING, mips=False):
+    """Empaqueta ``sources`` en ``<out_dir>/<nivel>/<name>.png`` y escribe ``<name>.json``."""
+    images = {}
+    for source in sources:
+        key = os.path.splitext(os.path.basename(source))[0]
+        if key in images:
+            raise ValueError(f"Nombre repetido en el atlas {name}: {key}")
+        with Image.open(source) as img:
+            img = _normalize_mode(img).convert("RGBA")
+        # Se conserva la proporción: sólo se limita el lado mayor (margen incluido,
+        # para que las celdas de max_image_size encajen en potencias de dos)
+        factor = min(1.0, (max_image_size - 2 * padding) / max(img.size))
+        images[key] = scaled(img, factor)
+
+    keys = sorted(images)
+    sizes = [(images[k].width + 2 * padding, images[k].height + 2 * padding) for k in keys]
+    width, height, positions = _atlas_layout(sizes, max_size)
+
+    atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    regions = {}
+    for key, (px, py) in zip(keys, positions):
+        img = images[key]
+        x, y = px + padding, py + padding
+        _extrude(atlas, img, x, y, padding)
+        regions[key] = {
+            "x": x, "y": y, "w": img.width, "h": img.height,
+            "uv": [x / width, 1 - (y + img.height) / height, (x + img.width) / width, 1 - y / height],
+        }
+
+    written = _write_tiers(atlas, out_dir, name, "png", tiers, mips)
+    manifest = {
+        "image": f"{name}.png",
+        "size": [width, height],
+        "tiers": {tier: os.path.join(tier, f"{name}.png").replace(os.sep, "/") for tier in tiers},
+        "regions": regions,
+    }
+    manifest_path = os.path.join(out_dir, f"{name}.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    written.append(manifest_path)
+    print(f"Atlas {name}: {len(keys)} imágenes en {width}x{height} -> {out_dir}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Texturas: potencia de dos, mipmaps, atlas y niveles de calidad.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_tex = sub.add_parser("textura", help="Procesa texturas sueltas")
+    p_tex.add_argument("fuentes", nargs="+")
+    p_tex.add_argument("-d", "--directorio", required=True, help="Carpeta de salida")
+    p_tex.add_argument("--max", type=int, default=DEFAULT_MAX_SIZE, help="Lado máximo")
+    p_tex.add_argument("--formato", choices=("png", "jpg"), help="Por defecto png si hay alfa, si no jpg")
+    p_tex.add_argument("--sin-mips", action="store_true", help="No generar mipmaps")
+
+    p_atlas = sub.add_parser("atlas", help="Empaqueta imágenes en un atlas")
+    p_atlas.add_argument("nombre")
+    p_atlas.add_argument("fuentes", nargs="+")
+    p_atlas.add_argument("-d", "--directorio", required=True, help="Carpeta de salida")
+    p_atlas.add_argument("--max", type=int, default=DEFAULT_ATLAS_MAX_SIZE, help="Lado máximo del atlas")
+    p_atlas.add_argument("--margen", type=int, default=DEFAULT_PADDING, help="Margen entre imágenes")
+
+    args = parser.parse_args(argv)
+    if args.comando == "textura":
+        for source in args.fuentes:
+            process_texture(source, args.directorio, fmt=args.formato, mips=not args.sin_mips, max_size=args.max)
+    else:
+        pack_atlas(args.nombre, args.fuentes, args.directorio, max_size=args.max, padding=args.margen)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
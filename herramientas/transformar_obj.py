@@ -0,0 +1,341 @@
+# sección [TRANSFORMAR OBJ] Transformaciones en streaming sobre ficheros OBJ
+"""Aplica una cadena de transformaciones a los registros ``v``/``vn``/``vt`` de un OBJ.
+
+El fichero se recorre una sola vez por lotes de líneas, así que la memoria usada
+no depende del tamaño del modelo. Requiere NumPy. La salida se escribe en un temporal junto al
+destino y se renombra al terminar, de modo que un fallo a mitad nunca deja el
+OBJ a medio escribir.
+
+Ejemplo (equivale a reducir.py + rotate.py en una sola pasada):
+
+    python -m herramientas.transformar_obj assets/3D/modelo.obj \\
+        --escalar 0.1 --reordenar x z y
+"""
+import argparse
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from herramientas.copias import backup
+from herramientas.ficheros import replace_file
+
+AXES = ("x", "y", "z")
+
+
+# ----- OPERACIONES -----
+# Cada operación se expresa como una matriz afín 4x4 (vectores columna). La
+# cadena se compone en una sola matriz antes de tocar el fichero.
+
+class Reorder:
+    """Permuta los ejes: axis_map indica qué eje de entrada va a (x, y, z)."""
+
+    def __init__(self, axis_map):
+        if sorted(axis_map) != sorted(AXES):
+            raise ValueError(f"axis_map debe ser una permutación de x, y, z: {axis_map}")
+        self.indices = tuple(AXES.index(a) for a in axis_map)
+
+    def matrix(self):
+        m = np.zeros((4, 4))
+        m[3, 3] = 1.0
+        for row, col in enumerate(self.indices):
+            m[row, col] = 1.0
+        return m
+
+
+class Scale:
+    """Escala uniforme o por eje."""
+
+    def __init__(self, sx, sy=None, sz=None):
+        self.factors = (sx, sx if sy is None else sy, sx if sz is None else sz)
+        if 0 in self.factors:
+            raise ValueError("El factor de escala no puede ser 0")
+
+    @property
+    def uniform(self):
+        return self.factors[0] == self.factors[1] == self.factors[2]
+
+    def matrix(self):
+        return np.diag([*self.factors, 1.0])
+
+
+class Translate:
+    """Desplaza las posiciones; las normales no cambian."""
+
+    def __init__(self, dx, dy, dz):
+        self.offset = (dx, dy, dz)
+
+    def matrix(self):
+        m = np.eye(4)
+        m[:3, 3] = self.offset
+        return m
+
+
+class Rotate:
+    """Rota ``degrees`` grados alrededor de uno de los ejes (regla de la mano derecha)."""
+
+    def __init__(self, axis, degrees):
+        if axis not in AXES:
+            raise ValueError(f"Eje de rotación no válido: {axis}")
+        self.axis = AXES.index(axis)
+        self.degrees = degrees
+
+    def matrix(self):
+        rad = math.radians(self.degrees)
+        c, s = math.cos(rad), math.sin(rad)
+        # Los otros dos ejes en orden cíclico: x -> (y, z), y -> (z, x), z -> (x, y)
+        a = (self.axis + 1) % 3
+        b = (self.axis + 2) % 3
+        m = np.eye(4)
+        m[a, a], m[a, b] = c, -s
+        m[b, a], m[b, b] = s, c
+        return m
+
+
+class Matrix:
+    """Matriz 4x4 arbitraria (por filas). Si no es afín se divide por w."""
+
+    def __init__(self, values):
+        m = np.asarray(values, dtype=np.float64).reshape(4, 4)
+        if np.linalg.det(m[:3, :3]) == 0:
+            raise ValueError("La parte 3x3 de la matriz no es invertible")
+        self.m = m
+
+    def matrix(self):
+        return self.m
+
+
+class UVTransform:
+    """Escala y desplaza las coordenadas de textura ``vt`` (u' = u*su + ou)."""
+
+    def __init__(self, su, sv, ou=0.0, ov=0.0):
+        self.m = np.array([[su, 0.0, ou], [0.0, sv, ov], [0.0, 0.0, 1.0]])
+
+    def uv_matrix(self):
+        return self.m
+
+
+def compose(ops):
+    """Devuelve (matriz 4x4 de vértices, matriz 3x3 de UV) de la cadena ``ops``."""
+    m = np.eye(4)
+    uv = np.eye(3)
+    for op in ops:
+        if isinstance(op, UVTransform):
+            uv = op.uv_matrix() @ uv
+        else:
+            m = op.matrix() @ m
+    return m, uv
+
+
+# ----- MOTOR EN STREAMING -----
+# Las líneas se leen en lotes: dentro de cada lote los registros v/vn/vt se
+# convierten a arrays float32 contiguos y se transforman con una sola operación
+# matricial, así que la memoria sigue acotada por el tamaño del lote.
+
+BATCH_LINES = 1 << 16
+
+
+def _read_records(lines, tag, size):
+    """Devuelve (índices, array float32 (n, size), sobrantes por línea o None)."""
+    prefix = tag + " "
+    positions = [i for i, line in enumerate(lines) if line.startswith(prefix)]
+    if not positions:
+        return positions, None, None
+
+    tokens = " ".join([lines[i][len(prefix):] for i in positions]).split()
+    if len(tokens) == size * len(positions):
+        # Caso habitual: exactamente ``size`` componentes por línea
+        return positions, np.array(tokens, dtype=np.float32).reshape(-1, size), None
+
+    coords = []
+    extras = []
+    for i in positions:
+        parts = lines[i].split()
+        coords.extend(parts[1:1 + size])
+        # Se conservan componentes extra (w o colores de vértice)
+        extras.append(" " + " ".join(parts[1 + size:]) if len(parts) > 1 + size else "")
+    return positions, np.array(coords, dtype=np.float32).reshape(-1, size), extras
+
+
+def _write_records(out, tag, positions, values, extras):
+    size = values.shape[1]
+    fmt = tag + " %.7g" * size
+    if extras is None:
+        text = ((fmt + "\n") * len(positions)) % tuple(values.ravel().tolist())
+        for i, line in zip(positions, text.splitlines(keepends=True)):
+            out[i] = line
+    else:
+        for i, row, extra in zip(positions, values.tolist(), extras):
+            out[i] = fmt % tuple(row) + extra + "\n"
+
+
+def _transform_batch(lines, point_m, normal_m, uv_m, projective):
+    out = list(lines)
+
+    positions, pts, extras = _read_records(lines, "v", 3)
+    if positions:
+        res = pts @ point_m[:3, :3].T + point_m[:3, 3]
+        if projective:
+            w = pts @ point_m[3, :3] + point_m[3, 3]
+            res /= w[:, None]
+        _write_records(out, "v", positions, res, extras)
+
+    positions, normals, extras = _read_records(lines, "vn", 3)
+    if positions:
+        res = normals @ normal_m.T
+        length = np.linalg.norm(res, axis=1, keepdims=True)
+        np.divide(res, length, out=res, where=length > 0)
+        _write_records(out, "vn", positions, res, extras)
+
+    if uv_m is not None:
+        positions, uvs, extras = _read_records(lines, "vt", 2)
+        if positions:
+            res = uvs @ uv_m[:2, :2].T + uv_m[:2, 2]
+            _write_records(out, "vt", positions, res, extras)
+
+    return out
+
+
+def transform_lines(lines, ops, batch_lines=BATCH_LINES):
+    """Generador: devuelve cada línea del OBJ con la cadena ``ops`` aplicada."""
+    m, uv = compose(ops)
+    point_m = m.astype(np.float32)
+    # Las normales usan la inversa traspuesta de la parte lineal y se renormalizan
+    normal_m = np.linalg.inv(m[:3, :3]).T.astype(np.float32)
+    uv_m = None if np.array_equal(uv, np.eye(3)) else uv.astype(np.float32)
+    projective = not np.array_equal(m[3], [0.0, 0.0, 0.0, 1.0])
+
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_lines:
+            yield from _transform_batch(batch, point_m, normal_m, uv_m, projective)
+            batch = []
+    if batch:
+        yield from _transform_batch(batch, point_m, normal_m, uv_m, projective)
+
+
+def scale_mtl_lines(lines, scale_factor):
+    """Generador: escala el multiplicador ``-bm`` de los mapas de relieve."""
+    for line in lines:
+        if line.startswith(("bump", "map_Bump", "norm")) and "-bm" in line:
+            parts = line.split()
+            idx = parts.index("-bm") + 1
+            try:
+                parts[idx] = str(float(parts[idx]) * scale_factor)
+            except (IndexError, ValueError):
+                pass
+            yield " ".join(parts) + "\n"
+        else:
+            yield line
+
+
+def atomic_rewrite(path_in, path_out, transform):
+    """Escribe ``transform(líneas de path_in)`` en path_out de forma atómica."""
+    out_dir = os.path.dirname(os.path.abspath(path_out))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(path_out) + ".", suffix=".tmp", dir=out_dir
+    )
+    try:
+        with open(path_in, "r") as src, os.fdopen(fd, "w") as dst:
+            dst.writelines(transform(src))
+        replace_file(tmp_path, path_out)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def transform_obj(obj_in, ops, obj_out=None, mtl_in=None, make_backup=True, mtl_out=None):
+    """Aplica ``ops`` a un OBJ (y el escalado de relieve a su MTL) en una pasada."""
+    obj_out = obj_out or obj_in
+    mtl_out = mtl_out or mtl_in
+
+    if make_backup:
+        print("Copia OBJ guardada:", backup(obj_in)[:12])
+        if mtl_in and os.path.exists(mtl_in):
+            print("Copia MTL guardada:", backup(mtl_in)[:12])
+
+    atomic_rewrite(obj_in, obj_out, lambda lines: transform_lines(lines, ops))
+    print("OBJ transformado guardado en:", obj_out)
+
+    # El MTL sólo depende de la escala total (producto de escalas uniformes)
+    bump_scale = 1.0
+    for op in ops:
+        if isinstance(op, Scale) and op.uniform:
+            bump_scale *= op.factors[0]
+    if mtl_in and os.path.exists(mtl_in) and (bump_scale != 1.0 or mtl_out != mtl_in):
+        atomic_rewrite(mtl_in, mtl_out, lambda lines: scale_mtl_lines(lines, bump_scale))
+        print("MTL actualizado:", mtl_out)
+
+
+# ----- LÍNEA DE COMANDOS -----
+
+class _AppendOp(argparse.Action):
+    """Guarda las operaciones en el orden en que aparecen en la línea de comandos."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        ops = getattr(namespace, self.dest, None) or []
+        ops.append((self.const, values))
+        setattr(namespace, self.dest, ops)
+
+
+def build_op(name, values):
+    if name == "reordenar":
+        return Reorder(tuple(values))
+    if name == "escalar":
+        if len(values) not in (1, 3):
+            raise ValueError("--escalar necesita 1 o 3 valores")
+        return Scale(*(float(v) for v in values))
+    if name == "trasladar":
+        return Translate(*(float(v) for v in values))
+    if name == "rotar":
+        return Rotate(values[0], float(values[1]))
+    if name == "matriz":
+        return Matrix([float(v) for v in values])
+    if name == "uv":
+        return UVTransform(*(float(v) for v in values))
+    raise ValueError(name)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Transforma un OBJ en una sola pasada (las operaciones se aplican en orden)."
+    )
+    parser.add_argument("obj", help="Fichero OBJ de entrada")
+    parser.add_argument("-o", "--salida", help="OBJ de salida (por defecto, sobrescribe la entrada)")
+    parser.add_argument("--mtl", help="MTL asociado (se escala su -bm con las escalas uniformes)")
+    parser.add_argument("--sin-copia", action="store_true", help="No crear copia de seguridad")
+    parser.add_argument("--reordenar", nargs=3, choices=AXES, action=_AppendOp,
+                        const="reordenar", dest="ops", metavar="EJE", help="Reordena ejes, p. ej. x z y")
+    parser.add_argument("--escalar", nargs="+", action=_AppendOp,
+                        const="escalar", dest="ops", metavar="FACTOR", help="Escala uniforme o por eje (sx sy sz)")
+    parser.add_argument("--trasladar", nargs=3, action=_AppendOp,
+                        const="trasladar", dest="ops", metavar="D", help="Desplaza las posiciones")
+    parser.add_argument("--rotar", nargs=2, action=_AppendOp,
+                        const="rotar", dest="ops", metavar=("EJE", "GRADOS"), help="Rota alrededor de un eje, p. ej. y 90")
+    parser.add_argument("--matriz", nargs=16, action=_AppendOp,
+                        const="matriz", dest="ops", metavar="M", help="Matriz 4x4 por filas")
+    parser.add_argument("--uv", nargs=4, action=_AppendOp,
+                        const="uv", dest="ops", metavar=("SU", "SV", "OU", "OV"),
+                        help="Escala y desplaza las coordenadas vt")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.ops:
+        parser.error("Indica al menos una operación")
+    try:
+        ops = [build_op(name, values) for name, values in args.ops]
+    except ValueError as e:
+        parser.error(str(e))
+    transform_obj(args.obj, ops, obj_out=args.salida, mtl_in=args.mtl,
+                  make_backup=not args.sin_copia)
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
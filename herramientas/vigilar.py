@@ -0,0 +1,369 @@
+# sección [VIGILAR] Reconstrucción incremental de assets al guardar
+"""Vigila las fuentes de ``assets/assets.json`` y reconstruye lo que cambia.
+
+Al arrancar construye lo pendiente (como ``construir_assets``) y después
+espera cambios en los directorios de las fuentes (``mapas/``, ``assets/3D``,
+texturas...) y en el propio manifiesto. Usa inotify en Linux y, si no está
+disponible, compara tamaño y fecha de los ficheros cada ``--intervalo``
+segundos.
+
+Los cambios seguidos (un editor que guarda varias veces, una copia de
+varios ficheros) se agrupan hasta que pasan ``--espera`` segundos sin
+ninguno. Cada fuente cambiada se busca en el grafo fuente -> assets, que
+también sigue las salidas de un asset que son entrada de otro, y sólo se
+construyen esos assets, por capas. La decisión final la toma la caché de
+``construir_assets``: si el contenido (hash) y los ajustes no cambian, el
+asset no se vuelve a construir. Los procesos del pool se mantienen vivos
+entre reconstrucciones.
+
+Los tipos lentos (``SLOW_TYPES``: la visibilidad tarda segundos en un mapa
+mediano y casi un minuto en uno de 200x200) no retrasan al resto: primero se
+construyen los assets que no dependen de ellos y después, en segundo plano y
+en orden, los lentos y lo que dependa de ellos. Mientras tanto se siguen
+atendiendo cambios.
+
+    python -m herramientas.vigilar                          # todo el manifiesto
+    python -m herramientas.vigilar --excluir visibilidad    # sin los pasos lentos
+    python -m herramientas.vigilar --esperar-lentos         # los lentos también en primer plano
+"""
+import argparse
+import concurrent.futures
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import threading
+import time
+
+from herramientas.construir_assets import BUILDERS, CACHE_PATH, MANIFEST_PATH, build, load_manifest
+
+DEBOUNCE = 0.1
+POLL_INTERVAL = 0.25
+
+# Tipos que se construyen en segundo plano, después de los demás
+SLOW_TYPES = frozenset(("visibilidad",))
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+EVENT = struct.Struct("iIII")
+
+
+def _normalize(path):
+    return os.path.normpath(os.path.abspath(path))
+
+
+# ----- GRAFO DE DEPENDENCIAS -----
+
+def dependency_graph(assets):
+    """(entradas, salidas): conjuntos de rutas normalizadas por nombre de asset."""
+    inputs, outputs = {}, {}
+    for asset in assets:
+        _, asset_inputs, asset_outputs = BUILDERS[asset["tipo"]]
+        inputs[asset["nombre"]] = {_normalize(p) for p in asset_inputs(asset)}
+        outputs[asset["nombre"]] = {_normalize(p) for p in asset_outputs(asset)}
+    return inputs, outputs
+
+
+def rebuild_plan(assets, changed, excluded=()):
+    """Assets afectados por las rutas ``changed``, por capas: cada capa sólo depende de las anteriores."""
+    inputs, outputs = dependency_graph(assets)
+    kinds = {asset["nombre"]: asset["tipo"] for asset in assets}
+    dirty = {_normalize(p) for p in changed}
+    done = set()
+    layers = []
+    while dirty:
+        layer = [name for name in inputs
+                 if name not in done and kinds[name] not in excluded and inputs[name] & dirty]
+        if not layer:
+            break
+        layers.append(layer)
+        done.update(layer)
+        dirty = set().union(*(outputs[name] for name in layer))
+    return layers
+
+
+def watched_directories(assets, manifest_path):
+    """Directorios con alguna fuente, más el del manifiesto."""
+    inputs, _ = dependency_graph(assets)
+    directories = {os.path.dirname(path) for paths in inputs.values() for path in paths}
+    directories.add(os.path.dirname(_normalize(manifest_path)))
+    return sorted(d for d in directories if os.path.isdir(d))
+
+
+# ----- VIGILANTES -----
+
+class InotifyWatcher:
+    """Cambios en directorios con inotify (Linux)."""
+
+    name = "inotify"
+
+    def __init__(self, directories):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.directories = {}
+        self.overflow = False
+        self.watch(directories)
+
+    def watch(self, directories):
+        for directory in directories:
+            if directory in self.directories.values():
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {directory}")
+            self.directories[wd] = directory
+
+    def poll(self, timeout):
+        """Rutas cambiadas en los próximos ``timeout`` segundos (None: espera al primer cambio)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 1 << 16)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, size = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + size].rstrip(b"\0")
+            offset += size
+            if mask & IN_Q_OVERFLOW:
+                self.overflow = True
+            elif wd in self.directories and name:
+                changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Cambios en directorios comparando tamaño y fecha de sus ficheros."""
+
+    name = "sondeo"
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.directories = []
+        self.overflow = False
+        self.snapshot = {}
+        self.watch(directories)
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    pass
+        return snapshot
+
+    def watch(self, directories):
+        self.directories = sorted(set(self.directories) | set(directories))
+        self.snapshot = self._scan()
+
+    def poll(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic()))
+            time.sleep(wait)
+            snapshot = self._scan()
+            changed = {path for path, stat in snapshot.items() if self.snapshot.get(path) != stat}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(directories, polling=False, interval=POLL_INTERVAL):
+    """inotify si se puede; si no (u obligado con ``polling``), sondeo."""
+    if not polling:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(directories, interval)
+
+
+def wait_for_changes(watcher, debounce=DEBOUNCE):
+    """Espera un cambio y agrupa los que llegan hasta ``debounce`` segundos sin ninguno."""
+    changed = watcher.poll(None)
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+# ----- BUCLE -----
+
+def rebuild(manifest_path, cache_path, names, executor):
+    start = time.perf_counter()
+    failures = build(manifest_path, cache_path, names=names, executor=executor)
+    return failures, time.perf_counter() - start
+
+
+def split_plan(layers, fast_layers):
+    """Capas de ``layers`` sin los assets que ya están en ``fast_layers`` (las que quedan para después)."""
+    done = set().union(*fast_layers)
+    remaining = ([name for name in layer if name not in done] for layer in layers)
+    return [layer for layer in remaining if layer]
+
+
+class BackgroundBuilds:
+    """Construcciones en un hilo aparte, de una en una y en el orden en que se piden."""
+
+    def __init__(self, manifest_path, cache_path, executor):
+        self.manifest_path = manifest_path
+        self.cache_path = cache_path
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.queue = []
+        self.thread = None
+        self.stopped = False
+
+    def submit(self, layers):
+        print("En segundo plano: " + ", ".join(name for layer in layers for name in layer))
+        with self.lock:
+            self.queue.append(layers)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.queue or self.stopped:
+                    self.thread = None
+                    return
+                layers = self.queue.pop(0)
+            total = 0.0
+            try:
+                for layer in layers:
+                    _, elapsed = rebuild(self.manifest_path, self.cache_path, layer, self.executor)
+                    total += elapsed
+            except concurrent.futures.CancelledError:
+                continue
+            except (OSError, ValueError, KeyError, RuntimeError) as e:
+                if not self.stopped:
+                    print(f"Error en segundo plano: {e}")
+                continue
+            print(f"Segundo plano listo en {total:.2f}s")
+
+    def stop(self):
+        """Descarta lo pendiente; devuelve True si hay una construcción en curso."""
+        with self.lock:
+            self.stopped = True
+            self.queue.clear()
+            return self.thread is not None
+
+
+def watch(manifest_path=MANIFEST_PATH, cache_path=CACHE_PATH, jobs=None, debounce=DEBOUNCE,
+          polling=False, interval=POLL_INTERVAL, excluded=(), deferred=SLOW_TYPES):
+    """Construye lo pendiente y reconstruye al cambiar las fuentes, hasta Ctrl+C.
+
+    Los tipos de ``deferred`` y lo que depende de ellos se construyen en
+    segundo plano, después del resto.
+    """
+    manifest = _normalize(manifest_path)
+    excluded = set(excluded)
+    skipped = excluded | set(deferred)
+
+    def included(assets, skip=excluded):
+        return [asset["nombre"] for asset in assets if asset["tipo"] not in skip]
+
+    assets = load_manifest(manifest_path)
+    # Ctrl+C sólo para el proceso principal, que cierra el pool
+    pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=signal.signal,
+                                                  initargs=(signal.SIGINT, signal.SIG_IGN))
+    with pool as executor:
+        background = BackgroundBuilds(manifest_path, cache_path, executor)
+
+        def run(layers, fast_layers):
+            """Construye ``fast_layers`` y deja el resto de ``layers`` en segundo plano; devuelve los segundos."""
+            total = 0.0
+            for layer in fast_layers:
+                if layer:
+                    total += rebuild(manifest_path, cache_path, layer, executor)[1]
+            slow_layers = split_plan(layers, fast_layers)
+            if slow_layers:
+                background.submit(slow_layers)
+            return total
+
+        run([included(assets)], [included(assets, skipped)])
+        watcher = make_watcher(watched_directories(assets, manifest_path), polling, interval)
+        print(f"Vigilando {len(watcher.directories)} directorios con {watcher.name} (Ctrl+C para salir)")
+        try:
+            while True:
+                changed = {_normalize(p) for p in wait_for_changes(watcher, debounce)}
+                if manifest in changed or watcher.overflow:
+                    # Manifiesto editado o eventos perdidos: la caché decide qué reconstruir
+                    watcher.overflow = False
+                    try:
+                        assets = load_manifest(manifest_path)
+                    except (OSError, ValueError) as e:
+                        print(f"Error en el manifiesto: {e}")
+                        continue
+                    watcher.watch(watched_directories(assets, manifest_path))
+                    layers = [included(assets)]
+                    fast_layers = [included(assets, skipped)]
+                else:
+                    layers = rebuild_plan(assets, changed, excluded)
+                    fast_layers = rebuild_plan(assets, changed, skipped)
+                if not any(layers):
+                    continue
+
+                names = ", ".join(os.path.relpath(p) for p in sorted(changed))
+                print(f"\nCambios: {names}")
+                print(f"Listo en {run(layers, fast_layers):.2f}s")
+        except KeyboardInterrupt:
+            print()
+            if background.stop():
+                print("Esperando a que termine la construcción en segundo plano...")
+            executor.shutdown(wait=False, cancel_futures=True)
+        finally:
+            watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vigila las fuentes del manifiesto y reconstruye los assets que cambian.")
+    parser.add_argument("-m", "--manifiesto", default=MANIFEST_PATH, help=f"Manifiesto (por defecto {MANIFEST_PATH})")
+    parser.add_argument("-j", "--procesos", type=int, help="Procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--espera", type=float, default=DEBOUNCE,
+                        help=f"Segundos sin cambios antes de reconstruir (por defecto {DEBOUNCE})")
+    parser.add_argument("--sondeo", action="store_true", help="Comparar ficheros periódicamente en vez de usar inotify")
+    parser.add_argument("--intervalo", type=float, default=POLL_INTERVAL,
+                        help=f"Segundos entre comparaciones con --sondeo (por defecto {POLL_INTERVAL})")
+    parser.add_argument("--excluir", action="append", default=[], choices=sorted(BUILDERS), metavar="TIPO",
+                        help="Tipo de asset que no se reconstruye (repetible), p. ej. visibilidad")
+    parser.add_argument("--esperar-lentos", action="store_true",
+                        help=f"Construir también en primer plano los tipos lentos ({', '.join(sorted(SLOW_TYPES))})")
+    args = parser.parse_args(argv)
+
+    try:
+        watch(args.manifiesto, jobs=args.procesos, debounce=args.espera, polling=args.sondeo,
+              interval=args.intervalo, excluded=set(args.excluir),
+              deferred=() if args.esperar_lentos else SLOW_TYPES)
+    except (OSError, ValueError, KeyError) as e:
+        parser.exit(2, f"Error en el manifiesto: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -0,0 +1,357 @@
+# sección [VISIBILIDAD] Conjuntos potencialmente visibles (PVS) por celda
+"""Conjuntos potencialmente visibles (``.pvs``) de un mapa.
+
+Todas las mallas de muros, árboles y objetos se quedan en la escena y sólo el
+frustum culling limita lo que se dibuja. Este bake calcula, para cada celda
+transitable, qué celdas del mapa se pueden ver desde ella, y World oculta lo
+que queda fuera del conjunto de la celda del jugador.
+
+Desde 3x3 puntos de cada celda se lanzan ``RAYS`` rayos en abanico que avanzan
+por la rejilla hasta el primer muro (que sí es visible) o hasta la distancia
+de la niebla; todos los rayos de un lote de celdas se recorren a la vez con
+NumPy. Sólo los muros (``#``) tapan la vista: arbustos y ladrillos son más
+bajos que un muro y se ve por encima. El conjunto se amplía ``margen`` celdas
+para cubrir copas de árboles y sprites que sobresalen de su celda.
+
+Con ``grupo`` > 1 las celdas se agrupan en bloques de grupo x grupo, tanto
+como origen (unión de sus celdas) como como destino; el fichero es más
+pequeño y el cálculo igual de conservador.
+
+Todo en little-endian:
+
+    cabecera      "PVSB", versión u16, grupo u16, ancho y alto del mapa u32,
+                  columnas y filas de grupos u32, distancia máxima f32 (en
+                  celdas), tamaño de los datos u32, flags u16, relleno u16,
+                  huella del mapa u32 (si flags & SOURCE_HASH)
+    índice        (columnas x filas + 1) x u32: inicio de los datos de cada
+                  grupo; un grupo sin datos (sólo muros) lo ve todo
+    datos         por grupo, longitudes de tramos alternos de grupos no
+                  visibles y visibles (empezando por no visibles) como varint
+                  LEB128, en orden de lectura
+
+Un ``.pvs`` de antes de editar el mapa ocultaría lo que ahora se ve (un muro
+quitado deja ver celdas que el bake daba por tapadas), así que el juego lo
+ignora si la huella (ver mapa_binario.source_hash) no es la del mapa cargado.
+
+    python -m herramientas.visibilidad mapas/mapa1.txt   # -> mapas/mapa1.pvs
+"""
+import argparse
+import math
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from herramientas.analizar_mapa import block_mask
+from herramientas.ficheros import replace_file
+from herramientas.mapa_binario import load_any, map_source_hash
+
+MAGIC = b"PVSB"
+VERSION = 2
+EXTENSION = ".pvs"
+
+HEADER = struct.Struct("<4sHHIIIIfIHxxI")
+
+# flags
+SOURCE_HASH = 1
+
+OCCLUDERS = frozenset(("#",))
+# Distancia final de la niebla de World.js (350) en bloques de 10
+MAX_DISTANCE = 35.0
+RAYS = 256
+STEP = 1 / 3
+SAMPLES = (0.15, 0.5, 0.85)
+MARGIN = 1
+# Elementos (celdas x pasos de rayo) por lote
+BATCH = 1 << 23
+
+
+class VisibilityError(ValueError):
+    pass
+
+
+def ray_offsets(max_distance=MAX_DISTANCE, rays=RAYS, step=STEP):
+    """Celdas (dx, dy) que recorre cada rayo desde la celda de origen, (rayos, pasos).
+
+    Los pasos repetidos de un rayo se quitan y el rayo se rellena con su última celda.
+    """
+    angles = (np.arange(rays) + 0.5) * (2 * math.pi / rays)
+    distances = np.arange(0.0, max_distance + step, step)
+    origins = np.array([(x, y) for y in SAMPLES for x in SAMPLES])
+    px = origins[:, 0, None, None] + np.cos(angles)[None, :, None] * distances
+    py = origins[:, 1, None, None] + np.sin(angles)[None, :, None] * distances
+    dx = np.floor(px).astype(np.int64).reshape(-1, len(distances))
+    dy = np.floor(py).astype(np.int64).reshape(-1, len(distances))
+
+    # Un rayo pasa varios pasos por la misma celda: nos quedamos con la primera vez
+    new = np.ones(dx.shape, dtype=bool)
+    new[:, 1:] = (dx[:, 1:] != dx[:, :-1]) | (dy[:, 1:] != dy[:, :-1])
+    lengths = new.sum(axis=1)
+    rows, cols = np.nonzero(new)
+    slots = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    out_x = np.repeat(dx[:, -1:], lengths.max(), axis=1)
+    out_y = np.repeat(dy[:, -1:], lengths.max(), axis=1)
+    out_x[rows, slots] = dx[rows, cols]
+    out_y[rows, slots] = dy[rows, cols]
+    return out_x, out_y
+
+
+def visible_groups(grid, group=1, max_distance=MAX_DISTANCE, margin=MARGIN, rays=RAYS):
+    """Recorre los conjuntos visibles: genera (grupos de origen, ventana, matriz booleana de destinos).
+
+    Un lote sólo ve hasta ``max_distance`` celdas de sus orígenes, así que su
+    matriz cubre únicamente esa ventana del mapa: (lote, filas, columnas) a
+    partir del grupo (fila, columna) de ``ventana``. Con la matriz del mapa
+    entero el coste de cada lote crecería con el área del mapa.
+
+    Los rayos avanzan paso a paso y se dejan de seguir en cuanto chocan con un
+    muro o salen del mapa (una recta que sale del rectángulo no vuelve a entrar).
+    """
+    walls = block_mask(grid, OCCLUDERS)
+    columns = math.ceil(grid.width / group)
+    rows = math.ceil(grid.height / group)
+    dx, dy = ray_offsets(max_distance, rays)
+
+    # Rejilla con un borde que para los rayos que salen del mapa
+    pad = int(math.ceil(max_distance)) + 2
+    stops = np.ones((grid.height + 2 * pad, grid.width + 2 * pad), dtype=bool)
+    stops[pad:-pad, pad:-pad] = walls
+    group_rows = np.full(stops.shape, -1, dtype=np.int32)
+    group_columns = np.full(stops.shape, -1, dtype=np.int32)
+    group_rows[pad:-pad, pad:-pad] = np.arange(grid.height, dtype=np.int32)[:, None] // group
+    group_columns[pad:-pad, pad:-pad] = np.arange(grid.width, dtype=np.int32)[None, :] // group
+    # Pasos útiles de cada rayo (el resto repite su última celda)
+    lengths = 1 + ((np.diff(dx, axis=1) != 0) | (np.diff(dy, axis=1) != 0)).sum(axis=1)
+
+    cell_ys, cell_xs = np.nonzero(~walls)
+    sources = (cell_ys // group) * columns + cell_xs // group
+    order = np.argsort(sources, kind="stable")
+    cell_ys, cell_xs, sources = cell_ys[order], cell_xs[order], sources[order]
+    groups, first = np.unique(sources, return_index=True)
+    first = np.append(first, len(sources))
+
+    per_batch = max(1, BATCH // (dx.size * group * group))
+    for start in range(0, len(groups), per_batch):
+        batch = groups[start:start + per_batch]
+        a, b = first[start], first[start + len(batch)]
+        local = np.searchsorted(batch, sources[a:b])
+        ys, xs = cell_ys[a:b], cell_xs[a:b]
+        # Trozo de la rejilla al que llegan los rayos del lote
+        y0, y1 = int(ys.min()), int(ys.max()) + 2 * pad + 1
+        x0, x1 = int(xs.min()), int(xs.max()) + 2 * pad + 1
+        # Grupos que ven (y el margen), recortados al mapa
+        top = max(0, (y0 - pad) // group - margin)
+        bottom = min(rows, (y1 - 1 - pad) // group + 1 + margin)
+        left = max(0, (x0 - pad) // group - margin)
+        right = min(columns, (x1 - 1 - pad) // group + 1 + margin)
+        size = (bottom - top) * (right - left)
+        # Celda -> posición en la ventana; fuera del mapa, la posición sobrante ``size``
+        slots = ((group_rows[y0:y1, x0:x1] - top) * (right - left)
+                 + group_columns[y0:y1, x0:x1] - left)
+        slots[group_rows[y0:y1, x0:x1] < 0] = size
+        slots, blocked = slots.ravel(), stops[y0:y1, x0:x1].ravel()
+        offsets = (dy * (x1 - x0) + dx).astype(np.int32)
+
+        owners = np.repeat(local.astype(np.int32) * (size + 1), len(offsets))
+        bases = np.repeat(((ys - y0 + pad) * (x1 - x0) + xs - x0 + pad).astype(np.int32), len(offsets))
+        ray_ids = np.tile(np.arange(len(offsets), dtype=np.int32), b - a)
+        visible = np.zeros((len(batch), size + 1), dtype=bool)
+        flat = visible.reshape(-1)
+        for step in range(offsets.shape[1]):
+            cells = bases + offsets[ray_ids, step]
+            flat[owners + slots[cells]] = True
+            # Visible hasta el primer muro de cada rayo, incluido; fuera del mapa se acaba
+            alive = ~blocked[cells] & (lengths[ray_ids] > step + 1)
+            if not alive.any():
+                break
+            owners, bases, ray_ids = owners[alive], bases[alive], ray_ids[alive]
+        visible = visible[:, :size].reshape(len(batch), bottom - top, right - left)
+        if margin:
+            visible = dilate(visible, margin)
+        yield batch, (top, left), visible
+
+
+def dilate(visible, margin):
+    """Amplía cada conjunto (lote, filas, columnas) ``margin`` grupos en las 8 direcciones."""
+    for _ in range(margin):
+        grown = visible.copy()
+        grown[:, 1:, :] |= visible[:, :-1, :]
+        grown[:, :-1, :] |= visible[:, 1:, :]
+        wide = grown.copy()
+        wide[:, :, 1:] |= grown[:, :, :-1]
+        wide[:, :, :-1] |= grown[:, :, 1:]
+        visible = wide
+    return visible
+
+
+def encode_runs(visible, window, columns, size):
+    """Tramos alternos (no visible, visible, ...) de cada conjunto: (conjunto de cada tramo, longitudes).
+
+    ``visible`` es la ventana (lote, filas, columnas) que empieza en el grupo
+    ``window`` (fila, columna) de un mapa de ``columns`` columnas y ``size``
+    grupos; los tramos cubren el mapa entero en orden de lectura.
+    """
+    count = len(visible)
+    top, left = window
+    change = np.diff(visible.astype(np.int8), axis=2, prepend=0, append=0) != 0
+    rows, ys, xs = np.nonzero(change)
+    cols = (top + ys) * columns + left + xs
+    # Un tramo que acaba al final de una fila y otro que empieza al principio de
+    # la siguiente son el mismo: se quitan los dos cambios
+    same = (rows[1:] == rows[:-1]) & (cols[1:] == cols[:-1])
+    joined = np.zeros(len(cols), dtype=bool)
+    joined[1:] |= same
+    joined[:-1] |= same
+    keep = ~joined & (cols < size)
+    rows, cols = rows[keep], cols[keep]
+    rows = np.concatenate((rows, np.arange(count), np.arange(count)))
+    cols = np.concatenate((cols, np.zeros(count, dtype=np.int64), np.full(count, size)))
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+    same = rows[1:] == rows[:-1]
+    return rows[:-1][same], np.diff(cols)[same]
+
+
+def varints(values):
+    """Codificación LEB128 de enteros no negativos (< 2**35): (bytes, nº de bytes de cada valor)."""
+    values = np.asarray(values, dtype=np.uint64)
+    shifts = np.arange(5, dtype=np.uint64) * np.uint64(7)
+    sizes = 1 + (values[:, None] >= (np.uint64(1) << shifts[1:])).sum(axis=1)
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)
+    more = np.arange(5) < (sizes[:, None] - 1)
+    groups |= np.where(more, np.uint64(0x80), np.uint64(0))
+    used = np.arange(5) < sizes[:, None]
+    return groups[used].astype(np.uint8).tobytes(), sizes
+
+
+def bake(grid, group=1, max_distance=MAX_DISTANCE, margin=MARGIN, rays=RAYS, source=None):
+    """Bytes ``.pvs`` de un MapGrid (``source``: huella del mapa de texto de origen, si se conoce)."""
+    if not 1 <= group <= 0xFFFF:
+        raise VisibilityError("El grupo debe estar entre 1 y 65535")
+    if max_distance <= 0 or margin < 0 or rays < 1:
+        raise VisibilityError("Distancia, margen y rayos deben ser positivos")
+    columns = math.ceil(grid.width / group)
+    rows = math.ceil(grid.height / group)
+    sizes = np.zeros(columns * rows, dtype=np.int64)
+    chunks = []
+    for batch, window, visible in visible_groups(grid, group, max_distance, margin, rays):
+        owners, runs = encode_runs(visible, window, columns, columns * rows)
+        data, lengths = varints(runs)
+        sizes[batch] = np.bincount(owners, weights=lengths, minlength=len(batch)).astype(np.int64)
+        chunks.append(data)
+    data = b"".join(chunks)
+    starts = np.concatenate(([0], np.cumsum(sizes)))
+
+    header = HEADER.pack(MAGIC, VERSION, group, grid.width, grid.height, columns, rows,
+                         max_distance, len(data), SOURCE_HASH if source is not None else 0, source or 0)
+    return header + starts.astype("<u4").tobytes() + data
+
+
+def decode(data):
+    """Cabecera, índice y datos de un ``.pvs`` como dict."""
+    if len(data) < HEADER.size:
+        raise VisibilityError("Fichero demasiado corto")
+    (magic, version, group, width, height, columns, rows, distance, size,
+     flags, source) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise VisibilityError("No es un fichero de visibilidad (falta la marca PVSB)")
+    if version != VERSION:
+        raise VisibilityError(f"Versión {version} no soportada (se espera {VERSION})")
+    try:
+        starts = np.frombuffer(data, dtype="<u4", count=columns * rows + 1, offset=HEADER.size)
+    except ValueError:
+        raise VisibilityError("Fichero truncado") from None
+    offset = HEADER.size + starts.nbytes
+    if len(data) < offset + size or starts[-1] != size:
+        raise VisibilityError("Fichero truncado")
+    return {
+        "grupo": group, "ancho": width, "alto": height, "columnas": columns, "filas": rows,
+        "distancia": distance, "fuente": source if flags & SOURCE_HASH else None,
+        "inicios": starts, "datos": data[offset:offset + size],
+    }
+
+
+def visible_from(pvs, column, row):
+    """Conjunto visible (bool por grupo, en orden de lectura) del grupo dado; None si no tiene datos."""
+    source = row * pvs["columnas"] + column
+    start, end = int(pvs["inicios"][source]), int(pvs["inicios"][source + 1])
+    if start == end:
+        return None
+    visible = np.zeros(pvs["columnas"] * pvs["filas"], dtype=bool)
+    data, position, value, shift, on = pvs["datos"], 0, 0, 0, False
+    for byte in data[start:end]:
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte & 0x80:
+            continue
+        visible[position:position + value] = on
+        position += value
+        on, value, shift = not on, 0, 0
+    return visible
+
+
+def write_visibility(grid, path, **options):
+    data = bake(grid, **options)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        replace_file(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+
+def bake_file(source, dest=None, **options):
+    """Genera el ``.pvs`` de un mapa (por defecto junto al original); devuelve la ruta."""
+    dest = dest or os.path.splitext(source)[0] + EXTENSION
+    write_visibility(load_any(source), dest, source=map_source_hash(source), **options)
+    return dest
+
+
+def summary(pvs):
+    """(grupos con datos, fracción media de grupos visibles)."""
+    sources, total = 0, 0
+    for row in range(pvs["filas"]):
+        for column in range(pvs["columnas"]):
+            visible = visible_from(pvs, column, row)
+            if visible is not None:
+                sources += 1
+                total += visible.mean()
+    return sources, (total / sources if sources else 0.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los conjuntos visibles (.pvs) de un mapa.")
+    parser.add_argument("mapas", nargs="+", help="Mapas de entrada (.txt o .mapb)")
+    parser.add_argument("-o", "--salida", help="Ruta de salida (sólo con un mapa)")
+    parser.add_argument("--grupo", type=int, default=1, help="Lado en celdas de cada grupo (por defecto 1)")
+    parser.add_argument("--distancia", type=float, default=MAX_DISTANCE,
+                        help=f"Alcance de los rayos en celdas (por defecto {MAX_DISTANCE:g}, la niebla)")
+    parser.add_argument("--margen", type=int, default=MARGIN,
+                        help=f"Grupos que se añaden alrededor de lo visible (por defecto {MARGIN})")
+    parser.add_argument("--rayos", type=int, default=RAYS, help=f"Rayos por punto de origen (por defecto {RAYS})")
+    args = parser.parse_args(argv)
+
+    if args.salida and len(args.mapas) > 1:
+        parser.error("-o sólo se puede usar con un único mapa")
+
+    for source in args.mapas:
+        try:
+            dest = bake_file(source, args.salida, group=args.grupo, max_distance=args.distancia,
+                             margin=args.margen, rays=args.rayos)
+            with open(dest, "rb") as f:
+                pvs = decode(f.read())
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"Error: {e}\n")
+        sources, fraction = summary(pvs)
+        print(f"{source} -> {dest} ({os.path.getsize(dest)} bytes): {pvs['columnas']}x{pvs['filas']} "
+              f"grupos, {sources} con datos, {fraction:.0%} visible de media")
+
+
+if __name__ == "__main__":
+    main()
+# [Fin de sección]
@@ -10,6 +10,21 @@ export const CONFIG = {
     DOOR_OPEN_DURATION: 3000,
     DOOR_CLOSE_DISTANCE: 20,
     BLOCK_SIZE: 10,
+    // Usar mapas/<nombre>.mapb (python -m herramientas.mapa_binario) si existe y está al día con el .txt
+    BINARY_MAPS: true,
+    // Navegación de enemigos con mapas/<nombre>.nav (python -m herramientas.navegacion)
+    NAVIGATION: true,
+    // Muros, arbustos y ladrillos fusionados con mapas/<nombre>.bloques.json (python -m herramientas.fusionar_bloques)
+    MERGED_BLOCKS: true,
+    // Colisiones con mapas/<nombre>.indice (python -m herramientas.indice_espacial)
+    SPATIAL_INDEX: true,
+    // Oculta lo que no se ve desde la celda del jugador con mapas/<nombre>.pvs (python -m herramientas.visibilidad)
+    VISIBILITY: true,
+    // Carga el mapa por sectores desde mapas/<nombre>.sectores/ (python -m herramientas.sectores);
+    // sin bloques fusionados ni índice espacial, que son del mapa completo
+    SECTOR_STREAMING: false,
+    // Radio (en sectores) cargado alrededor del sector del jugador (se descargan a partir de SECTOR_RADIUS + 1)
+    SECTOR_RADIUS: 2,
 
     DEBUG_SHOW_HITBOXES: false
 };
@@ -7,23 +7,95 @@ export class MapLoader {
         this.blockSize = CONFIG.BLOCK_SIZE || 10;
     }
 
+    // El .txt es la fuente y construir_assets/vigilar regeneran el .mapb al guardarlo, así que
+    // se usa el .mapb sin descargar el .txt: sólo se pregunta (HEAD) si el .txt es más nuevo.
+    // Si el servidor no da Last-Modified se confía en el .mapb; lo que depende de la huella
+    // (navegación, índice, visibilidad) se comprueba igualmente contra la guardada en el .mapb
     async loadMapFile(mapName = 'default') {
         try {
+            if (CONFIG.BINARY_MAPS) {
+                const [binary, textModified] = await Promise.all([
+                    this.fetchBinaryMap(mapName),
+                    this.lastModified(`mapas/${mapName}.txt`)
+                ]);
+                if (binary && textModified > binary.modified) {
+                    console.warn(`mapas/${mapName}.mapb es anterior a mapas/${mapName}.txt; se usa el .txt`);
+                } else if (binary) {
+                    try {
+                        console.log(`Cargando mapa binario: mapas/${mapName}.mapb`);
+                        const mapData = this.parseBinaryMap(binary.buffer);
+                        mapData.sourceHash = this.storedSourceHash(binary.buffer);
+                        return mapData;
+                    } catch (error) {
+                        console.warn(`mapas/${mapName}.mapb no válido; se usa el .txt:`, error);
+                    }
+                }
+            }
+
             console.log(`Intentando cargar: mapas/${mapName}.txt`);
             const response = await fetch(`mapas/${mapName}.txt`);
-
             if (!response.ok) {
                 throw new Error(`Failed to load map: ${mapName}.txt (Status: ${response.status})`);
             }
-
-            const mapText = await response.text();
-            return this.parseMap(mapText);
+            const textBytes = new Uint8Array(await response.arrayBuffer());
+            const mapData = this.parseMap(new TextDecoder().decode(textBytes));
+            mapData.sourceHash = this.sourceHash(textBytes);
+            return mapData;
         } catch (error) {
             console.error('Error loading map:', error);
             return this.getDefaultMap();
         }
     }
 
+    // Contenido de mapas/<nombre>.mapb y su Last-Modified (NaN si el servidor no lo da), o null
+    // si no existe o no es un mapa binario (el servidor de desarrollo responde a lo que no
+    // existe con index.html y estado 200)
+    async fetchBinaryMap(mapName) {
+        try {
+            const response = await fetch(`mapas/${mapName}.mapb`);
+            if (!response.ok) return null;
+            const buffer = await response.arrayBuffer();
+            const bytes = new Uint8Array(buffer, 0, Math.min(4, buffer.byteLength));
+            if (String.fromCharCode(...bytes) !== 'MAPB') return null;
+            return { buffer, modified: Date.parse(response.headers.get('Last-Modified')) };
+        } catch (error) {
+            console.warn(`mapas/${mapName}.mapb no disponible:`, error);
+            return null;
+        }
+    }
+
+    // Last-Modified de un fichero con una petición HEAD (sin descargarlo); NaN si no existe
+    // (o el servidor responde con index.html) o no lo da
+    async lastModified(url) {
+        try {
+            const response = await fetch(url, { method: 'HEAD' });
+            const type = response.headers.get('Content-Type') || '';
+            if (!response.ok || type.startsWith('text/html')) return NaN;
+            return Date.parse(response.headers.get('Last-Modified'));
+        } catch (error) {
+            return NaN;
+        }
+    }
+
+    // Huella de unos bytes, como mapa_binario.source_hash: suma de
+    // (byte + 1) * 0x01000193^(i + 1) módulo 2^32
+    sourceHash(bytes) {
+        let hash = 0;
+        let power = 1;
+        for (let i = 0; i < bytes.length; i++) {
+            power = Math.imul(power, 0x01000193);
+            hash = (hash + Math.imul(bytes[i] + 1, power)) | 0;
+        }
+        return hash >>> 0;
+    }
+
+    // Huella del .txt de origen guardada al final de un .mapb (flag 2), o null
+    storedSourceHash(buffer) {
+        const view = new DataView(buffer);
+        if (buffer.byteLength < 30 || !(view.getUint16(6, true) & 2)) return null;
+        return view.getUint32(buffer.byteLength - 4, true);
+    }
+
     parseMap(mapText) {
     const lines = mapText.trim().replace(/\r\n/g, '\n').split('\n');
     const height = lines.length;
@@ -47,6 +119,117 @@ export class MapLoader {
 
     const width = lines.length > 0 ? countBlocks(lines[0]) : 0;
 
+    const forEachCell = (visit) => {
+        for (let y = 0; y < height; y++) {
+            const line = lines[y];
+            let x = 0;
+            let blockIndex = 0;
+
+            while (x < line.length) {
+
+                let char = line[x];
+                let rawToken = null;
+
+                if (char === '(') {
+                    const end = line.indexOf(')', x);
+                    if (end !== -1) {
+                        rawToken = line.substring(x + 1, end);
+                        x = end + 1;
+                    } else {
+                        rawToken = "";
+                        x++;
+                    }
+                } else {
+                    x++;
+                    continue;
+                }
+
+                let base = rawToken;
+                let rotation = 0;
+
+                const match = rawToken.match(/^(.+?)\[(\d+)\]$/);
+                if (match) {
+                    base = match[1];
+                    rotation = parseInt(match[2], 10);
+                }
+
+                visit(blockIndex, y, base, rotation);
+                blockIndex++;
+            }
+        }
+    };
+
+    return this.buildMapData(width, height, forEachCell);
+}
+
+    // Formato binario RLE (ver herramientas/mapa_binario.py): cabecera, paleta,
+    // índice de filas opcional, tramos (código u8, longitud u16) y rotaciones dispersas
+    // origin ({ x, y, width, height }): el mapa es un sector (ver herramientas/sectores.py)
+    // que empieza en la celda (x, y) de un mapa completo de width x height
+    parseBinaryMap(buffer, origin = null) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    const magic = String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]);
+    if (magic !== 'MAPB') {
+        throw new Error('Invalid binary map (missing MAPB magic)');
+    }
+
+    const version = view.getUint16(4, true);
+    if (version > 1) {
+        throw new Error(`Unsupported binary map version: ${version}`);
+    }
+    const flags = view.getUint16(6, true);
+    const width = view.getUint32(8, true);
+    const height = view.getUint32(12, true);
+    const paletteLength = view.getUint16(16, true);
+    const runCount = view.getUint32(18, true);
+    const rotationCount = view.getUint32(22, true);
+
+    let offset = 26;
+    const decoder = new TextDecoder();
+    const palette = [];
+    for (let i = 0; i < paletteLength; i++) {
+        const size = bytes[offset];
+        palette.push(decoder.decode(bytes.subarray(offset + 1, offset + 1 + size)));
+        offset += 1 + size;
+    }
+
+    if (flags & 1) {
+        offset += 4 * height;
+    }
+
+    const runsOffset = offset;
+    const rotationCellsOffset = runsOffset + 3 * runCount;
+    const rotationValuesOffset = rotationCellsOffset + 4 * rotationCount;
+
+    const forEachCell = (visit) => {
+        let cell = 0;
+        let nextRotation = 0;
+        let rotatedCell = rotationCount > 0 ? view.getUint32(rotationCellsOffset, true) : -1;
+
+        for (let r = 0; r < runCount; r++) {
+            const base = palette[bytes[runsOffset + 3 * r]];
+            const length = view.getUint16(runsOffset + 3 * r + 1, true);
+
+            for (let i = 0; i < length; i++, cell++) {
+                let rotation = 0;
+                if (cell === rotatedCell) {
+                    rotation = view.getUint16(rotationValuesOffset + 2 * nextRotation, true);
+                    nextRotation++;
+                    rotatedCell = nextRotation < rotationCount
+                        ? view.getUint32(rotationCellsOffset + 4 * nextRotation, true)
+                        : -1;
+                }
+                visit(cell % width, Math.floor(cell / width), base, rotation);
+            }
+        }
+    };
+
+    return this.buildMapData(width, height, forEachCell, origin);
+}
+
+    // Recorre las celdas (x, y, bloque, rotación) y clasifica cada una
+    buildMapData(width, height, forEachCell, origin = null) {
     const walls = [];
     const bushes = [];
     const bricks = [];
@@ -61,41 +244,10 @@ export class MapLoader {
     let playerSpawn = null;
     let playerRotation = 0;
 
-    for (let y = 0; y < height; y++) {
-        const line = lines[y];
-        let x = 0;
-        let blockIndex = 0;
-
-        while (x < line.length) {
-
-            let char = line[x];
-            let rawToken = null;
-
-            if (char === '(') {
-                const end = line.indexOf(')', x);
-                if (end !== -1) {
-                    rawToken = line.substring(x + 1, end);
-                    x = end + 1;
-                } else {
-                    rawToken = "";
-                    x++;
-                }
-            } else {
-                x++;
-                continue;
-            }
-
-            let base = rawToken;
-            let rotation = 0;
-
-            const match = rawToken.match(/^(.+?)\[(\d+)\]$/);
-            if (match) {
-                base = match[1];
-                rotation = parseInt(match[2], 10);
-            }
-
-            const position = this.gridToWorld(blockIndex, y, width, height);
-            blockIndex++;
+    forEachCell((gridX, y, base, rotation) => {
+            const position = origin
+                ? this.gridToWorld(gridX + origin.x, y + origin.y, origin.width, origin.height)
+                : this.gridToWorld(gridX, y, width, height);
 
             switch (base) {
 
@@ -193,8 +345,7 @@ export class MapLoader {
                     validFloors.push(position);
                     break;
             }
-        }
-    }
+    });
 
     if (!playerSpawn) {
         if (validFloors.length > 0) {
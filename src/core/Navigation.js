@@ -0,0 +1,316 @@
+/*sección [NAVEGACIÓN] Datos de navegación precalculados (herramientas/navegacion.py)*/
+
+// Direcciones (dx, dy) de los códigos 1..8 de los campos; y de la rejilla = z del mundo
+const DIRECTIONS = [
+    [0, 0],
+    [1, 0], [0, 1], [-1, 0], [0, -1],
+    [1, 1], [-1, 1], [-1, -1], [1, -1]
+];
+
+const BLOCKED = 0xFF;
+const UNREACHABLE = 0xFFFF;
+const NAME_SIZE = 16;
+
+export class NavigationMap {
+    // Carga mapas/<nombre>.nav; null si no existe o no corresponde al mapa (el juego sigue con
+    // las colisiones de siempre). Con un .nav de antes de editar el mapa los enemigos
+    // atravesarían los muros nuevos, así que tienen que coincidir tamaño y huella
+    static async load(mapName, mapData, blockSize) {
+        try {
+            const response = await fetch(`mapas/${mapName}.nav`);
+            if (!response.ok) return null;
+            const nav = new NavigationMap(await response.arrayBuffer(), blockSize);
+            if (nav.width !== mapData.width || nav.height !== mapData.height
+                || nav.sourceHash === null || nav.sourceHash !== mapData.sourceHash) {
+                console.warn(`mapas/${mapName}.nav no corresponde al mapa; se ignora`);
+                return null;
+            }
+            return nav;
+        } catch (error) {
+            console.warn('Navigation data not available:', error);
+            return null;
+        }
+    }
+
+    constructor(buffer, blockSize) {
+        const view = new DataView(buffer);
+        const bytes = new Uint8Array(buffer);
+        const magic = String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]);
+        if (magic !== 'NAVM') {
+            throw new Error('Invalid navigation file (missing NAVM magic)');
+        }
+        const version = view.getUint16(4, true);
+        if (version !== 2) {
+            throw new Error(`Unsupported navigation version: ${version}`);
+        }
+
+        this.sector = view.getUint16(6, true);
+        this.width = view.getUint32(8, true);
+        this.height = view.getUint32(12, true);
+        this.regionCount = view.getUint32(16, true);
+        const edgeCount = view.getUint32(20, true);
+        const fieldCount = view.getUint16(24, true);
+        this.sourceHash = view.getUint16(26, true) & 1 ? view.getUint32(28, true) : null;
+        this.blockSize = blockSize;
+        this.sectorsX = Math.ceil(this.width / this.sector);
+        this.exterior = this.regionCount;
+
+        const cells = this.width * this.height;
+        const align = (n) => (n + 3) & ~3;
+        let offset = 32;
+
+        this.walkable = bytes.subarray(offset, offset + Math.ceil(cells / 8));
+        offset = align(offset + Math.ceil(cells / 8));
+        this.local = bytes.subarray(offset, offset + cells);
+        offset = align(offset + cells);
+        const sectorCount = this.sectorsX * Math.ceil(this.height / this.sector);
+        this.sectorBase = new Uint32Array(buffer, offset, sectorCount + 1);
+        offset += 4 * (sectorCount + 1);
+        this.edgeStart = new Uint32Array(buffer, offset, this.regionCount + 2);
+        offset += 4 * (this.regionCount + 2);
+        this.edgeTarget = new Uint32Array(buffer, offset, edgeCount);
+        offset += 4 * edgeCount;
+        this.portals = new Int32Array(buffer, offset, 2 * edgeCount);
+        offset += 8 * edgeCount;
+
+        this.fields = {};
+        const decoder = new TextDecoder();
+        for (let i = 0; i < fieldCount; i++) {
+            const name = decoder.decode(bytes.subarray(offset, offset + NAME_SIZE)).replace(/\0+$/, '');
+            offset += NAME_SIZE;
+            const distance = new Uint16Array(buffer, offset, cells);
+            offset = align(offset + 2 * cells);
+            const direction = bytes.subarray(offset, offset + cells);
+            offset = align(offset + cells);
+            this.fields[name] = { distance, direction };
+        }
+
+        // Ruta hacia la región del objetivo: arista de salida de cada región (-1 = ninguna)
+        const nodes = this.regionCount + 1;
+        this.nextEdge = new Int32Array(nodes).fill(-1);
+        this.visited = new Uint8Array(nodes);
+        this.queue = new Uint32Array(nodes);
+        this.targetRegion = -1;
+        // Flujos por celdas dentro de cada región, calculados al necesitarlos
+        this.edgeFlows = new Map();
+        this.targetFlow = null;
+        this.targetFlowKey = -1;
+    }
+
+    // ----- CONSULTAS POR CELDA -----
+
+    cellX(x) {
+        return Math.floor((x + (this.width * this.blockSize) / 2) / this.blockSize);
+    }
+
+    cellY(z) {
+        return Math.floor((z + (this.height * this.blockSize) / 2) / this.blockSize);
+    }
+
+    isWalkableCell(gx, gy) {
+        if (gx < 0 || gy < 0 || gx >= this.width || gy >= this.height) return true;
+        const i = gy * this.width + gx;
+        return (this.walkable[i >> 3] & (1 << (i & 7))) !== 0;
+    }
+
+    // Sustituye al recorrido de todos los muros y árboles: mira las celdas de las esquinas de la caja
+    isBoxBlocked(minX, minZ, maxX, maxZ) {
+        const x0 = this.cellX(minX), x1 = this.cellX(maxX);
+        const y0 = this.cellY(minZ), y1 = this.cellY(maxZ);
+        return !this.isWalkableCell(x0, y0) || !this.isWalkableCell(x1, y0)
+            || !this.isWalkableCell(x0, y1) || !this.isWalkableCell(x1, y1);
+    }
+
+    // Región de una posición del mundo: exterior fuera del mapa, -1 dentro de un muro
+    regionAt(x, z) {
+        const gx = this.cellX(x), gy = this.cellY(z);
+        if (gx < 0 || gy < 0 || gx >= this.width || gy >= this.height) return this.exterior;
+        const local = this.local[gy * this.width + gx];
+        if (local === BLOCKED) return -1;
+        const sector = Math.floor(gy / this.sector) * this.sectorsX + Math.floor(gx / this.sector);
+        return this.sectorBase[sector] + local;
+    }
+
+    // ----- PERSECUCIÓN POR REGIONES -----
+
+    // Recalcula las rutas (BFS sobre el grafo de regiones) sólo si el objetivo cambia de región
+    setTarget(position) {
+        const target = this.regionAt(position.x, position.z);
+        if (target < 0 || target === this.targetRegion) return;
+        this.targetRegion = target;
+
+        const { edgeStart, edgeTarget, nextEdge, visited, queue } = this;
+        nextEdge.fill(-1);
+        visited.fill(0);
+        visited[target] = 1;
+        queue[0] = target;
+        let head = 0, tail = 1;
+        while (head < tail) {
+            const region = queue[head++];
+            for (let e = edgeStart[region]; e < edgeStart[region + 1]; e++) {
+                const neighbour = edgeTarget[e];
+                if (visited[neighbour]) continue;
+                visited[neighbour] = 1;
+                queue[tail++] = neighbour;
+                // El grafo es simétrico: buscar la arista de vuelta neighbour -> region
+                for (let back = edgeStart[neighbour]; back < edgeStart[neighbour + 1]; back++) {
+                    if (edgeTarget[back] === region) {
+                        nextEdge[neighbour] = back;
+                        break;
+                    }
+                }
+            }
+        }
+    }
+
+    // Dirección (en out, normalizada en XZ) desde position hacia el objetivo de setTarget
+    steer(position, target, out) {
+        const region = this.regionAt(position.x, position.z);
+        let flow = null;
+        if (region >= 0 && region !== this.exterior) {
+            if (region === this.targetRegion) {
+                flow = this.getTargetFlow(region, this.cellX(target.x), this.cellY(target.z));
+            } else if (this.nextEdge[region] >= 0) {
+                flow = this.getEdgeFlow(region, this.nextEdge[region]);
+            }
+        }
+
+        const gx = this.cellX(position.x), gy = this.cellY(position.z);
+        const code = flow ? flow.directions[(gy - flow.y0) * flow.width + gx - flow.x0] : 0;
+        if (code) {
+            // Hacia el centro de la celda vecina que indica el flujo
+            out.set(this.cellCenterX(gx + DIRECTIONS[code][0]) - position.x, 0,
+                this.cellCenterZ(gy + DIRECTIONS[code][1]) - position.z);
+        } else if (region >= 0 && region !== this.targetRegion && this.nextEdge[region] >= 0) {
+            const edge = this.nextEdge[region];
+            out.set(this.cellCenterX(this.portals[2 * edge]) - position.x, 0,
+                this.cellCenterZ(this.portals[2 * edge + 1]) - position.z);
+        } else {
+            // Misma celda, sin ruta o dentro de un muro: en línea recta
+            out.set(target.x - position.x, 0, target.z - position.z);
+        }
+        return out.normalize();
+    }
+
+    // Flujo dentro de una región hacia la celda de paso de una arista (fijo: se calcula una vez)
+    getEdgeFlow(region, edge) {
+        let flow = this.edgeFlows.get(edge);
+        if (!flow) {
+            flow = this.regionFlow(region, this.portals[2 * edge], this.portals[2 * edge + 1]);
+            this.edgeFlows.set(edge, flow);
+        }
+        return flow;
+    }
+
+    // Flujo dentro de la región del objetivo hacia su celda (se rehace si cambia de celda)
+    getTargetFlow(region, gx, gy) {
+        const key = gy * this.width + gx;
+        if (this.targetFlowKey !== key) {
+            this.targetFlow = this.regionFlow(region, gx, gy);
+            this.targetFlowKey = key;
+        }
+        return this.targetFlow;
+    }
+
+    sectorOf(region) {
+        // Último sector cuya primera región es <= region
+        let lo = 0, hi = this.sectorBase.length - 1;
+        while (hi - lo > 1) {
+            const mid = (lo + hi) >> 1;
+            if (this.sectorBase[mid] <= region) lo = mid; else hi = mid;
+        }
+        return lo;
+    }
+
+    // BFS por celdas dentro del sector de la región (como mucho sector x sector celdas)
+    // desde la celda objetivo, que puede estar justo fuera del sector
+    regionFlow(region, goalX, goalY) {
+        const sector = this.sectorOf(region);
+        const localId = region - this.sectorBase[sector];
+        const x0 = (sector % this.sectorsX) * this.sector;
+        const y0 = Math.floor(sector / this.sectorsX) * this.sector;
+        const width = Math.min(this.sector, this.width - x0);
+        const height = Math.min(this.sector, this.height - y0);
+
+        // Rejilla con un margen de una celda para la celda objetivo
+        const stride = width + 2;
+        const distance = new Int32Array(stride * (height + 2)).fill(-1);
+        const inside = new Uint8Array(stride * (height + 2));
+        for (let y = 0; y < height; y++) {
+            for (let x = 0; x < width; x++) {
+                if (this.local[(y0 + y) * this.width + x0 + x] === localId) {
+                    inside[(y + 1) * stride + x + 1] = 1;
+                }
+            }
+        }
+
+        const directions = new Uint8Array(width * height);
+        const goalLocalX = goalX - x0 + 1, goalLocalY = goalY - y0 + 1;
+        if (goalLocalX < 0 || goalLocalY < 0 || goalLocalX > width + 1 || goalLocalY > height + 1) {
+            return { x0, y0, width, directions };
+        }
+        const goal = goalLocalY * stride + goalLocalX;
+        inside[goal] = 1;
+        distance[goal] = 0;
+        const queue = [goal];
+        for (let head = 0; head < queue.length; head++) {
+            const cell = queue[head];
+            for (let k = 1; k <= 4; k++) {
+                const next = cell + DIRECTIONS[k][0] + DIRECTIONS[k][1] * stride;
+                if (next >= 0 && next < inside.length && inside[next] && distance[next] < 0) {
+                    distance[next] = distance[cell] + 1;
+                    queue.push(next);
+                }
+            }
+        }
+
+        // Dirección hacia la vecina más cercana; diagonales sin cortar esquinas
+        for (let y = 0; y < height; y++) {
+            for (let x = 0; x < width; x++) {
+                const cell = (y + 1) * stride + x + 1;
+                let best = distance[cell];
+                if (best <= 0) continue;
+                for (let k = 1; k <= 8; k++) {
+                    const [dx, dy] = DIRECTIONS[k];
+                    const next = cell + dx + dy * stride;
+                    if (distance[next] < 0 || distance[next] >= best) continue;
+                    if (dx && dy && (distance[cell + dx] < 0 || distance[cell + dy * stride] < 0)) continue;
+                    best = distance[next];
+                    directions[y * width + x] = k;
+                }
+            }
+        }
+        return { x0, y0, width, directions };
+    }
+
+    cellCenterX(gx) {
+        return gx * this.blockSize - (this.width * this.blockSize) / 2 + this.blockSize / 2;
+    }
+
+    cellCenterZ(gy) {
+        return gy * this.blockSize - (this.height * this.blockSize) / 2 + this.blockSize / 2;
+    }
+
+    // ----- CAMPOS A PUNTOS CLAVE ('jugador', 'puertas', 'spawns') -----
+
+    // Distancia en celdas al punto clave más cercano (Infinity si no hay ruta o no hay campo)
+    fieldDistance(name, x, z) {
+        const field = this.fields[name];
+        const gx = this.cellX(x), gy = this.cellY(z);
+        if (!field || gx < 0 || gy < 0 || gx >= this.width || gy >= this.height) return Infinity;
+        const distance = field.distance[gy * this.width + gx];
+        return distance === UNREACHABLE ? Infinity : distance;
+    }
+
+    // Dirección hacia el punto clave más cercano; false si no hay
+    fieldDirection(name, x, z, out) {
+        const field = this.fields[name];
+        const gx = this.cellX(x), gy = this.cellY(z);
+        if (!field || gx < 0 || gy < 0 || gx >= this.width || gy >= this.height) return false;
+        const code = field.direction[gy * this.width + gx];
+        if (code === 0) return false;
+        out.set(DIRECTIONS[code][0], 0, DIRECTIONS[code][1]).normalize();
+        return true;
+    }
+}
+/*[Fin de sección]*/
@@ -0,0 +1,163 @@
+/*sección [SECTORES] Carga y descarga de sectores alrededor del jugador (herramientas/sectores.py)*/
+import * as THREE from '../../node_modules/three/build/three.module.js';
+import { CONFIG } from '../Constants.js';
+import { Door } from '../entities/Door.js';
+
+// Clave de una posición del mapa (centro de celda) para recordar su estado entre cargas
+function cellKey(position) {
+    return `${position.x},${position.z}`;
+}
+
+export class SectorStreamer {
+    // Carga mapas/<nombre>.sectores/manifiesto.json; null si no existe
+    static async load(mapName, world) {
+        try {
+            const base = `mapas/${mapName}.sectores/`;
+            const response = await fetch(base + 'manifiesto.json');
+            if (!response.ok) return null;
+            const manifest = await response.json();
+            if (manifest.version !== 1) {
+                console.warn(`${base}manifiesto.json: versión ${manifest.version} no soportada; se ignora`);
+                return null;
+            }
+            return new SectorStreamer(manifest, base, world);
+        } catch (error) {
+            console.warn('Map sectors not available:', error);
+            return null;
+        }
+    }
+
+    constructor(manifest, base, world) {
+        this.manifest = manifest;
+        this.base = base;
+        this.world = world;
+        this.radius = CONFIG.SECTOR_RADIUS;
+
+        const blockSize = CONFIG.BLOCK_SIZE;
+        this.sectorSize = manifest.tamSector * blockSize;
+        this.minX = -(manifest.ancho * blockSize) / 2;
+        this.minZ = -(manifest.alto * blockSize) / 2;
+
+        this.loaded = new Map();        // índice -> { objects, doors, spawns } de World.buildSector
+        this.current = -1;
+        this.queue = Promise.resolve();
+        this.collected = new Set();     // comida y munición ya recogidas
+        this.spawnTimes = new Map();    // lastSpawnTime de los spawns de sectores descargados
+    }
+
+    // mapData como el de MapLoader pero sin objetos: los añade cada sector al cargarse
+    getMapData() {
+        const manifest = this.manifest;
+        let playerSpawn = new THREE.Vector3(0, 30, 0);
+        let playerRotation = 0;
+        if (manifest.jugador) {
+            const position = this.world.mapLoader.gridToWorld(manifest.jugador.x, manifest.jugador.y,
+                manifest.ancho, manifest.alto);
+            playerSpawn = new THREE.Vector3(position.x, 1, position.z);
+            playerRotation = manifest.jugador.rotacion;
+        }
+        return {
+            walls: [],
+            bushes: [],
+            bricks: [],
+            enemySpawns: [],
+            playerSpawn,
+            playerRotation,
+            doorPositions: [],
+            foodItems: [],
+            ammoItems: [],
+            models3D: [],
+            extraItems: [],
+            width: manifest.ancho,
+            height: manifest.alto,
+            blockSize: CONFIG.BLOCK_SIZE,
+            sourceHash: manifest.fuente ?? null
+        };
+    }
+
+    // Sector de un punto del mundo (fuera del mapa, el más cercano)
+    sectorAt(x, z) {
+        const { columnas: columns, filas: rows } = this.manifest;
+        const column = Math.min(columns - 1, Math.max(0, Math.floor((x - this.minX) / this.sectorSize)));
+        const row = Math.min(rows - 1, Math.max(0, Math.floor((z - this.minZ) / this.sectorSize)));
+        return row * columns + column;
+    }
+
+    // Cada frame; sólo hace algo cuando el jugador cambia de sector. Las cargas van en cola,
+    // de una en una, y devuelve la promesa de la última
+    update(position) {
+        const sector = this.sectorAt(position.x, position.z);
+        if (sector !== this.current) {
+            this.current = sector;
+            this.queue = this.queue
+                .then(() => this.refresh(sector))
+                .catch(error => console.error('Error cargando sectores:', error));
+        }
+        return this.queue;
+    }
+
+    async refresh(center) {
+        if (center !== this.current) return;
+        const columns = this.manifest.columnas;
+        const rows = this.manifest.filas;
+        const cx = center % columns;
+        const cy = Math.floor(center / columns);
+        const distance = index => Math.max(Math.abs(index % columns - cx), Math.abs(Math.floor(index / columns) - cy));
+
+        // Un sector de margen antes de descargar, para no recargar al ir y volver por un borde
+        for (const [index, sector] of this.loaded) {
+            if (distance(index) > this.radius + 1) this.unloadSector(index, sector);
+        }
+
+        const wanted = [];
+        for (let y = Math.max(0, cy - this.radius); y <= Math.min(rows - 1, cy + this.radius); y++) {
+            for (let x = Math.max(0, cx - this.radius); x <= Math.min(columns - 1, cx + this.radius); x++) {
+                const index = y * columns + x;
+                if (this.manifest.sectores[index].fichero && !this.loaded.has(index)) wanted.push(index);
+            }
+        }
+        wanted.sort((a, b) => distance(a) - distance(b));
+
+        for (const index of wanted) {
+            // Si el jugador ya está en otro sector, lo que falte lo pide su actualización
+            if (center !== this.current) return;
+            await this.loadSector(index);
+        }
+    }
+
+    async loadSector(index) {
+        const manifest = this.manifest;
+        const entry = manifest.sectores[index];
+        const response = await fetch(this.base + entry.fichero);
+        if (!response.ok) {
+            throw new Error(`Failed to load sector: ${entry.fichero} (Status: ${response.status})`);
+        }
+        const [x, y] = entry.limites;
+        const data = this.world.mapLoader.parseBinaryMap(await response.arrayBuffer(),
+            { x, y, width: manifest.ancho, height: manifest.alto });
+
+        // Lo recogido no reaparece y los spawns siguen su ritmo
+        data.foodItems = data.foodItems.filter(position => !this.collected.has(cellKey(position)));
+        data.ammoItems = data.ammoItems.filter(ammo => !this.collected.has(cellKey(ammo.position)));
+        data.enemySpawns.forEach(spawn => {
+            spawn.lastSpawnTime = this.spawnTimes.get(cellKey(spawn.position)) || 0;
+        });
+
+        const sector = await this.world.buildSector(data);
+        sector.doors.forEach(mesh => new Door(mesh));
+        this.loaded.set(index, sector);
+    }
+
+    unloadSector(index, sector) {
+        for (const object of sector.objects) {
+            if (object.userData.collected) this.collected.add(cellKey(object.position));
+        }
+        for (const spawn of sector.spawns) {
+            this.spawnTimes.set(cellKey(spawn.position), spawn.lastSpawnTime);
+        }
+        Door.removeMeshes(new Set(sector.doors));
+        this.world.removeSector(sector);
+        this.loaded.delete(index);
+    }
+}
+/*[Fin de sección]*/
@@ -0,0 +1,114 @@
+/*sección [ÍNDICE ESPACIAL] Rejilla uniforme de colisiones (herramientas/indice_espacial.py)*/
+
+// Máscaras de categoría para las consultas (bit = categoría del fichero)
+export const SPATIAL = {
+    WALL: 1,
+    DOOR: 2,
+    FOOD: 4,
+    AMMO: 8,
+    MODEL: 16
+};
+
+export class SpatialIndex {
+    // Carga mapas/<nombre>.indice; null si no existe o no corresponde al mapa. Los índices de
+    // objeto apuntan a Door.instances, foodMeshes y ammoMeshes: si la huella del mapa no es la
+    // de mapData (el mapa se editó después del bake) apuntarían a objetos equivocados
+    static async load(mapName, mapData) {
+        try {
+            const response = await fetch(`mapas/${mapName}.indice`);
+            if (!response.ok) return null;
+            const index = new SpatialIndex(await response.arrayBuffer());
+            if (index.mapWidth !== mapData.width || index.mapHeight !== mapData.height
+                || index.sourceHash === null || index.sourceHash !== mapData.sourceHash) {
+                console.warn(`mapas/${mapName}.indice no corresponde al mapa; se ignora`);
+                return null;
+            }
+            return index;
+        } catch (error) {
+            console.warn('Spatial index not available:', error);
+            return null;
+        }
+    }
+
+    constructor(buffer) {
+        const view = new DataView(buffer);
+        const bytes = new Uint8Array(buffer);
+        const magic = String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]);
+        if (magic !== 'SIDX') {
+            throw new Error('Invalid spatial index (missing SIDX magic)');
+        }
+        const version = view.getUint16(4, true);
+        if (version !== 2) {
+            throw new Error(`Unsupported spatial index version: ${version}`);
+        }
+        const flags = view.getUint16(6, true);
+
+        this.mapWidth = view.getUint32(8, true);
+        this.mapHeight = view.getUint32(12, true);
+        this.columns = view.getUint32(16, true);
+        this.rows = view.getUint32(20, true);
+        this.cellSize = view.getFloat32(24, true);
+        this.minX = view.getFloat32(28, true);
+        this.minZ = view.getFloat32(32, true);
+        const count = view.getUint32(36, true);
+        const entryCount = view.getUint32(40, true);
+        this.sourceHash = flags & 1 ? view.getUint32(44, true) : null;
+
+        let offset = 48;
+        this.categories = bytes.subarray(offset, offset + count);
+        offset += (count + 3) & ~3;
+        this.refs = new Uint32Array(buffer, offset, count);
+        offset += 4 * count;
+        this.boxes = new Float32Array(buffer, offset, 6 * count);
+        offset += 24 * count;
+        this.cellStart = new Uint32Array(buffer, offset, this.columns * this.rows + 1);
+        offset += 4 * (this.columns * this.rows + 1);
+        this.entries = new Uint32Array(buffer, offset, entryCount);
+
+        // Un objeto aparece en todas las celdas que toca: marca de la última consulta que lo vio
+        this.seen = new Uint32Array(count);
+        this.stamp = 0;
+    }
+
+    // Llama a visit(categoría, índice, objeto) una vez por cada objeto de las celdas que toca
+    // el rectángulo XZ; si visit devuelve true se para y query devuelve true
+    query(minX, minZ, maxX, maxZ, mask, visit) {
+        const x0 = Math.max(0, Math.floor((minX - this.minX) / this.cellSize));
+        const x1 = Math.min(this.columns - 1, Math.floor((maxX - this.minX) / this.cellSize));
+        const z0 = Math.max(0, Math.floor((minZ - this.minZ) / this.cellSize));
+        const z1 = Math.min(this.rows - 1, Math.floor((maxZ - this.minZ) / this.cellSize));
+        if (x0 > x1 || z0 > z1) return false;
+
+        const stamp = ++this.stamp;
+        for (let z = z0; z <= z1; z++) {
+            for (let x = x0; x <= x1; x++) {
+                const cell = z * this.columns + x;
+                for (let e = this.cellStart[cell]; e < this.cellStart[cell + 1]; e++) {
+                    const item = this.entries[e];
+                    if (this.seen[item] === stamp || !(mask & (1 << this.categories[item]))) continue;
+                    this.seen[item] = stamp;
+                    if (visit(1 << this.categories[item], this.refs[item], item)) return true;
+                }
+            }
+        }
+        return false;
+    }
+
+    // ¿Choca la caja (Box3) con algún objeto estático de las categorías de mask?
+    intersectsBox(box, mask = SPATIAL.WALL | SPATIAL.MODEL) {
+        const b = this.boxes;
+        return this.query(box.min.x, box.min.z, box.max.x, box.max.z, mask, (category, ref, item) => {
+            const i = 6 * item;
+            return box.min.x <= b[i + 3] && box.max.x >= b[i]
+                && box.min.y <= b[i + 4] && box.max.y >= b[i + 1]
+                && box.min.z <= b[i + 5] && box.max.z >= b[i + 2];
+        });
+    }
+
+    // Índices (en su lista del juego) de los objetos de una categoría cerca de position
+    forEachNear(position, radius, mask, visit) {
+        this.query(position.x - radius, position.z - radius, position.x + radius, position.z + radius, mask,
+            (category, ref) => { visit(ref, category); return false; });
+    }
+}
+/*[Fin de sección]*/
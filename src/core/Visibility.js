@@ -0,0 +1,98 @@
+/*sección [VISIBILIDAD] Conjuntos potencialmente visibles por celda (herramientas/visibilidad.py)*/
+
+export class VisibilitySets {
+    // Carga mapas/<nombre>.pvs; null si no existe o no corresponde al mapa. Con un .pvs de antes
+    // de editar el mapa se ocultaría lo que ahora se ve, así que la huella tiene que coincidir
+    static async load(mapName, mapData, blockSize) {
+        try {
+            const response = await fetch(`mapas/${mapName}.pvs`);
+            if (!response.ok) return null;
+            const sets = new VisibilitySets(await response.arrayBuffer(), blockSize);
+            if (sets.mapWidth !== mapData.width || sets.mapHeight !== mapData.height
+                || sets.sourceHash === null || sets.sourceHash !== mapData.sourceHash) {
+                console.warn(`mapas/${mapName}.pvs no corresponde al mapa; se ignora`);
+                return null;
+            }
+            return sets;
+        } catch (error) {
+            console.warn('Visibility sets not available:', error);
+            return null;
+        }
+    }
+
+    constructor(buffer, blockSize) {
+        const view = new DataView(buffer);
+        const bytes = new Uint8Array(buffer);
+        const magic = String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]);
+        if (magic !== 'PVSB') {
+            throw new Error('Invalid visibility sets (missing PVSB magic)');
+        }
+        const version = view.getUint16(4, true);
+        if (version !== 2) {
+            throw new Error(`Unsupported visibility sets version: ${version}`);
+        }
+
+        this.group = view.getUint16(6, true);
+        this.mapWidth = view.getUint32(8, true);
+        this.mapHeight = view.getUint32(12, true);
+        this.columns = view.getUint32(16, true);
+        this.rows = view.getUint32(20, true);
+        const size = view.getUint32(28, true);
+        this.sourceHash = view.getUint16(32, true) & 1 ? view.getUint32(36, true) : null;
+
+        const count = this.columns * this.rows;
+        this.starts = new Uint32Array(buffer, 40, count + 1);
+        this.data = bytes.subarray(40 + 4 * (count + 1), 40 + 4 * (count + 1) + size);
+
+        this.groupSize = this.group * blockSize;
+        this.minX = -(this.mapWidth * blockSize) / 2;
+        this.minZ = -(this.mapHeight * blockSize) / 2;
+        this.visible = new Uint8Array(count);
+    }
+
+    // Grupo (columna, fila) de un punto del mundo; -1 fuera del mapa
+    groupAt(x, z) {
+        const column = Math.floor((x - this.minX) / this.groupSize);
+        const row = Math.floor((z - this.minZ) / this.groupSize);
+        if (column < 0 || row < 0 || column >= this.columns || row >= this.rows) return -1;
+        return row * this.columns + column;
+    }
+
+    // Rango de grupos [x0, x1] x [z0, z1] que toca un rectángulo XZ, recortado al mapa
+    groupRange(minX, minZ, maxX, maxZ) {
+        const last = (value, count) => Math.min(count - 1, Math.max(0, value));
+        return {
+            x0: last(Math.floor((minX - this.minX) / this.groupSize), this.columns),
+            x1: last(Math.floor((maxX - this.minX) / this.groupSize), this.columns),
+            z0: last(Math.floor((minZ - this.minZ) / this.groupSize), this.rows),
+            z1: last(Math.floor((maxZ - this.minZ) / this.groupSize), this.rows)
+        };
+    }
+
+    // Decodifica en this.visible (1 = visible) el conjunto de un grupo; null si no tiene datos
+    visibleFrom(group) {
+        if (group < 0) return null;
+        const start = this.starts[group];
+        const end = this.starts[group + 1];
+        if (start === end) return null;
+
+        const visible = this.visible;
+        let position = 0;
+        let value = 0;
+        let shift = 0;
+        let on = 0;
+        for (let i = start; i < end; i++) {
+            const byte = this.data[i];
+            value += (byte & 0x7F) * 2 ** shift;
+            shift += 7;
+            if (byte & 0x80) continue;
+            visible.fill(on, position, position + value);
+            position += value;
+            on ^= 1;
+            value = 0;
+            shift = 0;
+        }
+        return visible;
+    }
+}
+/*[Fin de sección]*/
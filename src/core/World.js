@@ -2,6 +2,10 @@
 import * as THREE from '../../node_modules/three/build/three.module.js';
 import { CONFIG } from '../Constants.js';
 import { MapLoader } from './MapLoader.js';
+import { NavigationMap } from './Navigation.js';
+import { SpatialIndex } from './SpatialIndex.js';
+import { VisibilitySets } from './Visibility.js';
+import { SectorStreamer } from './Sectors.js';
 
 import { OBJLoader } from '../../node_modules/three/examples/jsm/loaders/OBJLoader.js';
 import { MTLLoader } from '../../node_modules/three/examples/jsm/loaders/MTLLoader.js';
@@ -18,11 +22,37 @@ export class World {
         this.doorMeshes = [];
         this.foodMeshes = [];
         this.ammoMeshes = [];
+        this.bakedModels = {};
+        this.navigation = null;
+        this.mergedBlocks = null;
+        this.spatialIndex = null;
+        this.visibility = null;
+        this.cullables = [];
+        this.visibleGroup = -2;
+        this.sectors = null;
+        this.sectorObjects = null;
+        this.textures = {};
     }
 
     async init(mapName = 'default') {
-        this.mapData = await this.mapLoader.loadMapFile(mapName);
+        if (CONFIG.SECTOR_STREAMING) {
+            this.sectors = await SectorStreamer.load(mapName, this);
+        }
+        this.mapData = this.sectors ? this.sectors.getMapData() : await this.mapLoader.loadMapFile(mapName);
         this.enemySpawns = this.mapData.enemySpawns;
+        if (CONFIG.NAVIGATION) {
+            this.navigation = await NavigationMap.load(mapName, this.mapData, CONFIG.BLOCK_SIZE);
+        }
+        // Las cajas fusionadas y el índice espacial son del mapa completo: no sirven por sectores
+        if (CONFIG.MERGED_BLOCKS && !this.sectors) {
+            this.mergedBlocks = await this.loadMergedBlocks(mapName);
+        }
+        if (CONFIG.SPATIAL_INDEX && !this.sectors) {
+            this.spatialIndex = await SpatialIndex.load(mapName, this.mapData);
+        }
+        if (CONFIG.VISIBILITY) {
+            this.visibility = await VisibilitySets.load(mapName, this.mapData, CONFIG.BLOCK_SIZE);
+        }
 
         const textureLoader = new THREE.TextureLoader();
         let skyTexture = null;
@@ -107,6 +137,11 @@ export class World {
         floor.updateMatrix();
         this.scene.add(floor);
 
+        if (this.sectors) {
+            await this.sectors.update(this.mapData.playerSpawn);
+            return;
+        }
+
         this.createWallsFromMap();
         this.createDoorsFromMap();
         this.createFoodItemsFromMap();
@@ -115,14 +150,120 @@ export class World {
         await this.create3DModelsFromMap();
     }
 
+    // Añade a la escena un objeto del mapa; si se está construyendo un sector, lo apunta en él
+    addObject(object) {
+        this.scene.add(object);
+        if (this.sectorObjects) this.sectorObjects.push(object);
+    }
+
+    // Textura compartida por ruta (los sectores vuelven a crear sus objetos al recargarse)
+    loadTexture(path, onError = () => { }) {
+        if (!(path in this.textures)) {
+            this.textures[path] = new THREE.TextureLoader().load(path, () => { }, () => { }, onError);
+        }
+        return this.textures[path];
+    }
+
+    // Crea los objetos de un sector (mapData de MapLoader con posiciones globales). Los
+    // sectores se construyen de uno en uno (Sectors.js), así que basta un único colector
+    async buildSector(mapData) {
+        const objects = [];
+        const firstDoor = this.doorMeshes.length;
+        this.sectorObjects = objects;
+        try {
+            this.createWallsFromMap(mapData);
+            this.createDoorsFromMap(mapData);
+            this.createFoodItemsFromMap(mapData);
+            this.createAmmoItemsFromMap(mapData);
+            await this.create3DModelsFromMap(mapData);
+        } finally {
+            this.sectorObjects = null;
+        }
+        this.enemySpawns.push(...mapData.enemySpawns);
+        return { objects, doors: this.doorMeshes.slice(firstDoor), spawns: mapData.enemySpawns };
+    }
+
+    // Quita lo creado por buildSector. Las listas se filtran en el sitio porque
+    // EnemyManager y Player guardan referencias a ellas
+    removeSector(sector) {
+        const objects = new Set(sector.objects);
+        const spawns = new Set(sector.spawns);
+        for (const object of sector.objects) {
+            this.scene.remove(object);
+            if (object.isSprite) {
+                object.material.dispose();
+            } else if (object.userData.ownsResources) {
+                object.traverse(node => {
+                    if (node.isMesh) {
+                        node.geometry.dispose();
+                        node.material.dispose();
+                    }
+                });
+            }
+        }
+        removeWhere(this.walls, wall => objects.has(wall));
+        removeWhere(this.doorMeshes, mesh => objects.has(mesh));
+        removeWhere(this.foodMeshes, mesh => objects.has(mesh));
+        removeWhere(this.ammoMeshes, mesh => objects.has(mesh));
+        removeWhere(this.cullables, cullable => objects.has(cullable.object));
+        removeWhere(this.enemySpawns, spawn => spawns.has(spawn));
+    }
+
+    // Carga y descarga sectores alrededor de position (sólo con CONFIG.SECTOR_STREAMING)
+    updateSectors(position) {
+        if (this.sectors) this.sectors.update(position);
+    }
+
     getWalls() {
         return this.walls;
     }
 
+    // Datos de navegación de mapas/<nombre>.nav (null si no se han generado)
+    getNavigation() {
+        return this.navigation;
+    }
+
+    // Índice espacial de mapas/<nombre>.indice (null si no se ha generado)
+    getSpatialIndex() {
+        return this.spatialIndex;
+    }
+
     getEnemySpawns() {
         return this.enemySpawns;
     }
 
+    // Objeto estático que se oculta cuando ninguna celda del rectángulo XZ es visible
+    registerCullable(object, minX, minZ, maxX, maxZ) {
+        if (!this.visibility) return;
+        this.cullables.push({ object, ...this.visibility.groupRange(minX, minZ, maxX, maxZ) });
+        this.visibleGroup = -2;
+    }
+
+    // Muestra sólo lo visible desde la celda de position (mapas/<nombre>.pvs); cada frame,
+    // pero sólo recorre los objetos cuando el jugador cambia de celda
+    updateVisibility(position) {
+        if (!this.visibility) return;
+        const group = this.visibility.groupAt(position.x, position.z);
+        if (group === this.visibleGroup) return;
+        this.visibleGroup = group;
+
+        // Fuera del mapa o en una celda sin datos se ve todo
+        const visible = this.visibility.visibleFrom(group);
+        const columns = this.visibility.columns;
+        for (const cullable of this.cullables) {
+            let shown = !visible;
+            for (let z = cullable.z0; !shown && z <= cullable.z1; z++) {
+                for (let x = cullable.x0; x <= cullable.x1; x++) {
+                    if (visible[z * columns + x]) {
+                        shown = true;
+                        break;
+                    }
+                }
+            }
+            cullable.object.visible = shown;
+        }
+    }
+
     getPlayerSpawn() {
         return this.mapData ? this.mapData.playerSpawn : null;
     }
@@ -139,29 +280,22 @@ export class World {
         return this.ammoMeshes;
     }
 
-    createAmmoItemsFromMap() {
-        this.ammoMeshes = [];
-
-        if (!this.mapData.ammoItems || this.mapData.ammoItems.length === 0) {
+    createAmmoItemsFromMap(mapData = this.mapData) {
+        if (!mapData.ammoItems || mapData.ammoItems.length === 0) {
             return;
         }
 
-        const textureLoader = new THREE.TextureLoader();
-        const pistolAmmoTexture = textureLoader.load(
+        const pistolAmmoTexture = this.loadTexture(
             'assets/textures/pistol_ammo.png',
-            () => { },
-            () => { },
             () => { console.error("No se pudo cargar la textura de munición de pistola"); }
         );
 
-        const machinegunAmmoTexture = textureLoader.load(
+        const machinegunAmmoTexture = this.loadTexture(
             'assets/textures/municion_ametra.png',
-            () => { },
-            () => { },
             () => { console.error("No se pudo cargar la textura de munición de ametralladora"); }
         );
 
-        this.mapData.ammoItems.forEach(ammoData => {
+        mapData.ammoItems.forEach(ammoData => {
             const texture = ammoData.type === 'pistol' ? pistolAmmoTexture : machinegunAmmoTexture;
 
             const spriteMaterial = new THREE.SpriteMaterial({
@@ -185,27 +319,24 @@ export class World {
                 rotationSpeed: 2.0
             };
 
-            this.scene.add(ammoSprite);
+            this.addObject(ammoSprite);
             this.ammoMeshes.push(ammoSprite);
+            this.registerCullable(ammoSprite, ammoData.position.x, ammoData.position.z,
+                ammoData.position.x, ammoData.position.z);
         });
     }
 
-    createFoodItemsFromMap() {
-        this.foodMeshes = [];
-
-        if (!this.mapData.foodItems || this.mapData.foodItems.length === 0) {
+    createFoodItemsFromMap(mapData = this.mapData) {
+        if (!mapData.foodItems || mapData.foodItems.length === 0) {
             return;
         }
 
-        const textureLoader = new THREE.TextureLoader();
-        const foodTexture = textureLoader.load(
+        const foodTexture = this.loadTexture(
             'assets/textures/kebab.png',
-            () => { },
-            () => { },
             () => { console.error("No se pudo cargar la textura de comida"); }
         );
 
-        this.mapData.foodItems.forEach(pos => {
+        mapData.foodItems.forEach(pos => {
             const spriteMaterial = new THREE.SpriteMaterial({
                 map: foodTexture,
                 color: 0xffffff,
@@ -225,19 +356,20 @@ export class World {
                 rotationSpeed: 2.0
             };
 
-            this.scene.add(foodSprite);
+            this.addObject(foodSprite);
             this.foodMeshes.push(foodSprite);
+            this.registerCullable(foodSprite, pos.x, pos.z, pos.x, pos.z);
         });
     }
 
-    async create3DModelsFromMap() {
-        if (!this.mapData.models3D || this.mapData.models3D.length === 0) return;
+    async create3DModelsFromMap(mapData = this.mapData) {
+        if (!mapData.models3D || mapData.models3D.length === 0) return;
 
         const objLoader = new OBJLoader();
         const mtlLoader = new MTLLoader();
         const textureLoader = new THREE.TextureLoader();
 
-        for (const entry of this.mapData.models3D) {
+        for (const entry of mapData.models3D) {
 
             const modelPath = entry.model;
             const basePath = modelPath.replace(".obj", "");
@@ -249,60 +381,69 @@ export class World {
             let finalObject = null;
 
             try {
-                mtlLoader.setResourcePath(baseFolder);
-                objLoader.setResourcePath(baseFolder);
-
-                let materials = await new Promise(resolve => {
-                    mtlLoader.load(
-                        mtlPath,
-                        mats => resolve(mats),
-                        undefined,
-                        () => resolve(null)
-                    );
-                });
+                const baked = await this.loadBakedModel(basePath, baseFolder);
 
-                if (materials) {
-                    materials.preload();
-                    objLoader.setMaterials(materials);
-
-                    finalObject = await new Promise((resolve, reject) => {
-                        objLoader.load(modelPath, resolve, undefined, reject);
+                if (baked) {
+                    finalObject = new THREE.Mesh(baked.geometry, baked.materials);
+                } else {
+                    mtlLoader.setResourcePath(baseFolder);
+                    objLoader.setResourcePath(baseFolder);
+
+                    let materials = await new Promise(resolve => {
+                        mtlLoader.load(
+                            mtlPath,
+                            mats => resolve(mats),
+                            undefined,
+                            () => resolve(null)
+                        );
                     });
 
-                    finalObject.traverse(node => {
-                        if (node.isMesh) {
-                            node.material = new THREE.MeshStandardMaterial({
-                                map: node.material.map || null,
-                                color: node.material.color || 0xffffff
-                            });
+                    if (materials) {
+                        materials.preload();
+                        objLoader.setMaterials(materials);
+
+                        finalObject = await new Promise((resolve, reject) => {
+                            objLoader.load(modelPath, resolve, undefined, reject);
+                        });
+
+                        finalObject.traverse(node => {
+                            if (node.isMesh) {
+                                node.material = new THREE.MeshStandardMaterial({
+                                    map: node.material.map || null,
+                                    color: node.material.color || 0xffffff
+                                });
+                            }
+                        });
+
+                    } else {
+                        let texture = null;
+                        try {
+                            texture = textureLoader.load(
+                                jpgPath,
+                                () => { },
+                                () => { },
+                                () => { texture = null; }
+                            );
+                        } catch (err) {
+                            texture = null;
                         }
-                    });
 
-                } else {
-                    let texture = null;
-                    try {
-                        texture = textureLoader.load(
-                            jpgPath,
-                            () => { },
-                            () => { },
-                            () => { texture = null; }
-                        );
-                    } catch (err) {
-                        texture = null;
+                        finalObject = await new Promise((resolve, reject) => {
+                            objLoader.load(modelPath, resolve, undefined, reject);
+                        });
+
+                        finalObject.traverse(node => {
+                            if (node.isMesh) {
+                                node.material = new THREE.MeshStandardMaterial({
+                                    map: texture || null,
+                                    color: texture ? 0xffffff : 0xffffff
+                                });
+                            }
+                        });
                     }
 
-                    finalObject = await new Promise((resolve, reject) => {
-                        objLoader.load(modelPath, resolve, undefined, reject);
-                    });
-
-                    finalObject.traverse(node => {
-                        if (node.isMesh) {
-                            node.material = new THREE.MeshStandardMaterial({
-                                map: texture || null,
-                                color: texture ? 0xffffff : 0xffffff
-                            });
-                        }
-                    });
+                    // Geometría y materiales propios: se liberan al descargar su sector
+                    finalObject.userData.ownsResources = true;
                 }
 
                 finalObject.scale.set(1, 1, 1);
@@ -316,7 +457,9 @@ export class World {
                 const rotationRadians = (rotationDegrees * Math.PI) / 180;
                 finalObject.rotation.y = rotationRadians;
 
-                this.scene.add(finalObject);
+                this.addObject(finalObject);
+                this.registerCullable(finalObject, entry.position.x, entry.position.z,
+                    entry.position.x, entry.position.z);
 
                 const colliderWidth = 5;
                 const colliderDepth = 5;
@@ -348,49 +491,117 @@ export class World {
         }
     }
 
-    createDoorsFromMap() {
-        this.doorMeshes = [];
+    loadBakedModel(basePath, baseFolder) {
+        if (!(basePath in this.bakedModels)) {
+            this.bakedModels[basePath] = this.fetchBakedModel(basePath, baseFolder);
+        }
+        return this.bakedModels[basePath];
+    }
+
+    async fetchBakedModel(basePath, baseFolder) {
+        try {
+            const headerResponse = await fetch(`${basePath}.mesh.json`);
+            if (!headerResponse.ok) return null;
+            const header = await headerResponse.json();
 
-        if (!this.mapData.doorPositions || this.mapData.doorPositions.length === 0) {
+            const binResponse = await fetch(baseFolder + header.binary);
+            if (!binResponse.ok) return null;
+            const buffer = await binResponse.arrayBuffer();
+
+            const vertexRange = header.buffers.vertices;
+            const indexRange = header.buffers.indices;
+
+            const vertexArray = new Float32Array(buffer, vertexRange.byteOffset, vertexRange.byteLength / 4);
+            const interleaved = new THREE.InterleavedBuffer(vertexArray, header.vertexStride);
+
+            const geometry = new THREE.BufferGeometry();
+            for (const [name, attribute] of Object.entries(header.attributes)) {
+                geometry.setAttribute(
+                    name,
+                    new THREE.InterleavedBufferAttribute(interleaved, attribute.size, attribute.offset)
+                );
+            }
+
+            const IndexArray = header.indexType === 'uint16' ? Uint16Array : Uint32Array;
+            const indexArray = new IndexArray(
+                buffer,
+                indexRange.byteOffset,
+                indexRange.byteLength / IndexArray.BYTES_PER_ELEMENT
+            );
+            geometry.setIndex(new THREE.BufferAttribute(indexArray, 1));
+
+            const bounds = header.bounds;
+            geometry.boundingBox = new THREE.Box3(
+                new THREE.Vector3().fromArray(bounds.min),
+                new THREE.Vector3().fromArray(bounds.max)
+            );
+            geometry.boundingSphere = new THREE.Sphere(
+                new THREE.Vector3().fromArray(bounds.center),
+                bounds.radius
+            );
+
+            const textureLoader = new THREE.TextureLoader();
+            const materials = header.groups.map((group, i) => {
+                geometry.addGroup(group.start, group.count, i);
+                const info = header.materials[group.material] || {};
+                return new THREE.MeshStandardMaterial({
+                    map: info.map ? textureLoader.load(baseFolder + info.map) : null,
+                    color: new THREE.Color().fromArray(info.color || [1, 1, 1])
+                });
+            });
+
+            return { geometry, materials };
+        } catch (err) {
+            return null;
+        }
+    }
+
+    createDoorsFromMap(mapData = this.mapData) {
+        if (!mapData.doorPositions || mapData.doorPositions.length === 0) {
             return;
         }
 
         const doorWidth = CONFIG.BLOCK_SIZE;
         const doorHeight = CONFIG.BLOCK_SIZE;
 
-        const doorGeometry = new THREE.PlaneGeometry(doorWidth, doorHeight);
+        if (!this.sharedGeometries.door) {
+            this.sharedGeometries.door = new THREE.PlaneGeometry(doorWidth, doorHeight);
+        }
+        const doorGeometry = this.sharedGeometries.door;
 
-        const textureLoader = new THREE.TextureLoader();
-        let doorTexture = null;
+        if (!this.sharedMaterials.door) {
+            const textureLoader = new THREE.TextureLoader();
+            let doorTexture = null;
 
-        try {
-            doorTexture = textureLoader.load(
-                'assets/textures/door.webp',
-                () => { },
-                () => { },
-                () => { doorTexture = null; }
-            );
-        } catch (err) {
-            doorTexture = null;
-        }
+            try {
+                doorTexture = textureLoader.load(
+                    'assets/textures/door.webp',
+                    () => { },
+                    () => { },
+                    () => { doorTexture = null; }
+                );
+            } catch (err) {
+                doorTexture = null;
+            }
 
-        let doorMaterial;
-        if (doorTexture) {
-            doorTexture.wrapS = THREE.RepeatWrapping;
-            doorTexture.wrapT = THREE.RepeatWrapping;
-            doorTexture.repeat.set(1, 1);
-            doorMaterial = new THREE.MeshLambertMaterial({
-                map: doorTexture,
-                side: THREE.DoubleSide
-            });
-        } else {
-            doorMaterial = new THREE.MeshLambertMaterial({
-                color: 0x00ffff,
-                side: THREE.DoubleSide
-            });
+            if (doorTexture) {
+                doorTexture.wrapS = THREE.RepeatWrapping;
+                doorTexture.wrapT = THREE.RepeatWrapping;
+                doorTexture.repeat.set(1, 1);
+                this.sharedMaterials.door = new THREE.MeshLambertMaterial({
+                    map: doorTexture,
+                    side: THREE.DoubleSide
+                });
+            } else {
+                this.sharedMaterials.door = new THREE.MeshLambertMaterial({
+                    color: 0x00ffff,
+                    side: THREE.DoubleSide
+                });
+            }
         }
+        const doorMaterial = this.sharedMaterials.door;
 
-        this.mapData.doorPositions.forEach(doorData => {
+        mapData.doorPositions.forEach(doorData => {
             const doorMesh = new THREE.Mesh(doorGeometry, doorMaterial);
 
             doorMesh.position.set(doorData.position.x, doorHeight / 2, doorData.position.z);
@@ -406,8 +617,10 @@ export class World {
                 id: Math.random()
             };
 
-            this.scene.add(doorMesh);
+            this.addObject(doorMesh);
             this.doorMeshes.push(doorMesh);
+            this.registerCullable(doorMesh, doorData.position.x, doorData.position.z,
+                doorData.position.x, doorData.position.z);
         });
     }
 
@@ -415,13 +628,11 @@ export class World {
         return this.mapData ? this.mapData.playerRotation : 0;
     }
 
-    createWallsFromMap() {
-        this.walls = [];
-
+    createWallsFromMap(mapData = this.mapData) {
         const blockTypes = [
             {
                 key: 'wall',
-                data: this.mapData.walls,
+                data: mapData.walls,
                 width: CONFIG.BLOCK_SIZE,
                 height: CONFIG.BLOCK_SIZE,
                 texturePath: 'assets/textures/wall.png',
@@ -429,7 +640,7 @@ export class World {
             },
             {
                 key: 'bush',
-                data: this.mapData.bushes,
+                data: mapData.bushes,
                 width: CONFIG.BLOCK_SIZE,
                 height: CONFIG.BLOCK_SIZE * 0.5,
                 texturePath: 'assets/textures/arbusto.avif',
@@ -437,7 +648,7 @@ export class World {
             },
             {
                 key: 'brick',
-                data: this.mapData.bricks,
+                data: mapData.bricks,
                 width: CONFIG.BLOCK_SIZE * 0.7,
                 height: CONFIG.BLOCK_SIZE * 0.6,
                 texturePath: 'assets/textures/brick.png',
@@ -446,11 +657,12 @@ export class World {
         ];
 
         const textureLoader = new THREE.TextureLoader();
+        const merged = this.mergedBlocks;
 
         blockTypes.forEach(config => {
             if (!config.data || config.data.length === 0) return;
 
-            if (!this.sharedGeometries[config.key]) {
+            if (!merged && !this.sharedGeometries[config.key]) {
                 this.sharedGeometries[config.key] = new THREE.BoxGeometry(
                     config.width,
                     config.height,
@@ -481,6 +693,11 @@ export class World {
                 }
             }
 
+            if (merged) {
+                this.createMergedBlocks(config, merged.cajas[config.key] || []);
+                return;
+            }
+
             config.data.forEach(itemData => {
                 const mesh = new THREE.Mesh(this.sharedGeometries[config.key], this.sharedMaterials[config.key]);
 
@@ -500,9 +717,80 @@ export class World {
 
                 mesh.updateMatrixWorld(true);
                 this.walls.push(mesh);
-                this.scene.add(mesh);
+                this.addObject(mesh);
+                this.registerCullable(mesh, itemData.position.x, itemData.position.z,
+                    itemData.position.x, itemData.position.z);
             });
         });
+
+        if (merged) {
+            // Colisiones fusionadas: sólo hace falta la caja, no la malla
+            const boxes = merged.colisiones;
+            for (let i = 0; i < boxes.length; i += 6) {
+                const boundingBox = new THREE.Box3(
+                    new THREE.Vector3(boxes[i], boxes[i + 1], boxes[i + 2]),
+                    new THREE.Vector3(boxes[i + 3], boxes[i + 4], boxes[i + 5])
+                );
+                this.walls.push({ userData: { boundingBox } });
+            }
+        }
+    }
+
+    // Cajas fusionadas de mapas/<nombre>.bloques.json (python -m herramientas.fusionar_bloques)
+    async loadMergedBlocks(mapName) {
+        try {
+            const response = await fetch(`mapas/${mapName}.bloques.json`);
+            if (!response.ok) return null;
+            const merged = await response.json();
+            // fuente: huella del .txt del que salió (mapData.sourceHash); si no coincide, el mapa
+            // se editó después del bake
+            if (merged.version !== 2 || merged.tamBloque !== CONFIG.BLOCK_SIZE
+                || merged.ancho !== this.mapData.width || merged.alto !== this.mapData.height
+                || merged.fuente == null || merged.fuente !== this.mapData.sourceHash) {
+                console.warn(`mapas/${mapName}.bloques.json no corresponde al mapa; se ignora`);
+                return null;
+            }
+            return merged;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    // Una malla por rectángulo [x, y, ancho, alto, rotación] (en celdas) en vez de una por celda
+    createMergedBlocks(config, boxes) {
+        const size = CONFIG.BLOCK_SIZE;
+        const offsetX = (this.mapData.width * size) / 2;
+        const offsetZ = (this.mapData.height * size) / 2;
+
+        boxes.forEach(([x, y, w, h, rotation]) => {
+            const mesh = new THREE.Mesh(this.getMergedGeometry(config, w, h), this.sharedMaterials[config.key]);
+            mesh.position.set((x + w / 2) * size - offsetX, config.height / 2, (y + h / 2) * size - offsetZ);
+            mesh.rotation.y = (rotation * Math.PI) / 180;
+            mesh.matrixAutoUpdate = false;
+            mesh.updateMatrix();
+            this.scene.add(mesh);
+            // Centros de la primera y la última celda del rectángulo
+            this.registerCullable(mesh, (x + 0.5) * size - offsetX, (y + 0.5) * size - offsetZ,
+                (x + w - 0.5) * size - offsetX, (y + h - 0.5) * size - offsetZ);
+        });
+    }
+
+    // Caja de w x h celdas con la textura repetida una vez por celda
+    getMergedGeometry(config, w, h) {
+        const key = `${config.key}_${w}x${h}`;
+        if (!this.sharedGeometries[key]) {
+            const inset = CONFIG.BLOCK_SIZE - config.width;
+            const geometry = new THREE.BoxGeometry(w * CONFIG.BLOCK_SIZE - inset, config.height, h * CONFIG.BLOCK_SIZE - inset);
+            // Caras en orden +x, -x, +y, -y, +z, -z (4 vértices cada una)
+            const repeats = [[h, 1], [h, 1], [w, h], [w, h], [w, 1], [w, 1]];
+            const uv = geometry.attributes.uv;
+            for (let i = 0; i < uv.count; i++) {
+                const [repeatU, repeatV] = repeats[Math.floor(i / 4)];
+                uv.setXY(i, uv.getX(i) * repeatU, uv.getY(i) * repeatV);
+            }
+            this.sharedGeometries[key] = geometry;
+        }
+        return this.sharedGeometries[key];
     }
 
     dispose() {
@@ -512,6 +800,18 @@ export class World {
         this.doorMeshes = [];
         this.foodMeshes = [];
         this.ammoMeshes = [];
+        this.cullables = [];
+        Object.values(this.textures).forEach(texture => texture.dispose());
+        this.textures = {};
+    }
+}
+
+// Quita en el sitio los elementos de list que cumplen remove
+function removeWhere(list, remove) {
+    let kept = 0;
+    for (const item of list) {
+        if (!remove(item)) list[kept++] = item;
     }
+    list.length = kept;
 }
 /*[Fin de sección]*/
\ No newline at end of file
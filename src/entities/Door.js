@@ -35,6 +35,11 @@ export class Door {
         Door.instances = [];
     }
 
+    // Quita las puertas de un conjunto de mallas (al descargar un sector del mapa)
+    static removeMeshes(meshes) {
+        Door.instances = Door.instances.filter(door => !meshes.has(door.mesh));
+    }
+
     open() {
         if (this.isOpen) return;
         this.isOpen = true;
@@ -1,6 +1,7 @@
 /*sección [GESTOR DE ENEMIGOS] Código de gestión de enemigos*/
 import * as THREE from '../../node_modules/three/build/three.module.js';
 import { CONFIG, ENEMY_TYPES, AUDIO_CONFIG } from '../Constants.js'; //
+import { SPATIAL } from '../core/SpatialIndex.js';
 
 export class EnemyManager {
 
@@ -27,6 +28,10 @@ export class EnemyManager {
 
         this.spawnPoints = [];
         this.walls = world.getWalls();
+        // ⭐ Navegación precalculada (null si el mapa no tiene .nav)
+        this.navigation = world.getNavigation ? world.getNavigation() : null;
+        // ⭐ Índice espacial precalculado (null si el mapa no tiene .indice)
+        this.spatialIndex = world.getSpatialIndex ? world.getSpatialIndex() : null;
         this.bloodParticles = new Map(); //
         this.bloodGeometry = new THREE.BoxGeometry(0.12, 0.12, 0.12);
         this.bloodMaterial = new THREE.MeshBasicMaterial({ //
@@ -407,6 +412,8 @@ export class EnemyManager {
     update(delta, playerPos, onHitPlayer) {
         const tempEnemyBox = new THREE.Box3();
         const now = performance.now(); //
+        const nav = this.navigation;
+        if (nav) nav.setTarget(playerPos);
 
         // 1. Actualizar enemigos
         for (let i = this.enemies.length - 1; i >= 0; i--) {
@@ -450,7 +457,11 @@ export class EnemyManager {
             }
 
             const direction = new THREE.Vector3();
-            direction.subVectors(playerPos, enemy.position).normalize(); //
+            if (nav) {
+                nav.steer(enemy.position, playerPos, direction);
+            } else {
+                direction.subVectors(playerPos, enemy.position).normalize(); //
+            }
             const moveDist = enemy.userData.speed * delta;
             const tentativePos = enemy.position.clone().addScaledVector(direction, moveDist);
 
@@ -475,16 +486,30 @@ export class EnemyManager {
             } //
 
             let blocked = false;
-            for (const wall of this.walls) { //
-                if (!wall.userData.boundingBox) continue;
-                if (tempEnemyBox.intersectsBox(wall.userData.boundingBox)) { //
-                    blocked = true;
-                    break; //
+            if (nav) {
+                blocked = nav.isBoxBlocked(tempEnemyBox.min.x, tempEnemyBox.min.z, tempEnemyBox.max.x, tempEnemyBox.max.z);
+            } else if (this.spatialIndex) {
+                blocked = this.spatialIndex.intersectsBox(tempEnemyBox, SPATIAL.WALL | SPATIAL.MODEL);
+            } else {
+                for (const wall of this.walls) { //
+                    if (!wall.userData.boundingBox) continue;
+                    if (tempEnemyBox.intersectsBox(wall.userData.boundingBox)) { //
+                        blocked = true;
+                        break; //
+                    }
                 }
             }
 
             if (!blocked) {
                 enemy.position.copy(tentativePos);
+            } else if (nav) {
+                // Deslizar a lo largo del muro: probar cada eje por separado
+                if (!nav.isBoxBlocked(tentativePos.x - s.x, enemy.position.z - s.z, tentativePos.x + s.x, enemy.position.z + s.z)) {
+                    enemy.position.x = tentativePos.x;
+                } else if (!nav.isBoxBlocked(enemy.position.x - s.x, tentativePos.z - s.z, enemy.position.x + s.x, tentativePos.z + s.z)) {
+                    enemy.position.z = tentativePos.z;
+                }
+                enemy.position.y = tentativePos.y;
             } //
 
             const floorHeight = s.y / 2.0;
@@ -520,7 +545,9 @@ export class EnemyManager {
             }
 
             // B) Colisión con paredes (si no chocó con jugador)
-            if (!destroyed) {
+            if (!destroyed && this.spatialIndex) {
+                destroyed = this.spatialIndex.intersectsBox(projBox, SPATIAL.WALL | SPATIAL.MODEL);
+            } else if (!destroyed) {
                 for (const wall of this.walls) {
                     if (wall.userData.boundingBox && projBox.intersectsBox(wall.userData.boundingBox)) {
                         destroyed = true; //
@@ -4,6 +4,7 @@ import { CONFIG } from '../Constants.js';
 import { WeaponSystem } from './Weapon.js';
 import { UIManager } from '../UI.js';
 import { Door } from '../entities/Door.js';
+import { SPATIAL } from '../core/SpatialIndex.js';
 import { PointerLockControls } from '../../node_modules/three/examples/jsm/controls/PointerLockControls.js';
 export class Player {
 
@@ -26,6 +27,9 @@ export class Player {
         this.isGameOver = false;
 
         this.radius = 2.0;
+        // Índice espacial precalculado (null si el mapa no tiene .indice)
+        this.spatialIndex = world.getSpatialIndex ? world.getSpatialIndex() : null;
+        this.nearbyDoors = [];
 
         camera.position.set(0, CONFIG.PLAYER_HEIGHT, 0);
 
@@ -203,8 +207,8 @@ export class Player {
         const ammoItems = this.world.getAmmoMeshes();
         const playerPos = this.getPosition();
 
-        ammoItems.forEach(ammoMesh => {
-            if (ammoMesh.userData.collected) return;
+        const checkAmmo = ammoMesh => {
+            if (!ammoMesh || ammoMesh.userData.collected) return;
 
             const distance = playerPos.distanceTo(ammoMesh.position);
             if (distance < 2.0) {
@@ -216,7 +220,36 @@ export class Player {
                 ammoMesh.userData.collected = true;
                 this.world.scene.remove(ammoMesh);
             }
+        };
+
+        if (this.spatialIndex) {
+            // Sólo la munición de las celdas cercanas
+            this.spatialIndex.forEachNear(playerPos, 2.0, SPATIAL.AMMO, ref => checkAmmo(ammoItems[ref]));
+        } else {
+            ammoItems.forEach(checkAmmo);
+        }
+    }
+
+    // Puertas que pueden tocar al jugador: las de las celdas cercanas si hay índice, si no todas
+    getNearbyDoors(playerPos) {
+        if (!this.spatialIndex) return Door.instances;
+        this.nearbyDoors.length = 0;
+        this.spatialIndex.forEachNear(playerPos, 2.0, SPATIAL.DOOR, ref => {
+            if (Door.instances[ref]) this.nearbyDoors.push(Door.instances[ref]);
         });
+        return this.nearbyDoors;
+    }
+
+    collidesWithWalls(box) {
+        if (this.spatialIndex) {
+            return this.spatialIndex.intersectsBox(box, SPATIAL.WALL | SPATIAL.MODEL);
+        }
+        for (const wall of this.world.getWalls()) {
+            if (wall.userData.boundingBox && box.intersectsBox(wall.userData.boundingBox)) {
+                return true;
+            }
+        }
+        return false;
     }
 
     checkCollisions(oldPosition) {
@@ -227,7 +260,7 @@ export class Player {
         playerBox.min.set(playerPos.x - offset, playerPos.y - 1.0, playerPos.z - offset);
         playerBox.max.set(playerPos.x + offset, playerPos.y + 1.0, playerPos.z + offset);
 
-        for (const door of Door.instances) {
+        for (const door of this.getNearbyDoors(playerPos)) {
             if (!door.isOpen) {
                 if (!door.mesh.userData.boundingBox) {
                     door.mesh.geometry.computeBoundingBox();
@@ -252,43 +285,20 @@ export class Player {
             }
         }
 
-        const walls = this.world.getWalls();
-        let collided = false;
-
-        for (const wall of walls) {
-            if (!wall.userData.boundingBox) continue;
-            if (playerBox.intersectsBox(wall.userData.boundingBox)) {
-                collided = true;
-                break;
-            }
-        }
-
-        if (!collided) return;
+        if (!this.collidesWithWalls(playerBox)) return;
         const slidePosX = new THREE.Vector3(oldPosition.x, playerPos.y, playerPos.z);
         const slideBoxX = new THREE.Box3(
             new THREE.Vector3(slidePosX.x - offset, slidePosX.y - 1.0, slidePosX.z - offset),
             new THREE.Vector3(slidePosX.x + offset, slidePosX.y + 1.0, slidePosX.z + offset)
         );
-        let blockedX = false;
-        for (const wall of walls) {
-            if (wall.userData.boundingBox && slideBoxX.intersectsBox(wall.userData.boundingBox)) {
-                blockedX = true;
-                break;
-            }
-        }
+        const blockedX = this.collidesWithWalls(slideBoxX);
 
         const slidePosZ = new THREE.Vector3(playerPos.x, playerPos.y, oldPosition.z);
         const slideBoxZ = new THREE.Box3(
             new THREE.Vector3(slidePosZ.x - offset, slidePosZ.y - 1.0, slidePosZ.z - offset),
             new THREE.Vector3(slidePosZ.x + offset, slidePosZ.y + 1.0, slidePosZ.z + offset)
         );
-        let blockedZ = false;
-        for (const wall of walls) {
-            if (wall.userData.boundingBox && slideBoxZ.intersectsBox(wall.userData.boundingBox)) {
-                blockedZ = true;
-                break;
-            }
-        }
+        const blockedZ = this.collidesWithWalls(slideBoxZ);
         if (!blockedX) {
             playerPos.copy(slidePosX);
             this.velocity.z = 0;
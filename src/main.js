@@ -105,6 +105,8 @@ class Game { //
                 this.player.takeDamage(damage);
             });
             Door.updateAll(delta, this.player.getPosition()); //
+            this.world.updateVisibility(this.player.getPosition());
+            this.world.updateSectors(this.player.getPosition());
 
             this.updateFoodItems(delta);
 